@@ -0,0 +1,33 @@
+#!/bin/sh
+# records the mix from the shared memory output of voctocore, which needs
+#   [shmoutput]
+#   enabled = true
+# shmsrc delivers the frames without caps, they have to match the
+# configured videocaps and audiocaps
+confdir="`dirname "$0"`/../"
+. $confdir/default-config.sh
+if [ -f $confdir/config.sh ]; then
+	. $confdir/config.sh
+fi
+SHMPATH=${SHMPATH:-/tmp/voctomix}
+
+audio=`mktemp -u`
+mkfifo $audio
+trap "rm -f $audio" EXIT
+
+gst-launch-1.0 -q \
+	shmsrc socket-path=$SHMPATH/mix-audio is-live=true do-timestamp=true !\
+	audio/x-raw,format=S16LE,channels=2,layout=interleaved,rate=$AUDIORATE !\
+	fdsink fd=1 > $audio &
+
+gst-launch-1.0 -q \
+	shmsrc socket-path=$SHMPATH/mix-video is-live=true do-timestamp=true !\
+	video/x-raw,format=I420,width=$WIDTH,height=$HEIGHT,framerate=$FRAMERATE/1 !\
+	fdsink fd=1 |\
+ffmpeg -y -nostdin \
+	-f rawvideo -pix_fmt yuv420p -s ${WIDTH}x${HEIGHT} -r $FRAMERATE -i - \
+	-f s16le -ar $AUDIORATE -ac 2 -i $audio \
+	-aspect 16:9 \
+	-map 0:v -c:v:0 mpeg2video -pix_fmt:v:0 yuv420p -qscale:v:0 2 -qmin:v:0 2 -qmax:v:0 7 -keyint_min 0 -bf:0 0 -g:0 0 -intra:0 -maxrate:0 90M \
+	-map 1:a -c:a:0 mp2 -b:a:0 192k -ac:a:0 2 -ar:a:0 $AUDIORATE \
+	-f mpegts output.ts
@@ -0,0 +1,22 @@
+#!/bin/sh
+# streams the mix video from the shared memory output of voctocore, which
+# needs
+#   [shmoutput]
+#   enabled = true
+# shmsrc delivers the frames without caps, they have to match the
+# configured videocaps
+confdir="`dirname "$0"`/../"
+. $confdir/default-config.sh
+if [ -f $confdir/config.sh ]; then
+	. $confdir/config.sh
+fi
+SHMPATH=${SHMPATH:-/tmp/voctomix}
+
+gst-launch-1.0 -q \
+	shmsrc socket-path=$SHMPATH/mix-video is-live=true do-timestamp=true !\
+	video/x-raw,format=I420,width=$WIDTH,height=$HEIGHT,framerate=$FRAMERATE/1 !\
+	fdsink fd=1 |\
+ffmpeg -y -nostdin \
+	-f rawvideo -pix_fmt yuv420p -s ${WIDTH}x${HEIGHT} -r $FRAMERATE -i - \
+	-c:v libx264 -preset veryfast -tune zerolatency -b:v 4M -g $((FRAMERATE * 2)) \
+	-f flv rtmp://localhost/live/mix
@@ -57,7 +57,8 @@ def start_connection(tally_handler):
     sock.settimeout(None)
 
     messages = []
-    sock.send(b'get_composite\n')
+    # we only care about composite changes
+    sock.send(b'subscribe composite\nget_composite\n')
     while True:
         if len(messages) == 0:
             message = sock.recv(2048)
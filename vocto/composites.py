@@ -12,6 +12,10 @@ from typing import Union
 
 log = logging.getLogger('Composites')
 
+# signature placeholders for covered (A) and invisible (B) frames
+COVERED = 'covered'
+INVISIBLE = 'invisible'
+
 
 class Composites:
     """ a namespace for composite related methods
@@ -71,6 +75,9 @@ class Composites:
 
 
 class Composite:
+    # no per instance dictionary because transition tables hold many composites
+    __slots__ = ('name', 'frame', 'default', 'inter', 'noswap', 'mirror', 'order')
+
     name: str
     frame: list[Frame]
     default: list
@@ -79,11 +86,14 @@ class Composite:
     mirror: bool
     order: int
 
-    def __init__(self, order: int, name: str, a: Frame=Frame(True), b: Frame=Frame(True)) -> None:
+    def __init__(self, order: int, name: str, a: Frame=Frame(True), b: Frame=Frame(True), share: bool=False) -> None:
+        """ create composite of frames <a> and <b> which get copied unless
+            <share> is set
+        """
         assert type(order) is int
         assert type(name) is str
         self.name = name
-        self.frame = [copy.deepcopy(a), copy.deepcopy(b)]
+        self.frame = [a, b] if share else [a.duplicate(), b.duplicate()]
         self.default = [None, None]
         self.inter = False
         self.noswap = False
@@ -120,6 +130,21 @@ class Composite:
                 return False
         return True
 
+    def signatures(self, swapped: bool=False) -> list[tuple]:
+        """ return hashable signatures of this composite so that two
+            composites which equals() treats as equal (with covered frames
+            treated as invisible) share at least one of them.
+            With <swapped> return the signatures of this composite as the
+            <other> argument of a swapped comparison.
+        """
+        if not swapped:
+            first = [self.A().signature()] + ([COVERED] if self.covered() else [])
+            second = [self.B().signature()] + ([INVISIBLE] if self.B().invisible() else [])
+        else:
+            first = [self.B().signature()] + ([COVERED] if self.B().invisible() else [])
+            second = [self.A().signature()] + ([INVISIBLE] if self.covered() else [])
+        return [(a, b) for a in first for b in second]
+
     def A(self) -> Frame:
         return self.frame[0]
 
@@ -127,14 +152,10 @@ class Composite:
         return self.frame[1]
 
     def Az(self, zorder: int) -> Frame:
-        frame = copy.deepcopy(self.frame[0])
-        frame.zorder = zorder
-        return frame
+        return self.frame[0].zordered(zorder)
 
     def Bz(self, zorder: int) -> Frame:
-        frame = copy.deepcopy(self.frame[1])
-        frame.zorder = zorder
-        return frame
+        return self.frame[1].zordered(zorder)
 
     def swapped(self) -> 'Composite':
         """ swap A and B source items
@@ -142,8 +163,9 @@ class Composite:
         if self.noswap:
             return self
         else:
-            # deep copy everything
-            s = copy.deepcopy(self)
+            # shallow copy everything (frames get shared anyway)
+            s = copy.copy(self)
+            s.default = list(self.default)
             # then swap frames
             s.frame = self.frame[::-1]
             s.name = swap_name(self.name)
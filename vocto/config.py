@@ -8,8 +8,10 @@ from gi.repository import Gst
 
 from vocto import kind_has_audio, kind_has_video
 from vocto.audio_streams import AudioStreams
+from vocto.port import Port
 from vocto.composites import Composite
 from vocto.transitions import Composites, Transitions
+from vocto.transition_cache import TransitionCache, default_path as default_cache_path
 from typing import Optional
 
 testPatternCount = 0
@@ -140,6 +142,10 @@ class VocConfigParser(ConfigParser):
     def getAJAAudioSource(self, source) -> str:
         return self.get(f'source.{source}', 'audio_source', fallback='embedded')
 
+    def getShmSourceSocket(self, source, kind) -> str:
+        return self.get('source.{}'.format(source), '{}socket'.format(kind),
+                        fallback='/tmp/voctomix/source-{}-{}'.format(source, kind))
+
     def getPulseAudioDevice(self, source) -> str:
         return self.get('source.{}'.format(source), 'device', fallback='auto')
 
@@ -427,6 +433,37 @@ class VocConfigParser(ConfigParser):
             'previews', 'height') else int(width * 9 / 16)
         return (width, height)
 
+    def getPreviewLadder(self) -> list[tuple[int, int]]:
+        ''' sizes of the preview renditions, largest first. Empty if only one
+            preview per source is encoded at the size of its videocaps. '''
+        ladder = []
+        for size in self.getList('previews', 'ladder'):
+            match = re.match(r'^(\d+)x(\d+)$', size)
+            if match is None:
+                raise ValueError("could not parse preview size '{}'".format(size))
+            ladder.append((int(match.group(1)), int(match.group(2))))
+        if len(ladder) > Port.MAX_RUNGS:
+            raise ValueError("preview ladder has more than {} sizes".format(Port.MAX_RUNGS))
+        return sorted(ladder, reverse=True)
+
+    def getPreviewRung(self, width: int, height: int) -> int:
+        ''' the smallest rendition of the preview ladder which still fills an
+            area of the given size '''
+        rung = 0
+        for index, size in enumerate(self.getPreviewLadder()):
+            if size[0] >= width and size[1] >= height:
+                rung = index
+        return rung
+
+    def getPreviewCaps(self, size: tuple[int, int]) -> str:
+        ''' encoded preview caps of a rendition of the preview ladder '''
+        caps = self.getVideoCaps('previews')
+        for field, value in zip(['width', 'height'], size):
+            caps, count = re.subn(r'\b{}=[^,]*'.format(field), '{}={}'.format(field, value), caps)
+            if count == 0:
+                caps += ',{}={}'.format(field, value)
+        return caps
+
     def getLocalRecordingEnabled(self) -> bool:
         return self.getboolean('localrecording', 'enabled', fallback=False)
 
@@ -439,6 +476,9 @@ class VocConfigParser(ConfigParser):
     def getAVRawOutputEnabled(self) -> bool:
         return self.getboolean('avrawoutput', 'enabled', fallback=True)
 
+    def getAVRawOutputOnDemand(self) -> bool:
+        return self.getboolean('avrawoutput', 'ondemand', fallback=True)
+
     def getProgramOutputEnabled(self) -> bool:
         return self.getboolean('programoutput', 'enabled', fallback=False)
 
@@ -474,7 +514,17 @@ class VocConfigParser(ConfigParser):
     def getTargetComposites(self) -> list[Composite]:
         return Composites.targets(self.getComposites())
 
-    def getTransitions(self, composites: dict[str, Composite]):
+    def getTransitionCacheEnabled(self) -> bool:
+        return self.getboolean('transitioncache', 'enabled', fallback=True)
+
+    def getTransitionCachePath(self) -> str:
+        return self.get('transitioncache', 'path', fallback=default_cache_path())
+
+    def getTransitions(self, composites: dict[str, Composite]) -> Transitions:
+        if self.getTransitionCacheEnabled():
+            return TransitionCache(self.getTransitionCachePath()).configure(
+                self.items('transitions'), composites,
+                fps=self.getFramesPerSecond(), size=self.getVideoResolution())
         return Transitions.configure(self.items('transitions'), composites, fps=self.getFramesPerSecond())
 
     def getPreviewNameOverlay(self) -> bool:
@@ -13,6 +13,9 @@ log = logging.getLogger('Frame')
 
 
 class Frame:
+    # no per instance dictionary because transition tables hold many frames
+    __slots__ = ('rect', 'crop', 'alpha', 'original_size', 'key', 'zorder')
+
     rect: list[float]
     crop: list[float]
     alpha: int
@@ -52,6 +55,11 @@ class Frame:
             and self.crop == other.crop \
             and self.alpha == other.alpha
 
+    def signature(self) -> tuple:
+        """ return a hashable representation of everything __eq__ compares
+        """
+        return (tuple(self.rect), tuple(self.crop), self.alpha)
+
     def zoomx(self) -> float:
         """ calculate x-zoom factor from relation between given size and
             width of rect in all channels
@@ -111,4 +119,14 @@ class Frame:
         return f
 
     def duplicate(self) -> 'Frame':
-        return copy.deepcopy(self)
+        f = Frame(self.key, self.alpha, self.zorder, list(self.rect), list(self.crop))
+        f.original_size = copy.copy(self.original_size)
+        return f
+
+    def zordered(self, zorder: Optional[int]) -> 'Frame':
+        """ return a view of this frame with a different z-order
+            (shares rect and crop with this frame, so do not modify them)
+        """
+        f = Frame(self.key, self.alpha, zorder, self.rect, self.crop)
+        f.original_size = self.original_size
+        return f
@@ -32,6 +32,9 @@ class Port(object):
     LIVE_OUT = 15000
     LIVE_PREVIEW = LIVE_OUT+OFFSET_PREVIEW
     LOCALPLAYOUT_OUT = 19000
+    # renditions of the preview ladder follow the preview port
+    OFFSET_RUNG = 100
+    MAX_RUNGS = 9
 
     name: str
     port: str
@@ -40,12 +43,18 @@ class Port(object):
     video: Optional[int]
     io: int
     connections: int
+    dropped: int
+    late: int
+    lag: int
 
     def __init__(self, name: str, source: Optional[AVIONode]=None, audio: Optional[int]=None, video: Optional[int]=None):
         self.name = name
         self.source = source
         self.audio = audio
         self.video = video
+        self.dropped = 0
+        self.late = 0
+        self.lag = 0
         self.update()
 
     def todict(self) -> dict[str, Any]:
@@ -55,7 +64,10 @@ class Port(object):
             'audio': self.audio,
             'video': self.video,
             'io': self.io,
-            'connections': self.connections
+            'connections': self.connections,
+            'dropped': self.dropped,
+            'late': self.late,
+            'lag': self.lag,
         }
 
     def update(self) -> None:
@@ -65,6 +77,9 @@ class Port(object):
             self.video = self.source.video_channels()
             self.io = self.IN if self.source.is_input() else self.OUT
             self.connections = self.source.num_connections()
+            self.dropped = self.source.dropped
+            self.late = self.source.late
+            self.lag = self.source.lag
 
     @staticmethod
     def from_str(_str: dict[str, Any]) -> 'Port':
@@ -74,8 +89,17 @@ class Port(object):
         p.video = _str['video']
         p.io = _str['io']
         p.connections = _str['connections']
+        # not reported by older versions of voctocore
+        p.dropped = _str.get('dropped', 0)
+        p.late = _str.get('late', 0)
+        p.lag = _str.get('lag', 0)
         return p
 
+    @staticmethod
+    def rung(port: int, rung: int) -> int:
+        ''' port of a rendition of the preview ladder given the preview port '''
+        return port + Port.OFFSET_RUNG * rung
+
     def is_input(self) -> bool:
         return self.io == Port.IN
 
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# for debug logging
+import logging
+# for building the content address
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+
+from vocto.composites import Composite, Composites
+from vocto.frame import Frame
+from vocto.transitions import Transition, Transitions
+
+from typing import Any, Optional
+
+log = logging.getLogger('TransitionCache')
+
+# bump this whenever the interpolation or the file layout changes so that
+# existing cache files get invalidated automatically
+CACHE_VERSION = 1
+
+# number of cache files to keep in the cache directory
+MAX_ENTRIES = 16
+
+# column layout of one frame within the frame array
+F_RECT = slice(0, 4)
+F_CROP = slice(4, 8)
+F_ALPHA = 8
+F_SIZE = slice(9, 11)
+F_KEY = 11
+F_ZORDER = 12
+FIELDS = 13
+
+
+def default_path() -> str:
+    """ return the default cache directory (following XDG base directories)
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'voctomix', 'transitions')
+
+
+def pack_frame(frame: Frame) -> list[float]:
+    """ convert a frame into a row of FIELDS floats
+    """
+    row = [0.0] * FIELDS
+    row[F_RECT] = frame.rect
+    row[F_CROP] = frame.crop
+    row[F_ALPHA] = frame.alpha
+    row[F_SIZE] = frame.original_size
+    row[F_KEY] = 1.0 if frame.key else 0.0
+    row[F_ZORDER] = np.nan if frame.zorder is None else frame.zorder
+    return row
+
+
+def unpack_frame(row: list[float]) -> Frame:
+    """ convert a row of FIELDS floats back into a frame
+    """
+    def number(x: float):
+        return int(x) if x.is_integer() else x
+
+    frame = Frame(key=row[F_KEY] != 0.0,
+                  alpha=number(row[F_ALPHA]),
+                  zorder=None if np.isnan(row[F_ZORDER]) else int(row[F_ZORDER]),
+                  rect=[number(x) for x in row[F_RECT]],
+                  crop=[number(x) for x in row[F_CROP]])
+    frame.original_size = [number(x) for x in row[F_SIZE]]
+    return frame
+
+
+class TransitionCache:
+    """ content addressed disk cache of calculated transition tables
+    """
+    path: str
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_path()
+
+    @staticmethod
+    def key(cfg: list[tuple[str, str]],
+            composites: dict[str, Composite],
+            targets: list[Composite],
+            fps: float,
+            size: tuple[int, int]) -> str:
+        """ build a hash over everything the transition table depends on
+        """
+        content = {
+            'version': CACHE_VERSION,
+            'resolution': Transitions.resolution,
+            'fps': fps,
+            'size': list(size),
+            'transitions': [list(item) for item in cfg],
+            'composites': [[name, c.order, c.inter, c.noswap, c.mirror,
+                            pack_frame(c.A()), pack_frame(c.B())]
+                           for name, c in composites.items()],
+            'targets': [c.name for c in targets],
+        }
+        data = json.dumps(content, default=str).encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def filename(self, key: str) -> str:
+        return os.path.join(self.path, "%s.npz" % key)
+
+    def configure(self,
+                  cfg: list[tuple[str, str]],
+                  composites: dict[str, Composite],
+                  targets: Optional[list[Composite]] = None,
+                  fps: float = 25,
+                  size: tuple[int, int] = (0, 0)) -> Transitions:
+        """ same as Transitions.configure() but load the result from the cache
+            if available and store freshly calculated tables into it
+        """
+        cfg = list(cfg)
+        if targets is None:
+            targets = Composites.targets(composites)
+        key = self.key(cfg, composites, targets, fps, size)
+        transitions = self.load(key, targets, fps)
+        if transitions is None:
+            transitions = Transitions.configure(cfg, composites, targets, fps)
+            self.save(key, transitions)
+        return transitions
+
+    def load(self, key: str, targets: list[Composite], fps: float) -> Optional[Transitions]:
+        """ load transition table with the given key or return None
+        """
+        filename = self.filename(key)
+        if not os.path.isfile(filename):
+            log.debug("No cached transitions found at '%s'", filename)
+            return None
+        try:
+            with np.load(filename, allow_pickle=False) as data:
+                meta = json.loads(str(data['meta']))
+                frames = data['frames'].tolist()
+            if meta['version'] != CACHE_VERSION or meta['key'] != key:
+                raise ValueError("cache entry does not match")
+            transitions = Transitions(targets, fps)
+            offset = 0
+            for entry in meta['transitions']:
+                if 'reversed' in entry:
+                    # reversed transitions share the composites of the original
+                    transitions.transitions.append(
+                        transitions.transitions[entry['reversed']].reversed())
+                    continue
+                composites = []
+                for name, order, inter, noswap, mirror, default in entry['composites']:
+                    a, b = frames[offset]
+                    offset += 1
+                    c = Composite(order, name, unpack_frame(a), unpack_frame(b))
+                    c.inter, c.noswap, c.mirror, c.default = inter, noswap, mirror, default
+                    composites.append(c)
+                transition = Transition(entry['name'], composites)
+                transition.flip = entry['flip']
+                transitions.transitions.append(transition)
+        except Exception as err:
+            log.warning("Ignoring broken transition cache file '%s': %s", filename, err)
+            self.remove(filename)
+            return None
+        # mark entry as recently used
+        os.utime(filename)
+        log.info("Loaded %d transitions from cache '%s'", len(transitions), filename)
+        return transitions
+
+    def save(self, key: str, transitions: Transitions) -> None:
+        """ store transition table under the given key
+        """
+        entries: list[dict[str, Any]] = []
+        frames: list[list[list[float]]] = []
+        for i, t in enumerate(transitions.transitions):
+            # check if this is the reversed version of a previous transition
+            for j, o in enumerate(transitions.transitions[:i]):
+                if (t._name == o._name + "⁻¹"
+                        and len(t.composites) == len(o.composites)
+                        and all(x is y for x, y in zip(t.composites, reversed(o.composites)))):
+                    entries.append({'reversed': j})
+                    break
+            else:
+                entries.append({
+                    'name': t._name,
+                    'flip': t.flip,
+                    'composites': [[c.name, c.order, c.inter, c.noswap, c.mirror, c.default]
+                                   for c in t.composites],
+                })
+                frames += [[pack_frame(c.A()), pack_frame(c.B())] for c in t.composites]
+        meta = {'version': CACHE_VERSION, 'key': key, 'transitions': entries}
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            # write into temporary file first to never leave broken entries
+            fd, tmpname = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as file:
+                np.savez_compressed(file,
+                                    meta=np.array(json.dumps(meta, default=str)),
+                                    frames=np.array(frames, dtype=np.float64).reshape(-1, 2, FIELDS))
+            os.replace(tmpname, self.filename(key))
+        except OSError as err:
+            log.warning("Could not write transition cache to '%s': %s", self.path, err)
+            return
+        log.info("Stored %d transitions into cache '%s'", len(transitions), self.filename(key))
+        self.prune()
+
+    def prune(self, keep: int = MAX_ENTRIES) -> None:
+        """ remove all but the <keep> most recently used cache files
+        """
+        try:
+            files = [os.path.join(self.path, f) for f in os.listdir(self.path)
+                     if f.endswith('.npz') or f.endswith('.tmp')]
+        except OSError:
+            return
+        files.sort(key=os.path.getmtime, reverse=True)
+        for filename in files[keep:]:
+            self.remove(filename)
+
+    def clear(self) -> None:
+        """ remove all cache files
+        """
+        self.prune(0)
+
+    @staticmethod
+    def remove(filename: str) -> None:
+        try:
+            os.remove(filename)
+            log.debug("Removed transition cache file '%s'", filename)
+        except OSError:
+            pass
+
+
+def main():
+    """ prewarm the transition cache for the given configuration files
+    """
+    import argparse
+    import sys
+    import time
+    from gi.repository import Gst
+    from vocto.config import VocConfigParser
+
+    parser = argparse.ArgumentParser(
+        description='transition_cache - precalculate voctomix transition tables')
+    parser.add_argument('ini_file', nargs='*',
+                        help="configuration files to prewarm the cache for")
+    parser.add_argument('-p', '--path', action='store',
+                        help="cache directory (default: [transitioncache] path or %s)" % default_path())
+    parser.add_argument('-C', '--clear', action='store_true',
+                        help="remove all cached transition tables before prewarming")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="also print INFO (-v) and DEBUG (-vv) messages")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(name)s: %(message)s')
+    logging.root.setLevel([logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)])
+
+    Gst.init([])
+
+    if args.clear:
+        TransitionCache(args.path).clear()
+
+    for filename in args.ini_file:
+        config = VocConfigParser()
+        if not config.read([filename]):
+            log.error("Could not read configuration file '%s'", filename)
+            sys.exit(-1)
+        cache = TransitionCache(args.path or config.getTransitionCachePath())
+        start = time.monotonic()
+        transitions = cache.configure(config.items('transitions'),
+                                      config.getComposites(),
+                                      fps=config.getFramesPerSecond(),
+                                      size=config.getVideoResolution())
+        print("%s: %d transitions ready in %.3fs (%s)" %
+              (filename, len(transitions), time.monotonic() - start, cache.path))
+
+
+if __name__ == '__main__':
+    main()
@@ -24,15 +24,22 @@ class Transitions:
     HiRes       = 0.001
     LoRes       = 0.01
     resolution  = HiRes
+    # use NumPy vectorized interpolation (bit-identical to the python one)
+    vectorized  = True
 
     transitions: list
     targets: list[Composite]
     fps: float
+    lookup: dict[tuple, list[int]]
+    indexed: int
 
     def __init__(self, targets: list[Composite] = [], fps: float = 25) -> None:
         self.transitions = []
         self.targets = targets
         self.fps = fps
+        # index of transitions by signatures of their begin and end composites
+        self.lookup = {}
+        self.indexed = 0
 
     def __str__(self) -> str:
         """ write transition table into a string
@@ -48,8 +55,11 @@ class Transitions:
         return len(self.transitions)
 
     def add(self, transition: 'Transition', frames: int):
+        self.index()
         # check if a compatible transition is already in our pool
-        for t in self.transitions:
+        begin, end = transition.begin().signatures(), transition.end().signatures()
+        for i in self.candidates((begin, end), (end, begin)):
+            t = self.transitions[i]
             if t.begin().equals(transition.begin(), True) and t.end().equals(transition.end(), True):
                 # skip if found
                 return
@@ -60,6 +70,28 @@ class Transitions:
         transition.calculate(frames - 1)
         self.transitions.append(transition)
 
+    def index(self) -> None:
+        """ add all transitions which are not indexed yet to the lookup
+            index of begin and end composite signatures
+        """
+        for i in range(self.indexed, len(self.transitions)):
+            t = self.transitions[i]
+            for b in t.begin().signatures():
+                for e in t.end().signatures():
+                    self.lookup.setdefault((b, e), []).append(i)
+        self.indexed = len(self.transitions)
+
+    def candidates(self, *pairs: tuple[list[tuple], list[tuple]]) -> list[int]:
+        """ return the sorted indices of all transitions whose begin and end
+            signatures match any of the given pairs of signature lists
+        """
+        result: set[int] = set()
+        for begins, ends in pairs:
+            for b in begins:
+                for e in ends:
+                    result.update(self.lookup.get((b, e), ()))
+        return sorted(result)
+
     @staticmethod
     def configure(
         cfg: list[tuple[str, str]],
@@ -115,7 +147,12 @@ class Transitions:
 
     def solve(self, begin: 'Composite', end: 'Composite', flip: bool):
         log.debug("Solving transition %s(A,B) -> %s(%s)\n\t    %s\n\t    %s", begin.name, end.name, "B,A" if flip else "A,B", begin, end)
-        for transition in self.transitions:
+        self.index()
+        # only check transitions whose begin and end signatures match
+        b, b_flip = begin.signatures(), begin.signatures(flip)
+        e, e_flip = end.signatures(), end.signatures(flip)
+        for i in self.candidates((b, e_flip), (b_flip, e), (e, b_flip), (e_flip, b)):
+            transition = self.transitions[i]
             # try to find original transition
             if transition.begin().equals(begin, True) and transition.end().equals(end, True, flip):
                 log.debug("Solved #1 %s\n%s", transition.name(), transition)
@@ -315,8 +352,9 @@ class Transition:
                 # then swap the end composite
                 a[-1], b[-1] = b[-1], a[-1]
             # generate animation
-            a = interpolate(a, frames, a_corner)
-            b = interpolate(b, frames, b_corner)
+            interpolator = interpolate_vectorized if Transitions.vectorized else interpolate
+            a = interpolator(a, frames, a_corner)
+            b = interpolator(b, frames, b_corner)
             composites: list[Composite] = []
             j = 0
             for i in range(len(a)):
@@ -325,7 +363,8 @@ class Transition:
                     j += 1
                 else:
                     name = "..."
-                composites.append(Composite(len(composites), name, a[i], b[i]))
+                # interpolated frames are not modified later so share them
+                composites.append(Composite(len(composites), name, a[i], b[i], share=True))
             self.composites = composites
             self.flip = self.calculate_flip()
 
@@ -556,6 +595,105 @@ def interpolate(key_frames, num_frames, corner):
     return animation
 
 
+def frange_vectorized(x: float, y: float, jump: float) -> 'np.ndarray':
+    """ like frange() but returns a NumPy array with exactly the same values
+    """
+    # accumulate sequentially like frange() does to get the same rounding
+    count = int(math.ceil((y - x) / jump)) + 2
+    values = np.add.accumulate(np.concatenate(([x], np.full(count, jump))))
+    return values[values < y]
+
+
+def bspline_vectorized(points: 'np.ndarray') -> Optional[list['np.ndarray']]:
+    """ like bspline() but without iterating the straight line point by point
+    """
+    if len(points) == 2:
+        # throw points on direct line
+        i = frange_vectorized(0.0, 1.0 + Transitions.resolution, Transitions.resolution)
+        return [points[0][X] + (points[1][X] - points[0][X]) * i,
+                points[0][Y] + (points[1][Y] - points[0][Y]) * i]
+    return bspline(points)
+
+
+def find_nearest_vectorized(spline, points: 'np.ndarray') -> list:
+    """ like find_nearest() but measures all points at once
+    """
+    distance = (spline[X][np.newaxis, :] - points[:, X][:, np.newaxis])**2 + \
+        (spline[Y][np.newaxis, :] - points[:, Y][:, np.newaxis])**2
+    # argmin() returns the first minimum like find_nearest() does
+    return list(np.argmin(distance, axis=1))
+
+
+def measure_vectorized(points: 'np.ndarray') -> 'np.ndarray':
+    """ like measure() but only returns the distances on the curve (V)
+    """
+    delta = np.diff(points, axis=0)
+    dv = np.sqrt(delta[:, X]**2 + delta[:, Y]**2)
+    # accumulate sequentially like measure() does to get the same rounding
+    return np.add.accumulate(np.concatenate(([0.0], dv)))
+
+
+def distribute_vectorized(points: 'np.ndarray', positions: 'np.ndarray', begin: 'np.int64', end: 'np.int64', x0: float, x1: float, n: int) -> list:
+    """ like distribute() but looks up all points by a binary search on the
+        monotonous <positions> instead of scanning them linearly
+    """
+    # calculate overall distance from begin to end
+    length = positions[end - 1] - positions[begin]
+    # check if there is no movement
+    if length == 0.0:
+        return [points[begin]] * n
+    # calculate start points
+    pos0 = smooth(x0)
+    pos1 = smooth(x1)
+    # use math.cos() within smooth() to stay bit-identical to distribute()
+    x = np.array([smooth(x0 + ((x1 - x0) / n) * i) for i in range(n)], dtype=np.float64)
+    # calculate distances on curve from y0 to y
+    pos = (x - pos0) / (pos1 - pos0) * length + positions[begin]
+    # find first points with these distances and drop the ones beyond <end>
+    indices = np.searchsorted(positions[begin:end], pos, side='left') + begin
+    return list(points[indices[indices < end]])
+
+
+def interpolate_vectorized(key_frames, num_frames, corner):
+    """ like interpolate() but using the vectorized helpers
+    """
+    # get corner points defined by index_x,index_y from rectangles
+    corners = np.array([i.corner(corner[X], corner[Y]) for i in key_frames])
+    # interpolate between corners and get the spline points
+    spline = bspline_vectorized(corners)
+    # skip if we got no interpolation
+    if not spline:
+        return [], []
+    # find indices of the corner's nearest points within the spline
+    corner_indices = find_nearest_vectorized(spline, corners)
+    # transpose point array
+    spline = np.transpose(spline)
+    # calulcate number of frames between every corner
+    num_frames_per_move = int(round(num_frames / (len(corner_indices) - 1)))
+    # measure the spline
+    positions = measure_vectorized(spline)
+    # fill with point animation from corner to corner
+    animation = []
+    for i in range(1, len(corner_indices)):
+        # calculate range of X between 0.0 and 1.0 for these corners
+        _x0 = (i - 1) / (len(corner_indices) - 1)
+        _x1 = i / (len(corner_indices) - 1)
+        # create distribution of points between these corners
+        corner_animation = distribute_vectorized(
+            spline, positions, corner_indices[i - 1], corner_indices[i], _x0, _x1, num_frames_per_move - 1)
+        # append first rectangle from parameters
+        animation.append(key_frames[i - 1])
+        for j in range(len(corner_animation)):
+            # calculate current sinus wave acceleration
+            animation.append(morph(key_frames[i - 1], key_frames[i],
+                                   corner_animation[j], corner,
+                                   smooth(j / len(corner_animation))))
+    # append last rectangle from parameters
+    animation.append(key_frames[-1])
+    # return rectangle animation
+    return animation
+
+
 def is_in(sequence, part):
     """ returns true if 2-item list 'part' is in list 'sequence'
     """
@@ -8,6 +8,7 @@ from gi.repository import Gst
 gi.require_version('GstController', '1.0')
 
 from vocto.config import VocConfigParser
+from typing import Optional
 
 log = logging.getLogger('video_codecs')
 
@@ -69,10 +70,11 @@ else:
         ! avdec_mpeg2video"""
 
 
-def construct_video_encoder_pipeline(config: VocConfigParser, section: str) -> str:
+def construct_video_encoder_pipeline(config: VocConfigParser, section: str, vcaps: Optional[str]=None) -> str:
     encoder = config.getVideoEncoder(section)
     codec, options = config.getVideoCodec(section)
-    vcaps = config.getVideoCaps(section)
+    if vcaps is None:
+        vcaps = config.getVideoCaps(section)
 
     pipeline = ""
 
@@ -41,7 +41,9 @@ class Voctocore(object):
         from voctocore.lib.pipeline import Pipeline
         from voctocore.lib.controlserver import ControlServer
         from voctocore.lib.metrics import Metrics
+        from voctocore.lib.telemetry import Telemetry
         from voctocore.lib.args import Args
+        from voctocore.lib.config import Config
 
         self.log = logging.getLogger('Voctocore')
         self.log.debug('Creating GLib-MainLoop')
@@ -52,10 +54,22 @@ class Voctocore(object):
         self.pipeline = Pipeline()
 
         self.log.debug('Creating ControlServer')
-        self.controlserver = ControlServer(self.pipeline)
+        if Config.getControlServer() == 'asyncio':
+            from voctocore.lib.asynccontrolserver import AsyncControlServer, install_event_loop_policy
+            if install_event_loop_policy():
+                self.controlserver = AsyncControlServer(self.pipeline)
+            else:
+                self.log.warning('asyncio control server needs PyGObject 3.50 or newer, '
+                                 'falling back to the GLib control server')
+                self.controlserver = ControlServer(self.pipeline)
+        else:
+            self.controlserver = ControlServer(self.pipeline)
+
+        self.log.debug('Creating Telemetry')
+        self.telemetry = Telemetry(self.pipeline, self.controlserver)
 
         if Args.metrics:
-            self.metrics = Metrics(self.pipeline)
+            self.metrics = Metrics(self.pipeline, self.controlserver)
             REGISTRY.register(self.metrics)
         else:
             self.metrics = None
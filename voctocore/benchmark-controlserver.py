@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# type: ignore
+import argparse
+import selectors
+import socket
+import sys
+import time
+
+
+def read_arguments():
+    parser = argparse.ArgumentParser(
+        description='benchmark-controlserver - measure command throughput and broadcast fan-out of a running voctocore')
+    parser.add_argument('host', action='store', nargs='?', default="localhost",
+                        help="host running voctocore")
+    parser.add_argument('-p', '--port', action='store', type=int, default=9999,
+                        help="control port of voctocore")
+    parser.add_argument('-c', '--clients', action='store', type=int, default=50,
+                        help="number of connected clients")
+    parser.add_argument('-n', '--commands', action='store', type=int, default=2000,
+                        help="number of commands per run")
+    parser.add_argument('-t', '--timeout', action='store', type=float, default=60.0,
+                        help="give up after that many seconds per run")
+    return parser.parse_args()
+
+
+class Client:
+    """ one control connection which counts the lines it receives
+    """
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.sock.setblocking(False)
+        self.outgoing = bytearray()
+        self.leftover = b''
+        self.lines = 0
+        self.done = None
+
+    def receive(self):
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError("voctocore closed the connection")
+        data = self.leftover + data
+        self.lines += data.count(b'\n')
+        self.leftover = data[data.rfind(b'\n') + 1:]
+
+    def send(self):
+        sent = self.sock.send(self.outgoing)
+        del self.outgoing[:sent]
+
+
+class Benchmark:
+    """ sends commands over the first connection as fast as voctocore takes
+        them and waits until every client has received the expected number
+        of lines.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.clients = [Client(args.host, args.port) for _ in range(args.clients)]
+        self.selector = selectors.DefaultSelector()
+        for client in self.clients:
+            self.selector.register(client.sock, selectors.EVENT_READ, client)
+
+    def run(self, commands, expected):
+        sender = self.clients[0]
+        for client in self.clients:
+            client.lines = 0
+            client.done = None
+        sender.outgoing += "".join(commands).encode()
+        self.selector.modify(sender.sock, selectors.EVENT_READ | selectors.EVENT_WRITE, sender)
+
+        waiting = {client for client, count in zip(self.clients, expected) if count}
+        start = time.monotonic()
+        while waiting:
+            if time.monotonic() - start > self.args.timeout:
+                raise TimeoutError("%d clients still waiting for lines" % len(waiting))
+            for key, events in self.selector.select(timeout=1.0):
+                client = key.data
+                if events & selectors.EVENT_WRITE:
+                    client.send()
+                    if not client.outgoing:
+                        self.selector.modify(client.sock, selectors.EVENT_READ, client)
+                if events & selectors.EVENT_READ:
+                    client.receive()
+                    index = self.clients.index(client)
+                    if client in waiting and client.lines >= expected[index]:
+                        client.done = time.monotonic() - start
+                        waiting.discard(client)
+        return time.monotonic() - start
+
+    def requests(self):
+        """ replies go to the requestor only
+        """
+        count = self.args.commands
+        expected = [count] + [0] * (len(self.clients) - 1)
+        return self.run(["fetch_value benchmark\n"] * count, expected)
+
+    def broadcast(self):
+        """ every notification is sent to all clients
+        """
+        count = self.args.commands
+        expected = [count] * len(self.clients)
+        return self.run(["store_value benchmark %d\n" % i for i in range(count)], expected)
+
+    def close(self):
+        for client in self.clients:
+            client.sock.close()
+
+
+def main():
+    Args = read_arguments()
+    try:
+        benchmark = Benchmark(Args)
+    except OSError as e:
+        print("can not connect to voctocore at %s:%d: %s" % (Args.host, Args.port, e))
+        sys.exit(1)
+
+    print("%10s %8s %8s %10s %14s %10s %10s" %
+          ("run", "clients", "commands", "time", "commands/s", "lines/s", "spread"))
+    try:
+        for name in ['requests', 'broadcast']:
+            duration = getattr(benchmark, name)()
+            lines = sum(client.lines for client in benchmark.clients)
+            done = [client.done for client in benchmark.clients if client.done is not None]
+            print("%10s %8d %8d %8.3fs %14.0f %10.0f %8.1fms" %
+                  (name, len(benchmark.clients), Args.commands, duration,
+                   Args.commands / duration, lines / duration,
+                   (max(done) - min(done)) * 1000))
+    except (ConnectionError, TimeoutError) as e:
+        print("benchmark failed: %s" % e)
+        sys.exit(1)
+    finally:
+        benchmark.close()
+
+
+if __name__ == '__main__':
+    main()
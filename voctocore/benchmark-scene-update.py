@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# type: ignore
+import argparse
+import logging
+import re
+import statistics
+import sys
+import gi
+gi.require_version('Gst', '1.0')
+gi.require_version('GstController', '1.0')
+from gi.repository import Gst, GLib
+from vocto.frame import Frame
+from voctocore.lib.scene import Scene, SceneUpdater
+
+SOURCES = ['cam1', 'cam2']
+
+
+def read_arguments():
+    parser = argparse.ArgumentParser(
+        description='benchmark-scene-update - measure cut latency and jitter of the scene update modes')
+    parser.add_argument('-m', '--modes', action='store', default="handoff,probe,mainloop",
+                        help="comma separated list of scene update modes to benchmark")
+    parser.add_argument('-n', '--cuts', action='store', type=int, default=50,
+                        help="number of transitions per mode")
+    parser.add_argument('-i', '--interval', action='store', type=int, default=500,
+                        help="time between two transitions in milliseconds")
+    parser.add_argument('-F', '--frames', action='store', type=int, default=10,
+                        help="number of frames per transition")
+    parser.add_argument('-l', '--lookahead', action='store', type=int, default=40,
+                        help="look-ahead of mode 'mainloop' in milliseconds")
+    parser.add_argument('-r', '--fps', action='store', type=int, default=50,
+                        help="frame rate of the test pipeline")
+    parser.add_argument('-s', '--size', action='store', default="320x180",
+                        help="set frame size 'WxH' W and H must be pixels")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="also print WARNING (-v), INFO (-vv) and DEBUG (-vvv) messages")
+    return parser.parse_args()
+
+
+class Benchmark:
+    """ runs a live compositor pipeline and fades cam1 in and out from the
+        main loop. The mixer pad's alpha is read for every output buffer to
+        find out when each transition started and if all of its frames were
+        shown on consecutive buffers.
+    """
+
+    def __init__(self, args, mode, size):
+        self.args = args
+        self.size = size
+        pipeline = """
+            compositor name=videomixer
+            ! identity name=sig
+            ! fakesink name=sink sync=true
+            """
+        for name in SOURCES:
+            pipeline += """
+                videotestsrc is-live=true
+                ! video/x-raw,width={w},height={h},framerate={fps}/1
+                ! videobox name=cropper-{name}
+                ! queue
+                ! videomixer.
+                """.format(w=size[0], h=size[1], fps=args.fps, name=name)
+        self.pipeline = Gst.parse_launch(pipeline)
+        self.scene = Scene(SOURCES, self.pipeline, args.fps, 0)
+        self.updater = SceneUpdater(self.pipeline, self.pipeline.get_by_name('sig'),
+                                    [self.scene], mode, args.lookahead * Gst.MSECOND)
+        self.mixerpad = self.pipeline.get_by_name('videomixer').get_static_pad('sink_0')
+        (self.pipeline.get_by_name('sink').get_static_pad('sink')
+         .add_probe(Gst.PadProbeType.BUFFER, self.on_buffer))
+        self.loop = GLib.MainLoop()
+        self.cuts = 0
+        self.visible = False
+        # alpha values expected on consecutive buffers for the running cut
+        self.expected = None
+        self.requested = None
+        self.latencies = []
+        self.accurate = 0
+
+    def frames(self, fade_in):
+        """ fade cam1 with different alpha values in every frame
+        """
+        count = self.args.frames
+        alphas = [int(round(255 * (i + 1) / count)) for i in range(count)]
+        if not fade_in:
+            alphas = [255 - a for a in alphas]
+        return [Frame(True, alpha, 101, [0, 0, *self.size]) for alpha in alphas]
+
+    def cut(self):
+        if self.expected is not None:
+            logging.warning("transition %d was not completely shown", self.cuts)
+            self.expected = None
+        if self.cuts >= self.args.cuts:
+            self.loop.quit()
+            return False
+        self.cuts += 1
+        self.visible = not self.visible
+        frames = self.frames(self.visible)
+        self.scene.commit('cam1', frames)
+        self.scene.set('cam2', Frame(True, 255, 100, [0, 0, *self.size]))
+        self.requested = self.updater.play_time()
+        self.expected = [frame.float_alpha() for frame in frames]
+        self.observed = []
+        self.updater.update()
+        return True
+
+    def on_buffer(self, pad, info):
+        expected = self.expected
+        if expected is None:
+            return Gst.PadProbeReturn.OK
+        alpha = self.mixerpad.get_property('alpha')
+        if not self.observed:
+            # wait for the first frame of the transition
+            if abs(alpha - expected[0]) > 1e-6:
+                return Gst.PadProbeReturn.OK
+            self.latencies.append(info.get_buffer().pts - self.requested)
+        self.observed.append(alpha)
+        if len(self.observed) == len(expected):
+            if all(abs(a - b) <= 1e-6 for a, b in zip(self.observed, expected)):
+                self.accurate += 1
+            self.expected = None
+        return Gst.PadProbeReturn.OK
+
+    def run(self):
+        self.pipeline.set_state(Gst.State.PLAYING)
+        GLib.timeout_add(self.args.interval, self.cut)
+        self.loop.run()
+        self.pipeline.set_state(Gst.State.NULL)
+
+
+def main():
+    Args = read_arguments()
+    logging.basicConfig(format='%(message)s')
+    logging.root.setLevel([logging.ERROR, logging.WARNING,
+                           logging.INFO, logging.DEBUG][min(Args.verbose, 3)])
+    Gst.init([])
+
+    r = re.match(r'^\s*(\d+)\s*x\s*(\d+)\s*$', Args.size)
+    size = (int(r.group(1)), int(r.group(2)))
+
+    print("%9s %6s %9s %11s %10s %10s %10s %10s" %
+          ("mode", "cuts", "accurate", "callbacks", "push max", "latency", "jitter", "max"))
+    accurate = True
+    for mode in Args.modes.split(','):
+        benchmark = Benchmark(Args, mode, size)
+        benchmark.run()
+        latencies = [x / Gst.MSECOND for x in benchmark.latencies] or [0.0]
+        print("%9s %6d %9d %11d %8.3fms %8.2fms %8.2fms %8.2fms" %
+              (mode, benchmark.cuts, benchmark.accurate, benchmark.updater.calls,
+               benchmark.scene.push_time_max * 1000,
+               statistics.mean(latencies), statistics.pstdev(latencies), max(latencies)))
+        accurate = accurate and benchmark.accurate == benchmark.cuts
+    sys.exit(0 if accurate else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# type: ignore
+from configparser import ConfigParser
+import argparse
+import logging
+import re
+import sys
+import time
+import gi
+gi.require_version('Gst', '1.0')
+from gi.repository import Gst
+from vocto.transitions import Composites, Transitions
+
+
+def read_arguments():
+    parser = argparse.ArgumentParser(
+        description='benchmark-transitions - compare python and vectorized transition interpolation')
+    parser.add_argument('-f', '--config', action='store', default="configs/experimental/experimental.ini",
+                        help="name of the configuration file to load")
+    parser.add_argument('-S', '--fps', action='store', default="25,50,60",
+                        help="comma separated list of frame rates to benchmark")
+    parser.add_argument('-s', '--size', action='store', default="1920x1080",
+                        help="set frame size 'WxH' W and H must be pixels")
+    parser.add_argument('-r', '--repeat', action='store', type=int, default=3,
+                        help="number of runs per engine (best time is reported)")
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help="also print WARNING (-v), INFO (-vv) and DEBUG (-vvv) messages")
+    return parser.parse_args()
+
+
+def frames_of(transitions):
+    """ return every frame value of a transition table in a comparable form
+        (float.hex() to detect even the smallest rounding difference)
+    """
+    result = []
+    for t in transitions.transitions:
+        result.append((t.name(), t.flip))
+        for c in t.composites:
+            for f in c.frame:
+                result.append((c.name, f.key, f.alpha,
+                               tuple(float(x).hex() for x in f.rect),
+                               tuple(float(x).hex() for x in f.crop)))
+    return result
+
+
+def configure(config, composites, fps, vectorized, repeat):
+    Transitions.vectorized = vectorized
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        transitions = Transitions.configure(config.items('transitions'), composites, fps=fps)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return transitions, best
+
+
+def main():
+    Args = read_arguments()
+    logging.basicConfig(format='%(message)s')
+    logging.root.setLevel([logging.ERROR, logging.WARNING,
+                           logging.INFO, logging.DEBUG][min(Args.verbose, 3)])
+    Gst.init([])
+
+    config = ConfigParser()
+    if not config.read(Args.config):
+        print("could not read configuration file '%s'" % Args.config)
+        sys.exit(-1)
+    r = re.match(r'^\s*(\d+)\s*x\s*(\d+)\s*$', Args.size)
+    size = (int(r.group(1)), int(r.group(2)))
+    composites = Composites.configure(config.items('composites'), size)
+    # warm up imports (scipy) so they do not count into the first run
+    Transitions.configure(config.items('transitions'), composites, fps=1)
+
+    print("%5s %12s %8s %10s %10s %8s  %s" %
+          ("fps", "transitions", "frames", "python", "vectorized", "speedup", "identical"))
+    identical = True
+    for fps in [float(x) for x in Args.fps.split(',')]:
+        python, t_python = configure(config, composites, fps, False, Args.repeat)
+        vectorized, t_vectorized = configure(config, composites, fps, True, Args.repeat)
+        same = frames_of(python) == frames_of(vectorized)
+        identical = identical and same
+        print("%5g %12d %8d %9.3fs %9.3fs %7.1fx  %s" %
+              (fps, len(python), sum(t.frames() for t in python.transitions),
+               t_python, t_vectorized, t_python / t_vectorized, "yes" if same else "NO"))
+    sys.exit(0 if identical else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import socket
+import sys
+import time
+
+from voctocore.lib.commands import ControlServerCommands
+from voctocore.lib.config import Config
+from voctocore.lib.controlserver import CommandDispatcher
+
+from vocto.port import Port
+from vocto.sd_notify import sd_notify
+
+from typing import Any, Optional
+
+try:
+    # PyGObject >= 3.50 can run asyncio within the GLib main loop
+    from gi.events import GLibEventLoopPolicy
+except ImportError:
+    GLibEventLoopPolicy = None
+
+
+def install_event_loop_policy() -> bool:
+    '''Let asyncio run within the GLib main loop. Returns False if the
+    installed PyGObject does not support that.'''
+    if GLibEventLoopPolicy is None:
+        return False
+    asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+    return True
+
+
+class AsyncControlServer(CommandDispatcher):
+    '''Control server speaking the same protocol as ControlServer, built on
+    asyncio streams. Reading commands of a client pauses while its replies
+    are not taken and clients which do not read at all get disconnected.'''
+    log: logging.Logger
+    boundSocket: socket.socket
+    server: Optional[asyncio.AbstractServer]
+    loop: asyncio.AbstractEventLoop
+    task: asyncio.Task
+    currentConnections: dict[asyncio.StreamWriter, Any]
+    pending: dict[asyncio.StreamWriter, bytearray]
+    commands: ControlServerCommands
+    loop_budget: float
+    write_limit: int
+    write_timeout: float
+    evicted: int
+
+    def __init__(self, pipeline, port: int = Port.CORE_LISTENING):
+        '''Initialize server and start listening.'''
+        self.log = logging.getLogger('AsyncControlServer')
+        self.currentConnections = dict()
+        self._init_dispatcher(pipeline)
+
+        # seconds a client's commands may take before we yield to the main loop
+        self.loop_budget = 0.01
+        self.write_limit = Config.getControlWriteLimit()
+        self.write_timeout = Config.getControlWriteTimeout()
+        self.evicted = 0
+
+        # messages of the current loop iteration, written in one go by flush()
+        self.pending = dict()
+
+        self.server = None
+        self.boundSocket = self._bind(port)
+        self.loop = asyncio.get_event_loop_policy().get_event_loop()
+        self.task = self.loop.create_task(self.serve())
+
+    def _bind(self, port: int) -> socket.socket:
+        try:
+            self.log.debug('Binding to Source-Socket on [::]:%u', port)
+            sock = socket.socket(socket.AF_INET6)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, False)
+            sock.bind(('::', port))
+        except OSError:
+            self.log.error("Can not open listening port %d because it is already in use. Is another instance of voctocore running already?" % port)
+            sys.exit(-1)
+        return sock
+
+    async def serve(self):
+        self.server = await asyncio.start_server(self.on_client, sock=self.boundSocket)
+
+    def num_connections(self) -> int:
+        return len(self.currentConnections)
+
+    def _log_num_connections(self):
+        self.log.info(f'Now {self.num_connections()} Receiver(s) connected')
+        sd_notify.status(f'{self.num_connections()} receiver(s) connected to ControlServer')
+
+    async def on_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        '''Connection handler. Executes the commands of one client linewise'''
+        peer = writer.get_extra_info('peername')
+        self.log.info("Incoming Connection from [%s]:%u", peer[0], peer[1])
+        writer.transport.set_write_buffer_limits(high=self.write_limit // 2)
+        self.currentConnections[writer] = peer
+        self._log_num_connections()
+
+        deadline = time.monotonic() + self.loop_budget
+        try:
+            while writer in self.currentConnections:
+                try:
+                    data = await reader.readline()
+                except ValueError:
+                    self.log.warning("Line from [%s]:%u is too long", peer[0], peer[1])
+                    break
+                if not data.endswith(b'\n'):
+                    self.log.info("Socket was closed")
+                    break
+
+                line = data.decode(errors='replace').strip()
+                self.log.debug("got line: %r", line)
+                # 'quit' = remote wants us to close the connection
+                if line == 'quit' or line == 'exit':
+                    self.log.info("Client asked us to close the Connection")
+                    break
+
+                self._handle(line, writer)
+                if writer not in self.currentConnections:
+                    break
+                if self._waiting(writer) > self.write_limit // 2:
+                    # stop reading commands until the client took its replies
+                    self.flush()
+                    try:
+                        await asyncio.wait_for(writer.drain(), self.write_timeout)
+                    except asyncio.TimeoutError:
+                        self._evict(writer, "did not take its replies for %.1f seconds" % self.write_timeout)
+                        break
+
+                if time.monotonic() >= deadline:
+                    await asyncio.sleep(0)
+                    deadline = time.monotonic() + self.loop_budget
+        except ConnectionError:
+            self.log.info("Connection to [%s]:%u was lost", peer[0], peer[1])
+        finally:
+            self.close_connection(writer)
+
+    def _schedule_write(self, conn: asyncio.StreamWriter, message: str):
+        self.log.info("Responding message '%s'", message.strip())
+        if not self.pending:
+            self.loop.call_soon(self.flush)
+        buffer = self.pending.get(conn)
+        if buffer is None:
+            buffer = self.pending[conn] = bytearray()
+        buffer += message.encode()
+
+        waiting = self._waiting(conn)
+        if waiting > self.write_limit:
+            self._evict(conn, "has %u bytes waiting to be sent" % waiting)
+
+    def _waiting(self, conn: asyncio.StreamWriter) -> int:
+        '''Number of bytes not yet taken by the client'''
+        return len(self.pending.get(conn, b'')) + conn.transport.get_write_buffer_size()
+
+    def flush(self):
+        pending, self.pending = self.pending, dict()
+        for conn, buffer in pending.items():
+            if conn in self.currentConnections:
+                conn.write(buffer)
+
+    def _evict(self, conn: asyncio.StreamWriter, reason: str):
+        peer = self.currentConnections.get(conn)
+        self.log.warning("Disconnecting slow client %s which %s", peer, reason)
+        self.evicted += 1
+        self.pending.pop(conn, None)
+        # drop everything that is still waiting to be sent
+        conn.transport.abort()
+        self.close_connection(conn)
+
+    def close_connection(self, conn: asyncio.StreamWriter):
+        if conn in self.currentConnections:
+            del self.currentConnections[conn]
+            self._forget(conn)
+            conn.close()
+            self._log_num_connections()
@@ -3,6 +3,8 @@ from abc import ABCMeta, abstractmethod
 
 from gi.repository import Gst
 
+from typing import Optional
+
 
 class AVNode(object, metaclass=ABCMeta):
     bin: str
@@ -15,6 +17,14 @@ class AVNode(object, metaclass=ABCMeta):
 class AVIONode(AVNode, metaclass=ABCMeta):
     log: logging.Logger
     source: str
+    # name of the bin in the pipeline containing the node's elements
+    bin_name: Optional[str] = None
+    # frames dropped and QoS messages about late frames from elements of
+    # the node and how often it lagged behind (queue overruns and clients
+    # which were too slow), counted by FrameStats
+    dropped: int = 0
+    late: int = 0
+    lag: int = 0
 
     @abstractmethod
     def port(self) -> str:
@@ -1,7 +1,7 @@
 import logging
 import socket
 
-from gi.repository import Gst
+from gi.repository import Gst, GLib
 
 from vocto.video_codecs import construct_video_encoder_pipeline
 from voctocore.lib.avnode import AVIONode
@@ -10,33 +10,70 @@ from voctocore.lib.tcpmulticonnection import TCPMultiConnection
 from voctocore.lib.config import Config
 from voctocore.lib.args import Args
 
+from typing import Optional
+
 class AVPreviewOutput(TCPMultiConnection, AVIONode):
     log: logging.Logger
     source: str
+    # source or source and size for the smaller renditions of the ladder
+    name: str
     bin: str
+    lazy: bool
+    idle_timeout: int
+    idle_timer: Optional[int]
+    encoding: bool
+    activations: int
+
+    def __init__(self, source: str, port: int, use_audio_mix: bool=False, audio_blinded: bool=False,
+                 rung: int=0, size: Optional[tuple[int, int]]=None):
+        # remember things
+        self.source = source
+        self.name = source if size is None or rung == 0 else '{}-{}x{}'.format(source, *size)
 
-    def __init__(self, source: str, port: int, use_audio_mix: bool=False, audio_blinded: bool=False):
         # create logging interface
         if not hasattr(self, 'log'):
-            self.log = logging.getLogger('AVPreviewOutput[{}]'.format(source))
+            self.log = logging.getLogger('AVPreviewOutput[{}]'.format(self.name))
 
         # initialize super
         super().__init__(port)
 
-        # remember things
-        self.source = source
+        # encode only while clients are connected by opening and closing
+        # valves right behind the tees
+        self.lazy = Config.getPreviewsLazy()
+        self.idle_timeout = Config.getPreviewsIdleTimeout()
+        self.idle_timer = None
+        self.encoding = not self.lazy
+        self.activations = 0
+        valve = """
+                    ! valve
+                        name=valve-preview-{{kind}}-{source}
+                        drop=true""".format(source=self.name) if self.lazy else ""
 
         # open bin
+        self.bin_name = "AVPreviewOutput-{}".format(self.name)
         self.bin = "" if Args.no_bins else """
             bin.(
-                name=AVPreviewOutput-{source}
-                """.format(source=self.source)
+                name={bin_name}
+                """.format(bin_name=self.bin_name)
 
         # video pipeline
         if source in Config.getVideoSources(internal=True):
+            if size is None:
+                self.bin += """
+                    video-{source}.{valve}
+                    ! {vcaps}""".format(source=self.source,
+                                        valve=valve.format(kind='video'),
+                                        vcaps=Config.getVideoCaps())
+                vpipeline = construct_video_encoder_pipeline(Config, 'previews')
+            else:
+                # already scaled down the ladder by the PreviewScaler
+                self.bin += """
+                    preview-{source}-{rung}.{valve}""".format(source=self.source,
+                                                             rung=rung,
+                                                             valve=valve.format(kind='video'))
+                vpipeline = construct_video_encoder_pipeline(Config, 'previews',
+                                                             Config.getPreviewCaps(size))
             self.bin += """
-                    video-{source}.
-                    ! {vcaps}
                     ! queue
                         max-size-time=3000000000
                         name=queue-preview-video-{source}
@@ -45,15 +82,13 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
                         max-size-time=3000000000
                         name=queue-mux-preview-{source}
                     ! mux-preview-{source}.
-                    """.format(source=self.source,
-                               vpipeline=construct_video_encoder_pipeline(Config, 'previews'),
-                               vcaps=Config.getVideoCaps()
-                               )
+                    """.format(source=self.name,
+                               vpipeline=vpipeline)
 
         # audio pipeline
         if use_audio_mix or source in Config.getAudioSources(internal=True):
             self.bin += """
-                    {use_audio}audio-{audio_source}{audio_blinded}.
+                    {use_audio}audio-{audio_source}{audio_blinded}.{valve}
                     ! queue
                         max-size-time=3000000000
                         name=queue-preview-audio-{source}
@@ -62,10 +97,11 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
                         max-size-time=3000000000
                         name=queue-mux-preview-audio-{source}
                     ! mux-preview-{source}.
-                    """.format(source=self.source,
+                    """.format(source=self.name,
                                use_audio="" if use_audio_mix else "source-",
                                audio_source="mix" if use_audio_mix else self.source,
-                               audio_blinded="-blinded" if audio_blinded else ""
+                               audio_blinded="-blinded" if audio_blinded else "",
+                               valve=valve.format(kind='audio')
                                )
 
         # playout pipeline
@@ -81,8 +117,11 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
                     blocksize=1048576
                     buffers-max=500
                     sync-method=next-keyframe
+                    async={async_}
                     name=fd-preview-{source}
-                """.format(source=self.source)
+                """.format(source=self.name,
+                           # don't wait for the first buffer of a closed valve
+                           async_="false" if self.lazy else "true")
 
         # close bin
         self.bin += "" if Args.no_bins else "\n)\n"
@@ -97,7 +136,7 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
         return False
 
     def __str__(self) -> str:
-        return 'AVPreviewOutput[{}]'.format(self.source)
+        return 'AVPreviewOutput[{}]'.format(self.name)
 
     def attach(self, pipeline: Gst.Pipeline):
         self.pipeline = pipeline
@@ -106,7 +145,7 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
         self.log.debug('Adding fd %u to multifdsink', conn.fileno())
 
         # find fdsink and emit 'add'
-        fdsink = self.pipeline.get_by_name("fd-preview-{}".format(self.source))
+        fdsink = self.pipeline.get_by_name("fd-preview-{}".format(self.name))
         if fdsink is None:
             raise Exception("could not find pipeline element for {}".format(self))
         fdsink.emit('add', conn.fileno())
@@ -124,4 +163,46 @@ class AVPreviewOutput(TCPMultiConnection, AVIONode):
             if fileno == conn.fileno() and status == 3:
                 self.log.warning('about to remove fd %u from multifdsink '
                                  'because it is too slow!', fileno)
+                self.lag += 1
         fdsink.connect('client-removed', on_client_removed)
+
+        self.start_encoding()
+
+    def close_connection(self, conn: socket.socket):
+        super().close_connection(conn)
+        if self.lazy and self.encoding and self.num_connections() == 0 and self.idle_timer is None:
+            self.log.debug('Stopping to encode in %us unless a client connects', self.idle_timeout)
+            self.idle_timer = GLib.timeout_add_seconds(self.idle_timeout, self.on_idle)
+
+    def valves(self) -> list[Gst.Element]:
+        valves = [self.pipeline.get_by_name('valve-preview-{}-{}'.format(kind, self.name))
+                  for kind in ['video', 'audio']]
+        return [valve for valve in valves if valve is not None]
+
+    def start_encoding(self):
+        if self.idle_timer is not None:
+            GLib.source_remove(self.idle_timer)
+            self.idle_timer = None
+        if self.encoding:
+            return
+
+        self.log.info('Starting to encode preview')
+        for valve in self.valves():
+            valve.set_property('drop', False)
+        # clients wait for a key frame, ask the encoder for one right away
+        queue = self.pipeline.get_by_name('queue-mux-preview-{}'.format(self.name))
+        if queue is not None:
+            queue.send_event(Gst.Event.new_custom(
+                Gst.EventType.CUSTOM_UPSTREAM,
+                Gst.Structure.new_from_string('GstForceKeyUnit, all-headers=(boolean)true')))
+        self.encoding = True
+        self.activations += 1
+
+    def on_idle(self) -> bool:
+        self.idle_timer = None
+        if self.num_connections() == 0:
+            self.log.info('Stopping to encode preview without clients')
+            for valve in self.valves():
+                valve.set_property('drop', True)
+            self.encoding = False
+        return False
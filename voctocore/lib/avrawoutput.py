@@ -8,12 +8,17 @@ from voctocore.lib.args import Args
 from voctocore.lib.avnode import AVIONode
 from voctocore.lib.config import Config
 from voctocore.lib.tcpmulticonnection import TCPMultiConnection
+from voctocore.lib.teebranch import TeeBranch
 
 
 class AVRawOutput(TCPMultiConnection, AVIONode):
     log: logging.Logger
     source: str
     bin: str
+    ondemand: bool
+    # names of the tee and the first element of each branch
+    branch_names: list[tuple[str, str]]
+    branches: list[TeeBranch]
 
     def __init__(self, source: str, port: int, use_audio_mix: bool=False, audio_blinded: bool=False):
         # create logging interface
@@ -25,29 +30,57 @@ class AVRawOutput(TCPMultiConnection, AVIONode):
         # remember things
         self.source = source
 
+        # link branches to the tees only while clients are connected
+        self.ondemand = Config.getAVRawOutputOnDemand()
+        self.branch_names = []
+        self.branches = []
+
         # open bin
+        self.bin_name = "AVRawOutput-{}".format(self.source)
         self.bin = "" if Args.no_bins else """
             bin.(
-                name=AVRawOutput-{source}
-                """.format(source=self.source)
+                name={bin_name}
+                """.format(bin_name=self.bin_name)
 
         # video pipeline
         if source in Config.getVideoSources(internal=True):
-            self.bin += """
+            if self.ondemand:
+                self.branch_names.append(('video-{}'.format(self.source),
+                                          'capsfilter-mux-video-{}'.format(self.source)))
+                self.bin += """
+                    capsfilter
+                        caps="{vcaps}"
+                        name=capsfilter-mux-video-{source}
+                    """.format(source=self.source,
+                               vcaps=Config.getVideoCaps())
+            else:
+                self.bin += """
                     video-{source}.
                     ! {vcaps}
+                    """.format(source=self.source,
+                               vcaps=Config.getVideoCaps())
+            self.bin += """
                     ! queue
                         max-size-time=3000000000
                         name=queue-mux-video-{source}
                     ! mux-{source}.
-                    """.format(source=self.source,
-                               vcaps=Config.getVideoCaps())
+                    """.format(source=self.source)
 
         # audio pipeline
         if use_audio_mix or source in Config.getAudioSources(internal=True):
+            tee = "{use_audio}audio-{audio_source}{audio_blinded}".format(
+                use_audio="" if use_audio_mix else "source-",
+                audio_source="mix" if use_audio_mix else self.source,
+                audio_blinded="-blinded" if audio_blinded else ""
+            )
+            if self.ondemand:
+                self.branch_names.append((tee, 'queue-audio-mix-convert-{}'.format(self.source)))
+            else:
+                self.bin += """
+                {tee}.
+                !""".format(tee=tee)
             self.bin += """
-                {use_audio}audio-{audio_source}{audio_blinded}.
-                ! queue
+                queue
                     max-size-time=3000000000
                     name=queue-audio-mix-convert-{source}
                 ! audioconvert
@@ -55,12 +88,7 @@ class AVRawOutput(TCPMultiConnection, AVIONode):
                     max-size-time=3000000000
                     name=queue-mux-audio-{source}
                 ! mux-{source}.
-                """.format(
-                source=self.source,
-                use_audio="" if use_audio_mix else "source-",
-                audio_source="mix" if use_audio_mix else self.source,
-                audio_blinded="-blinded" if audio_blinded else ""
-            )
+                """.format(source=self.source)
 
         # playout pipeline
         self.bin += """
@@ -75,9 +103,12 @@ class AVRawOutput(TCPMultiConnection, AVIONode):
                     blocksize=1048576
                     buffers-max={buffers_max}
                     sync-method=next-keyframe
+                    async={async_}
                     name=fd-{source}
                 """.format(
             buffers_max=Config.getOutputBuffers(self.source),
+            # nothing arrives before the first client when on demand
+            async_="false" if self.ondemand else "true",
             source=self.source
         )
 
@@ -99,7 +130,27 @@ class AVRawOutput(TCPMultiConnection, AVIONode):
     def attach(self, pipeline: Gst.Pipeline):
         self.pipeline = pipeline
 
+        bin = None if Args.no_bins else pipeline.get_by_name(self.bin_name)
+        for tee_name, element_name in self.branch_names:
+            tee = pipeline.get_by_name(tee_name)
+            element = pipeline.get_by_name(element_name)
+            if tee is None or element is None:
+                raise Exception("could not find pipeline elements for {}".format(self))
+            sinkpad = element.get_static_pad('sink')
+            if bin is not None:
+                # the tee is outside of our bin
+                ghostpad = Gst.GhostPad.new('sink-{}'.format(element_name), sinkpad)
+                bin.add_pad(ghostpad)
+                sinkpad = ghostpad
+            self.branches.append(TeeBranch(tee, sinkpad))
+
     def on_accepted(self, conn: socket.socket, addr: tuple[str, int]):
+        for branch in self.branches:
+            if not branch.link():
+                self.log.error('Refusing fd %u, could not link to the source', conn.fileno())
+                self.close_connection(conn)
+                return
+
         self.log.debug('Adding fd %u to multifdsink', conn.fileno())
 
         # find fdsink and emit 'add'
@@ -121,4 +172,11 @@ class AVRawOutput(TCPMultiConnection, AVIONode):
             if fileno == conn.fileno() and status == 3:
                 self.log.warning('about to remove fd %u from multifdsink '
                                  'because it is too slow!', fileno)
+                self.lag += 1
         fdsink.connect('client-removed', on_client_removed)
+
+    def close_connection(self, conn: socket.socket):
+        super().close_connection(conn)
+        if self.num_connections() == 0:
+            for branch in self.branches:
+                branch.unlink()
@@ -1,15 +1,18 @@
 #!/usr/bin/env python3
+import cProfile
 import logging
-import json
 import inspect
+import time
 
 import voctocore.lib.pipeline
 from voctocore.lib.config import Config
-from voctocore.lib.response import NotifyResponse, OkResponse, Response
+from voctocore.lib.response import JsonDocument, NotifyResponse, OkResponse, Response
 from vocto.composite_commands import CompositeCommand
 from vocto.command_helpers import quote, dequote, str2bool
 import os
 
+from typing import Optional
+
 class ControlServerCommands(object):
     log: logging.Logger
     pipeline: 'voctocore.lib.pipeline.Pipeline'
@@ -17,6 +20,7 @@ class ControlServerCommands(object):
     sources: list[str]
     blinder_sources: list[str]
     streams: list[str]
+    profiler: Optional[cProfile.Profile]
 
     def __init__(self, pipeline: 'voctocore.lib.pipeline.Pipeline'):
         self.log = logging.getLogger('ControlServerCommands')
@@ -27,6 +31,7 @@ class ControlServerCommands(object):
         self.sources = Config.getSources()
         self.blinder_sources = Config.getBlinderSources()
         self.streams = Config.getAudioStreams().get_stream_names()
+        self.profiler = None
 
     # Commands are defined below. Errors are sent to the clients by throwing
     # exceptions, they will be turned into messages outside.
@@ -84,6 +89,18 @@ class ControlServerCommands(object):
 
             helplines.append(command_sig)
 
+        helplines.append('\t' + 'batch: command [args] ; command [args] ; ...\n'
+                         '\t\texecutes several commands at once and replies with\n'
+                         '\t\t"batch <count>" after all of their replies\n')
+        helplines.append('\t' + 'protocol: text | json\n'
+                         '\t\tswitches this connection to JSON lines, one object per\n'
+                         '\t\treply or notification, or back to text\n')
+        helplines.append('\t' + 'subscribe: topic [topic ...]\n'
+                         '\t\tonly receive notifications with these names, wildcards\n'
+                         '\t\tlike audio_* are allowed\n')
+        helplines.append('\t' + 'unsubscribe: [topic ...]\n'
+                         '\t\tstop receiving these topics, without topics receive\n'
+                         '\t\tall notifications again\n')
         helplines.append('\t' + 'quit / exit')
 
         helplines.append("\n")
@@ -128,10 +145,10 @@ class ControlServerCommands(object):
         status = self.pipeline.vmix.getVideoSources()
         return NotifyResponse('video_status', *status)
 
-    def _get_audio_status(self) -> str:
+    def _get_audio_status(self) -> JsonDocument:
         volumes = self.pipeline.amix.getAudioVolumes()
 
-        return json.dumps({
+        return JsonDocument({
             self.streams[idx]: round(volume, 4)
             for idx, volume in enumerate(volumes)
         })
@@ -285,23 +302,74 @@ class ControlServerCommands(object):
         """returns the parsed server-config"""
         confdict = {header: dict(section)
                     for header, section in dict(Config).items()}
-        return OkResponse('server_config', json.dumps(confdict))
+        return OkResponse('server_config', JsonDocument(confdict))
 
     def get_config_option(self, section: str, key: str) -> Response:
         """returns a single value from the server-config"""
         value = Config.get(section, key)
         return OkResponse('server_config_option', section, key, value)
 
-    def report_queues(self) -> Response:
-        report: dict[str, str] = {}
-        for queue in self.pipeline.queues:
-            report[queue.name] = queue.get_property("current-level-time")
-        return OkResponse('queue_report', json.dumps(report))
-
-    def report_ports(self) -> Response:
-        for p in self.pipeline.ports:
-            p.update()
-        return OkResponse('port_report', json.dumps(self.pipeline.ports, default=lambda x: x.todict()))
+    def _parse_since(self, since: str) -> int:
+        if not since.startswith('since='):
+            raise ValueError("expected since=<seq> but got '%s'" % since)
+        return int(since[6:])
+
+    def report_queues(self, since: Optional[str] = None) -> Response:
+        """reports the levels of all queues. with since=<seq> only the
+           queues which changed after the report with that sequence number
+           are reported, preceded by seq=<seq> of this report."""
+        snapshot = self.pipeline.sample_queues()
+        if since is None:
+            return OkResponse('queue_report', JsonDocument(snapshot.values()))
+
+        changed = snapshot.since(self._parse_since(since))
+        return OkResponse('queue_report', 'seq=%d' % snapshot.seq, JsonDocument(changed))
+
+    def report_ports(self, since: Optional[str] = None) -> Response:
+        """reports the states of all ports. with since=<seq> only the
+           ports which changed after the report with that sequence number
+           are reported, preceded by seq=<seq> of this report."""
+        snapshot = self.pipeline.sample_ports()
+        if since is None:
+            return OkResponse('port_report', JsonDocument(list(snapshot.values().values())))
+
+        changed = snapshot.since(self._parse_since(since))
+        return OkResponse('port_report', 'seq=%d' % snapshot.seq, JsonDocument(list(changed.values())))
+
+    def report_latency(self) -> Response:
+        """reports how many buffers were sampled and percentiles of their
+           latency in seconds at the probe points along the video paths.
+           only available when latency tracing is enabled."""
+        if self.pipeline.latency is None:
+            raise ValueError("latency tracing is not enabled")
+        return OkResponse('latency_report', JsonDocument(self.pipeline.latency.report()))
+
+    def profile(self, action: str) -> Response:
+        """profiles the main loop of voctocore with cProfile.
+           'profile start' starts collecting, 'profile stop' writes the
+           statistics to a file in the configured profile directory and
+           replies with its path (load it with python's pstats module)."""
+        if action == 'start':
+            if self.profiler is not None:
+                raise ValueError("profiler is already running")
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            return OkResponse('profile', 'started')
+
+        if action == 'stop':
+            if self.profiler is None:
+                raise ValueError("profiler is not running")
+            self.profiler.disable()
+            path = os.path.join(Config.getProfileDir(),
+                                time.strftime('voctocore-%Y%m%d-%H%M%S.prof'))
+            try:
+                self.profiler.dump_stats(path)
+            finally:
+                self.profiler = None
+            self.log.info("Wrote profile to %s", path)
+            return OkResponse('profile', 'stopped', path)
+
+        raise ValueError("unknown action '%s', expected start or stop" % action)
 
     # only available when overlays are configured
     if Config.hasOverlay():
@@ -5,6 +5,7 @@ import os
 import os.path
 import re
 import sys
+import tempfile
 from configparser import DuplicateSectionError
 from datetime import date, datetime, timedelta
 from pathlib import Path
@@ -360,6 +361,98 @@ class VoctocoreConfigParser(VocConfigParser):
                 matrix[i][i] = 1.0
         return matrix
 
+    def getSceneUpdate(self) -> str:
+        ''' return how scene changes are applied to the mixer: 'handoff',
+            'probe' or 'mainloop' '''
+        mode = self.get('mix', 'sceneupdate', fallback='handoff').lower()
+        if mode not in ['handoff', 'probe', 'mainloop']:
+            self.log.error("Configuration value mix/sceneupdate has unknown mode '{}'".format(mode))
+            sys.exit(-1)
+        return mode
+
+    def getSceneLookahead(self) -> int:
+        ''' return look-ahead in milliseconds used to schedule scene changes
+            from the main loop '''
+        return self.getint('mix', 'scenelookahead', fallback=40)
+
+    def getSceneCoalescing(self) -> bool:
+        ''' return if composite requests within one frame get coalesced '''
+        return self.getboolean('mix', 'coalesce', fallback=True)
+
+    def getPreviewsLazy(self) -> bool:
+        ''' return if previews only get encoded while clients are connected '''
+        return self.getboolean('previews', 'lazy', fallback=True)
+
+    def getPreviewsIdleTimeout(self) -> int:
+        ''' return seconds previews keep being encoded after the last client
+            disconnected '''
+        return self.getint('previews', 'idletimeout', fallback=10)
+
+    def getControlServer(self) -> str:
+        ''' return which control server implementation to run: 'glib' or
+            'asyncio' '''
+        kind = self.get('control', 'server', fallback='glib').lower()
+        if kind not in ['glib', 'asyncio']:
+            self.log.error("Configuration value control/server has unknown kind '{}'".format(kind))
+            sys.exit(-1)
+        return kind
+
+    def getControlWriteLimit(self) -> int:
+        ''' return how many bytes may be waiting to be sent to a control
+            client before it gets disconnected '''
+        return self.getint('control', 'writelimit', fallback=1048576)
+
+    def getControlWriteTimeout(self) -> float:
+        ''' return seconds the asyncio control server waits for a client to
+            take its replies before it gets disconnected '''
+        return self.getfloat('control', 'writetimeout', fallback=5.0)
+
+    def getProfileDir(self) -> str:
+        ''' return the directory the profile command writes its statistics to '''
+        return self.get('control', 'profiledir', fallback=tempfile.gettempdir())
+
+    def getLatencyTracingEnabled(self) -> bool:
+        ''' return if buffer latency gets measured along the video paths '''
+        return self.getboolean('latency', 'enabled', fallback=False)
+
+    def getLatencySampling(self) -> int:
+        ''' return every how many buffers the latency probes measure one '''
+        return max(1, self.getint('latency', 'every', fallback=25))
+
+    def getElementStatsEnabled(self) -> bool:
+        ''' return if CPU time and buffer rates get accounted per element '''
+        return self.getboolean('elementstats', 'enabled', fallback=False)
+
+    def getElementStatsInterval(self) -> int:
+        ''' return milliseconds between two samples of the element stats '''
+        return max(1000, self.getint('elementstats', 'interval', fallback=5000))
+
+    def getMetricsInterval(self) -> int:
+        ''' return milliseconds between two samples of the metrics served to
+            scrapes '''
+        return max(100, self.getint('metrics', 'interval', fallback=5000))
+
+    def getTelemetryInterval(self) -> int:
+        ''' return milliseconds between two samples of queue levels and port
+            states pushed to subscribed control clients '''
+        return max(100, self.getint('telemetry', 'interval', fallback=1000))
+
+    def getShmOutputEnabled(self) -> bool:
+        return self.getboolean('shmoutput', 'enabled', fallback=False)
+
+    def getShmOutputSources(self) -> list[str]:
+        ''' return the mix or sources to write into shared memory '''
+        sources = self.getList('shmoutput', 'sources') or ['mix']
+        for source in sources:
+            if source != 'mix' and source not in self.getSources():
+                self.log.error("source '{}' configured in 'shmoutput/sources' must be listed in 'mix/sources'".format(source))
+                sys.exit(-1)
+        return sources
+
+    def getShmOutputPath(self) -> str:
+        ''' return the directory of the shared memory sockets '''
+        return self.get('shmoutput', 'path', fallback='/tmp/voctomix')
+
 
 def load():
     global Config
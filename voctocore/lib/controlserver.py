@@ -1,22 +1,239 @@
+import json
 import logging
 import socket
-from queue import Empty, Queue
-from threading import Lock
+import time
+from collections import Counter, deque
+from fnmatch import fnmatchcase
 
-from gi.repository import GObject
+from gi.repository import GObject, GLib
 from voctocore.lib.commands import ControlServerCommands
-from voctocore.lib.response import NotifyResponse
+from voctocore.lib.config import Config
+from voctocore.lib.histogram import Histogram
+from voctocore.lib.response import ErrorResponse, NotifyResponse, OkResponse, Response, json_default
 from voctocore.lib.tcpmulticonnection import TCPMultiConnection
 
 from vocto.port import Port
 from vocto.sd_notify import sd_notify
 
+from typing import Any, Optional
 
-class ControlServer(TCPMultiConnection):
+
+class CommandDispatcher:
+    '''Parses command lines and executes them on ControlServerCommands.
+    Replies and notifications are handed to _schedule_write of the
+    connections in currentConnections, whatever they are.'''
     log: logging.Logger
-    command_queue: Queue
-    on_loop_lock: Lock
+    commands: ControlServerCommands
+    currentConnections: dict[Any, Any]
+    json_clients: set[Any]
+    subscriptions: dict[Any, set[str]]
+    opt_in_topics: set[str]
+    topics_sent: Counter
+    topics_filtered: Counter
+    command_latency: dict[tuple[str, str], Histogram]
+
+    def _init_dispatcher(self, pipeline):
+        self.commands = ControlServerCommands(pipeline)
+        # per connection state, see _forget
+        self.json_clients = set()
+        self.subscriptions = dict()
+        # notifications sent and suppressed by subscriptions, by name
+        self.topics_sent = Counter()
+        self.topics_filtered = Counter()
+        # topics like periodic telemetry nobody gets without subscribing
+        self.opt_in_topics = set()
+        # seconds commands spent queued, executing and writing their replies
+        # by (command, stage)
+        self.command_latency = dict()
+
+    def _handle(self, line: str, requestor: Any, received: Optional[float] = None):
+        words = line.split()
+        if len(words) < 1:
+            self.log.debug(f'command_queue contained {line!r}, which is invalid, returning early')
+            return
+
+        # optional request id which gets echoed in all replies to the requestor
+        request_id = None
+        if words[0].startswith('id='):
+            request_id = words[0][3:]
+            words = words[1:]
+            if len(words) < 1:
+                self._respond(requestor, request_id, ErrorResponse('error', 'missing command'))
+                return
+
+        if words[0] == 'batch':
+            # execute all commands separated by ';' within this iteration
+            commands: list[list[str]] = [[]]
+            for word in words[1:]:
+                if word == ';':
+                    commands.append([])
+                else:
+                    commands[-1].append(word)
+            commands = [c for c in commands if c]
+            for c in commands:
+                self._execute(c[0], c[1:], requestor, request_id, received)
+            self._respond(requestor, request_id, OkResponse('batch', len(commands)))
+        elif words[0] == 'protocol':
+            self._set_protocol(requestor, request_id, words[1:])
+        elif words[0] == 'subscribe' or words[0] == 'unsubscribe':
+            self._subscribe(requestor, request_id, words[0] == 'subscribe', words[1:])
+        else:
+            self._execute(words[0], words[1:], requestor, request_id, received)
+
+    def _execute(self, command: str, args: list[str], requestor: Any, request_id: Optional[str],
+                 received: Optional[float] = None):
+        self.log.debug(f"on_loop {command=} {args=}")
+
+        response: Optional[Response] = None
+        executed: Optional[float] = None
+        try:
+            # deny calling private methods
+            if command[0] == '_':
+                self.log.info('Private methods are not callable')
+                raise KeyError()
+
+            command_function = self.commands.__class__.__dict__[command]
+        except KeyError as e:
+            self.log.info("Received unknown command %s", command)
+            response = ErrorResponse('error', 'unknown command %s' % command)
+
+        else:
+            started = time.perf_counter()
+            if received is not None:
+                self._observe(command, 'queue', started - received)
+            try:
+                responseObject = command_function(self.commands, *args)
+            except Exception as e:
+                executed = time.perf_counter()
+                self._observe(command, 'exec', executed - started)
+                self.log.error(f'{command}(*{args!r}) returned exception: {e!r}')
+                message = str(e) or "<no message>"
+                response = ErrorResponse('error', message)
+
+            else:
+                executed = time.perf_counter()
+                self._observe(command, 'exec', executed - started)
+                if isinstance(responseObject, NotifyResponse):
+                    responseObject = [responseObject]
+
+                if isinstance(responseObject, list):
+                    for obj in responseObject:
+                        self.notify(obj, requestor, request_id)
+                elif isinstance(responseObject, Response):
+                    response = responseObject
+                else:
+                    response = OkResponse(responseObject)
+        finally:
+            self.log.debug(f'on_loop {response=} {requestor=}')
+            if response is not None:
+                self._respond(requestor, request_id, response)
+            if executed is not None:
+                self._observe(command, 'write', time.perf_counter() - executed)
+
+    def _observe(self, command: str, stage: str, seconds: float):
+        histogram = self.command_latency.get((command, stage))
+        if histogram is None:
+            histogram = self.command_latency[(command, stage)] = Histogram()
+        histogram.observe(seconds)
+
+    def notify(self, obj: Response, requestor: Any = None, request_id: Optional[str] = None):
+        '''Send notification to all subscribed connections. The requestor
+        always gets it, with its request id (if any).'''
+        topic = str(obj.args[0])
+        # serialize once per protocol for everyone but the requestor
+        signals: dict[bool, str] = {}
+        for conn in list(self.currentConnections):
+            if conn is requestor:
+                self._respond(conn, request_id, obj)
+                self.topics_sent[topic] += 1
+                continue
+            if not self._subscribed(conn, topic):
+                self.topics_filtered[topic] += 1
+                continue
+            as_json = conn in self.json_clients
+            signal = signals.get(as_json)
+            if signal is None:
+                signal = signals[as_json] = self._serialize(obj, as_json)
+            self._schedule_write(conn, signal)
+            self.topics_sent[topic] += 1
+
+    def has_subscribers(self, topic: str) -> bool:
+        return any(self._subscribed(conn, topic) for conn in self.currentConnections)
+
+    def _set_protocol(self, conn: Any, request_id: Optional[str], args: list[str]):
+        if args == ['json']:
+            self.json_clients.add(conn)
+        elif args == ['text']:
+            self.json_clients.discard(conn)
+        else:
+            self._respond(conn, request_id, ErrorResponse('error', 'unknown protocol %s' % ' '.join(args)))
+            return
+        self._respond(conn, request_id, OkResponse('protocol', args[0]))
+
+    def _subscribe(self, conn: Any, request_id: Optional[str], subscribe: bool, topics: list[str]):
+        '''Change the notifications a connection receives. Topics are names of
+        notifications and may contain shell-style wildcards. Without any
+        subscription a connection receives everything but the opt-in topics,
+        which need to be subscribed by name.'''
+        if subscribe:
+            if not topics:
+                self._respond(conn, request_id, ErrorResponse('error', 'missing topic'))
+                return
+            self.subscriptions.setdefault(conn, set()).update(topics)
+        elif topics:
+            self.subscriptions.get(conn, set()).difference_update(topics)
+        else:
+            self.subscriptions.pop(conn, None)
+
+        subscribed = self.subscriptions.get(conn)
+        self._respond(conn, request_id, OkResponse('subscriptions', *sorted(subscribed if subscribed is not None else ['*'])))
+
+    def _subscribed(self, conn: Any, topic: str) -> bool:
+        topics = self.subscriptions.get(conn)
+        if topic in self.opt_in_topics:
+            # only sent to those who asked for it by name
+            return topics is not None and topic in topics
+        if topics is None or topic in topics:
+            return True
+        return any(fnmatchcase(topic, pattern) for pattern in topics)
+
+    def _respond(self, conn: Any, request_id: Optional[str], response: Response):
+        '''Send response to requestor with its request id (if any)'''
+        if conn in self.currentConnections:
+            self._schedule_write(conn, self._serialize(response, conn in self.json_clients, request_id))
+
+    def _serialize(self, response: Response, as_json: bool, request_id: Optional[str] = None) -> str:
+        if as_json:
+            data = response.todict()
+            if request_id is not None:
+                data['id'] = request_id
+            return json.dumps(data, default=json_default) + "\n"
+
+        message = "%s\n" % str(response)
+        if request_id is not None:
+            message = "id=%s %s" % (request_id, message)
+        return message
+
+    def _forget(self, conn: Any):
+        # drop per connection state of the dispatcher
+        self.json_clients.discard(conn)
+        self.subscriptions.pop(conn, None)
+
+    def _schedule_write(self, conn: Any, message: str):
+        raise NotImplementedError(
+            "child classes of CommandDispatcher must implement _schedule_write()"
+        )
+
+
+class ControlServer(CommandDispatcher, TCPMultiConnection):
+    log: logging.Logger
+    command_queue: deque
     on_loop_active: bool
+    loop_budget: float
+    write_limit: int
+    write_buffers: dict[socket.socket, bytearray]
+    write_watches: dict[socket.socket, int]
+    read_watches: dict[socket.socket, int]
     commands: ControlServerCommands
 
     def __init__(self, pipeline):
@@ -24,12 +241,19 @@ class ControlServer(TCPMultiConnection):
         self.log = logging.getLogger('ControlServer')
         super().__init__(port=Port.CORE_LISTENING)
 
-        self.command_queue = Queue()
-
-        self.on_loop_lock = Lock()
+        self.command_queue = deque()
         self.on_loop_active = False
+        # seconds on_loop may spend on commands before it yields to the main loop
+        self.loop_budget = 0.01
 
-        self.commands = ControlServerCommands(pipeline)
+        # outgoing data and the writable watch of every connection that has some
+        self.write_buffers = dict()
+        self.write_watches = dict()
+        self.write_limit = Config.getControlWriteLimit()
+        # readable watch of every connection
+        self.read_watches = dict()
+
+        self._init_dispatcher(pipeline)
 
     def _log_num_connections(self):
         # Overwrite method of TCPMultiConnection to add status information to sd_notify
@@ -40,7 +264,7 @@ class ControlServer(TCPMultiConnection):
         '''Asynchronous connection listener.
            Starts a handler for each connection.'''
         self.log.debug('setting gobject io-watch on connection')
-        GObject.io_add_watch(conn, GObject.IO_IN, self.on_data, [''])
+        self.read_watches[conn] = GObject.io_add_watch(conn, GObject.IO_IN, self.on_data, [''])
 
     def on_data(self, conn, _, leftovers, *args):
         '''Asynchronous connection handler.
@@ -60,6 +284,10 @@ class ControlServer(TCPMultiConnection):
                     continue
         except BlockingIOError:
             pass
+        except OSError:
+            self.log.warning("Failed to receive from fd=%u", conn.fileno(), exc_info=True)
+            self.close_connection(conn)
+            return False
 
         data = "".join(leftovers)
         del leftovers[:]
@@ -75,13 +303,12 @@ class ControlServer(TCPMultiConnection):
                 self.close_connection(conn)
                 return False
 
-            with self.on_loop_lock:
-                if not self.on_loop_active:
-                    self.log.debug('re-starting on_loop scheduling')
-                    GObject.idle_add(self.on_loop)
-                    self.on_loop_active = True
+            if not self.on_loop_active:
+                self.log.debug('re-starting on_loop scheduling')
+                GObject.idle_add(self.on_loop)
+                self.on_loop_active = True
 
-            self.command_queue.put((line, conn))
+            self.command_queue.append((line, conn, time.perf_counter()))
 
         if close_after:
             self.close_connection(conn)
@@ -95,91 +322,72 @@ class ControlServer(TCPMultiConnection):
 
     def on_loop(self):
         '''Command handler. Processes commands in the command queue whenever
-        nothing else is happening (registered as GObject idle callback)'''
-
-        with self.on_loop_lock:
-            try:
-                line, requestor = self.command_queue.get_nowait()
-                self.log.debug(f'on_loop {line=} {requestor=}')
-            except Empty:
-                self.log.debug('command_queue is empty again, stopping on_loop scheduling')
-                self.on_loop_active = False
-                return False
-
-        words = line.split()
-        if len(words) < 1:
-            self.log.debug(f'command_queue contained {line!r}, which is invalid, returning early')
-            return True
-
-        command = words[0]
-        args = words[1:]
-        self.log.debug(f"on_loop {command=} {args=}")
-
-        response = None
-        try:
-            # deny calling private methods
-            if command[0] == '_':
-                self.log.info('Private methods are not callable')
-                raise KeyError()
-
-            command_function = self.commands.__class__.__dict__[command]
-        except KeyError as e:
-            self.log.info("Received unknown command %s", command)
-            response = "error unknown command %s\n" % command
-
-        else:
-            try:
-                responseObject = command_function(self.commands, *args)
-            except Exception as e:
-                self.log.error(f'{command}(*{args!r}) returned exception: {e!r}')
-                message = str(e) or "<no message>"
-                response = "error %s\n" % message
-
-            else:
-                if isinstance(responseObject, NotifyResponse):
-                    responseObject = [responseObject]
-
-                if isinstance(responseObject, list):
-                    for obj in responseObject:
-                        signal = "%s\n" % str(obj)
-                        for conn in self.currentConnections:
-                            self._schedule_write(conn, signal)
-                else:
-                    response = "%s\n" % str(responseObject)
-        finally:
-            self.log.debug(f'on_loop {response=} {requestor=}')
-            if response is not None and requestor in self.currentConnections:
-                self._schedule_write(requestor, response)
-
-        return True
-
-    def _schedule_write(self, conn: socket.socket, message):
-        queue = self.currentConnections[conn]
+        nothing else is happening (registered as GObject idle callback).
+        Yields back to the main loop when loop_budget is used up.'''
+        deadline = time.monotonic() + self.loop_budget
+        while self.command_queue:
+            line, requestor, received = self.command_queue.popleft()
+            self.log.debug(f'on_loop {line=} {requestor=}')
+            self._handle(line, requestor, received)
+            if time.monotonic() >= deadline:
+                return True
+
+        self.log.debug('command_queue is empty again, stopping on_loop scheduling')
+        self.on_loop_active = False
+        return False
 
-        self.log.debug('re-starting on_write[%u] scheduling', conn.fileno())
-        GObject.io_add_watch(conn, GObject.IO_OUT, self.on_write)
+    def _schedule_write(self, conn: socket.socket, message: str):
+        self.log.info("Responding message '%s'", message.strip())
+        buffer = self.write_buffers.get(conn)
+        if buffer is None:
+            buffer = self.write_buffers[conn] = bytearray()
+        buffer += message.encode()
+        if len(buffer) > self.write_limit:
+            # client does not read what we send, don't let it eat up our memory
+            self.log.warning("Disconnecting fd=%u which has %u bytes waiting to be sent",
+                             conn.fileno(), len(buffer))
+            self.close_connection(conn)
+            return
 
-        queue.put(message)
+        if conn not in self.write_watches:
+            self.log.debug('re-starting on_write[%u] scheduling', conn.fileno())
+            self.write_watches[conn] = GObject.io_add_watch(conn, GObject.IO_OUT, self.on_write)
 
     def on_write(self, conn: socket.socket, *args):
-        self.log.debug('on_write[%u] called', conn.fileno())
-
-        try:
-            queue = self.currentConnections[conn]
-        except KeyError:
+        '''Sends as much of the connection's outgoing buffer as the socket
+        takes and keeps the watch until the buffer is empty.'''
+        buffer = self.write_buffers.get(conn)
+        if not buffer:
+            self.log.debug(f'write_buffer[{conn.fileno()}] is empty again, stopping on_write scheduling')
+            self.write_watches.pop(conn, None)
             return False
 
         try:
-            message = queue.get_nowait()
-            self.log.debug(f'on_write {message=}')
-        except Empty:
-            self.log.debug(f'write_queue[{conn.fileno()}] is empty again, stopping on_write scheduling')
+            sent = conn.send(buffer)
+        except BlockingIOError:
+            return True
+        except OSError:
+            self.log.warning("Failed to send %u bytes to fd=%u", len(buffer), conn.fileno(), exc_info=True)
+            del self.write_buffers[conn]
+            self.write_watches.pop(conn, None)
             return False
 
-        self.log.info("Responding message '%s'", message.strip())
-        try:
-            conn.send(message.encode())
-        except Exception as e:
-            self.log.warning("Failed to send message '%s'", message.encode(), exc_info=True)
+        self.log.debug('on_write[%u] sent %u of %u bytes', conn.fileno(), sent, len(buffer))
+        del buffer[:sent]
+        if buffer:
+            return True
 
-        return True
+        del self.write_buffers[conn]
+        self.write_watches.pop(conn, None)
+        return False
+
+    def close_connection(self, conn: socket.socket):
+        self.write_buffers.pop(conn, None)
+        watch = self.write_watches.pop(conn, None)
+        if watch is not None:
+            GLib.source_remove(watch)
+        watch = self.read_watches.pop(conn, None)
+        if watch is not None:
+            GLib.source_remove(watch)
+        self._forget(conn)
+        super().close_connection(conn)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+import logging
+import os
+import threading
+import time
+
+import gi
+gi.require_version('GstBase', '1.0')
+from gi.repository import Gst, GstBase, GLib
+
+from typing import Any, Optional
+
+# elements which start a streaming thread besides sources and aggregators
+QUEUES = ['queue', 'queue2', 'multiqueue']
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def thread_time(thread: int) -> Optional[float]:
+    '''Return the CPU time in seconds a thread of this process has used so
+    far or None if it does not exist (anymore)'''
+    try:
+        with open('/proc/self/task/%d/stat' % thread) as stat:
+            line = stat.read()
+    except OSError:
+        return None
+    # skip pid and name, which may contain spaces, up to the state field
+    fields = line[line.rindex(')') + 2:].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+class ElementProbe(object):
+    '''Counts the buffers an element pushes from its streaming thread and
+    remembers which thread that is. sample() turns both into rates.'''
+    buffers: int
+    thread: Optional[int]
+    cpu_seconds: float
+    cpu_usage: float
+    buffer_rate: float
+    sampled_buffers: int
+    sampled_thread: Optional[int]
+    sampled_cpu: Optional[float]
+
+    def __init__(self):
+        self.buffers = 0
+        self.thread = None
+        # totals and rates refreshed by sample()
+        self.cpu_seconds = 0.0
+        self.cpu_usage = 0.0
+        self.buffer_rate = 0.0
+        self.sampled_buffers = 0
+        self.sampled_thread = None
+        self.sampled_cpu = None
+
+    def on_buffer(self, pad: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        # called from the streaming thread for every buffer
+        self.buffers += 1
+        self.thread = threading.get_native_id()
+        return Gst.PadProbeReturn.OK
+
+    def sample(self, elapsed: float) -> None:
+        buffers = self.buffers
+        self.buffer_rate = (buffers - self.sampled_buffers) / elapsed
+        self.sampled_buffers = buffers
+
+        thread = self.thread
+        cpu = thread_time(thread) if thread is not None else None
+        used = 0.0
+        # a restarted task runs in another thread, count that one from now on
+        if cpu is not None and self.sampled_cpu is not None and thread == self.sampled_thread:
+            used = max(0.0, cpu - self.sampled_cpu)
+        self.cpu_seconds += used
+        self.cpu_usage = used / elapsed
+        self.sampled_thread, self.sampled_cpu = thread, cpu
+
+
+class ElementStats(object):
+    '''Accounts CPU time and buffer rates to the elements which run
+    streaming threads: sources, queues and aggregators like the compositor.
+    The CPU time of a thread includes all elements downstream of its owner
+    up to the next queue. Refreshed on a timer, not when read.'''
+    log: logging.Logger
+    probes: dict[str, ElementProbe]
+    sampled: float
+
+    def __init__(self, pipeline: Any, interval: int):
+        self.log = logging.getLogger('ElementStats')
+        self.probes = dict()
+
+        for element in pipeline.fetch_elements_by_name(r''):
+            if not self.runs_thread(element):
+                continue
+            pad = element.get_static_pad('src')
+            if pad is None:
+                continue
+            probe = ElementProbe()
+            pad.add_probe(Gst.PadProbeType.BUFFER, probe.on_buffer)
+            self.probes[element.get_name()] = probe
+
+        self.log.info('Sampling CPU time of %d elements every %dms', len(self.probes), interval)
+        self.sampled = time.monotonic()
+        GLib.timeout_add(interval, self.on_timer)
+
+    @staticmethod
+    def runs_thread(element: Gst.Element) -> bool:
+        if isinstance(element, (GstBase.BaseSrc, GstBase.Aggregator)):
+            return True
+        factory = element.get_factory()
+        return factory is not None and factory.get_name() in QUEUES
+
+    def on_timer(self) -> bool:
+        now = time.monotonic()
+        elapsed = now - self.sampled
+        self.sampled = now
+        if elapsed > 0:
+            for probe in self.probes.values():
+                probe.sample(elapsed)
+        return True
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import logging
+import socket
+from collections import Counter
+
+from gi.repository import Gst, GLib
+
+from voctocore.lib.avnode import AVIONode
+
+from typing import Any, Optional
+
+# QoS stats report -1 as guint64 when they don't know
+UNKNOWN = 2**64 - 1
+
+
+class FrameStats(object):
+    '''Counts frames dropped and late according to the QoS messages of the
+    pipeline's elements and overruns of the named queues. Counts are also
+    added to the source or output whose bin contains the element, so they
+    show up in the port reports.'''
+    log: logging.Logger
+    nodes: dict[str, AVIONode]
+    outputs: list[tuple[Any, Gst.Element]]
+    dropped: Counter
+    late: Counter
+    overruns: Counter
+
+    def __init__(self, pipeline: Any):
+        self.log = logging.getLogger('FrameStats')
+        # node by the name of its elements and the multifdsinks of outputs
+        self.nodes = dict()
+        self.outputs = []
+        # by element name
+        self.dropped = Counter()
+        self.late = Counter()
+        self.overruns = Counter()
+
+        for node in pipeline.bins:
+            if not isinstance(node, AVIONode) or node.bin_name is None:
+                continue
+            bin = pipeline.pipeline.get_by_name(node.bin_name)
+            if bin is None:
+                # running without bins, count by element only
+                continue
+            iterator = bin.iterate_recurse()
+            if iterator is not None:
+                iterator.foreach(lambda element, node=node: self.add_element(element, node))
+
+        pipeline.pipeline.bus.connect("message::qos", self.on_qos)
+        for queue in pipeline.queues:
+            queue.connect('overrun', self.on_overrun)
+
+    def add_element(self, element: Gst.Element, node: AVIONode):
+        self.nodes[element.get_name()] = node
+        factory = element.get_factory()
+        if factory is not None and factory.get_name() == 'multifdsink':
+            self.outputs.append((node, element))
+
+    def on_qos(self, bus: Gst.Bus, message: Gst.Message):
+        # the stats are totals of the element which sent them
+        _, _, dropped = message.parse_qos_stats()
+        name = message.src.get_name()
+        if dropped == UNKNOWN:
+            dropped = self.dropped[name]
+        node = self.nodes.get(name)
+        if node is not None:
+            node.dropped += max(0, dropped - self.dropped[name])
+            node.late += 1
+        self.dropped[name] = max(dropped, self.dropped[name])
+        self.late[name] += 1
+
+    def on_overrun(self, queue: Gst.Element):
+        # called from the streaming thread, count on the main loop
+        GLib.idle_add(self.count_overrun, queue.get_name())
+
+    def count_overrun(self, name: str) -> bool:
+        self.log.debug('%s overran', name)
+        self.overruns[name] += 1
+        node = self.nodes.get(name)
+        if node is not None:
+            node.lag += 1
+        return False
+
+    def client_stats(self) -> list[tuple[str, str, dict[str, Any]]]:
+        '''Return bin name, address and statistics of every client of the
+        outputs: bytes sent, buffers dropped and seconds the last buffer it
+        got lags behind the last buffer of the sink.'''
+        result = []
+        for node, fdsink in self.outputs:
+            sample = fdsink.get_property('last-sample')
+            newest = sample.get_buffer().pts if sample is not None else Gst.CLOCK_TIME_NONE
+            for conn in list(node.currentConnections):
+                stats = fdsink.emit('get-stats', conn.fileno())
+                client = peer_name(conn)
+                if stats is None or client is None:
+                    continue
+                lag: Optional[float] = None
+                last = stats.get_value('last-buffer-ts')
+                if Gst.CLOCK_TIME_NONE not in (newest, last):
+                    lag = max(0, newest - last) / Gst.SECOND
+                result.append((node.bin_name, client, {
+                    'bytes-sent': stats.get_value('bytes-sent'),
+                    'buffers-dropped': stats.get_value('buffers-dropped'),
+                    'lag': lag,
+                }))
+        return result
+
+
+def peer_name(conn: socket.socket) -> Optional[str]:
+    try:
+        addr = conn.getpeername()
+    except OSError:
+        return None
+    return '[%s]:%u' % (addr[0], addr[1])
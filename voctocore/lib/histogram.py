@@ -0,0 +1,55 @@
+from bisect import bisect_left
+
+from typing import Optional, Sequence
+
+# upper bounds in seconds, from 100µs for cheap commands up to a second
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class Histogram(object):
+    '''Counts observed durations into buckets. Cheap enough to be fed from
+    the main loop on every command, exported by Metrics as a Prometheus
+    histogram.'''
+    buckets: Sequence[float]
+    counts: list[int]
+    sum: float
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # one more for everything above the largest bound
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        '''Return cumulative counts by upper bound, as Prometheus wants them'''
+        result = []
+        total = 0
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        for bound, count in zip(bounds, list(self.counts)):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        '''Estimate the q-quantile by interpolating within the bucket it
+        falls into, like Prometheus' histogram_quantile(). Returns None
+        without observations.'''
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # above the largest bound all we know is the bound
+        return self.buckets[-1]
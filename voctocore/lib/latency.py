@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+import logging
+import re
+
+from gi.repository import Gst
+
+from voctocore.lib.histogram import Histogram
+
+from typing import Any, Optional
+
+# upper bounds in seconds, video buffers are usually a few frames old
+PIPELINE_BUCKETS = (0.005, 0.01, 0.02, 0.04, 0.06, 0.08, 0.1,
+                    0.15, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+
+# stage, pattern of the element names (with the path as group) and the pad
+# to probe, in the order buffers pass them
+PROBE_POINTS = [
+    ('tee', r'^video-([\w_-]+)$', 'sink'),
+    ('mixer', r'^queue-videomixer-([\w_-]+)$', 'src'),
+    ('mux', r'^mux-([\w_-]+)$', 'src'),
+    ('output', r'^fd-([\w_-]+)$', 'sink'),
+]
+
+
+class LatencyProbe(object):
+    '''Buffer probe which measures the age of every nth buffer passing a
+    pad: the running time of the pipeline minus the running time of the
+    buffer.'''
+    every: int
+    buffers: int
+    histogram: Histogram
+
+    def __init__(self, every: int):
+        self.every = every
+        self.buffers = 0
+        self.histogram = Histogram(PIPELINE_BUCKETS)
+
+    def on_buffer(self, pad: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        # called from the streaming thread, keep it short for the others
+        self.buffers += 1
+        if self.buffers % self.every == 0:
+            latency = self.measure(pad, info.get_buffer())
+            if latency is not None:
+                self.histogram.observe(latency)
+        return Gst.PadProbeReturn.OK
+
+    def measure(self, pad: Gst.Pad, buffer: Gst.Buffer) -> Optional[float]:
+        element = pad.get_parent_element()
+        clock = element.get_clock() if element is not None else None
+        event = pad.get_sticky_event(Gst.EventType.SEGMENT, 0)
+        if clock is None or event is None or buffer.pts == Gst.CLOCK_TIME_NONE:
+            return None
+
+        running_time = event.parse_segment().to_running_time(Gst.Format.TIME, buffer.pts)
+        if running_time == Gst.CLOCK_TIME_NONE:
+            return None
+
+        now = clock.get_time() - element.get_base_time()
+        # buffers ahead of the clock are not late at all
+        return max(0.0, (now - running_time) / Gst.SECOND)
+
+
+class LatencyTracer(object):
+    '''Attaches LatencyProbes along the video paths: to the source and mix
+    tees, the mixer inputs, the muxers and the multifdsinks which send to
+    the clients.'''
+    log: logging.Logger
+    probes: dict[tuple[str, str], LatencyProbe]
+
+    def __init__(self, pipeline: Any, every: int):
+        self.log = logging.getLogger('LatencyTracer')
+        self.probes = dict()
+
+        for stage, regex, padname in PROBE_POINTS:
+            for element in pipeline.fetch_elements_by_name(regex):
+                pad = element.get_static_pad(padname)
+                match = re.match(regex, element.get_name())
+                if pad is None or match is None:
+                    continue
+                probe = LatencyProbe(every)
+                pad.add_probe(Gst.PadProbeType.BUFFER, probe.on_buffer)
+                self.probes[(match.group(1), stage)] = probe
+
+        self.log.info('Measuring every %dth buffer at %d pads', every, len(self.probes))
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        '''Return the number of samples and latency percentiles in seconds
+        by path/stage'''
+        report = dict()
+        for (path, stage), probe in self.probes.items():
+            histogram = probe.histogram
+            report['%s/%s' % (path, stage)] = {
+                'samples': sum(histogram.counts),
+                'p50': histogram.quantile(0.5),
+                'p90': histogram.quantile(0.9),
+                'p99': histogram.quantile(0.99),
+            }
+        return report
@@ -1,9 +1,13 @@
-from typing import Iterable
+from typing import Any, Iterable, Optional
+import time
 
-from prometheus_client.metrics_core import GaugeMetricFamily, UnknownMetricFamily
+from prometheus_client.metrics_core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily, UnknownMetricFamily
+
+from gi.repository import GLib
 
 from vocto.port import Port
 import voctocore.lib.pipeline
+from voctocore.lib.avpreviewoutput import AVPreviewOutput
 
 from prometheus_client.registry import Collector
 from prometheus_client import Metric, start_http_server
@@ -16,15 +20,31 @@ from voctocore.lib.config import Config
 class Metrics(Collector):
     log: logging.Logger
     pipeline: 'voctocore.lib.pipeline.Pipeline'
+    controlserver: Optional[Any]
+    snapshot: tuple[list[Metric], Optional[float]]
+    snapshot_duration: float
+    scrape_duration: float
 
-    def __init__(self, pipeline):
+    def __init__(self, pipeline, controlserver=None):
         if not hasattr(self, 'log'):
             self.log = logging.getLogger('Metrics')
 
         self.pipeline = pipeline
+        self.controlserver = controlserver
         self.server, self.server_thread = None, None
 
+        # metric families sampled on the main loop and when that was,
+        # served to scrapes from the HTTP thread
+        self.snapshot = ([], None)
+        self.snapshot_duration = 0.0
+        self.scrape_duration = 0.0
+
     def start(self, port=20000):
+        self.update()
+        interval = Config.getMetricsInterval()
+        self.log.debug('sampling metrics every %dms', interval)
+        GLib.timeout_add(interval, self.on_timer)
+
         self.log.info('Starting metrics server...')
         self.server, self.server_thread = start_http_server(port)
 
@@ -34,7 +54,50 @@ class Metrics(Collector):
             self.server.shutdown()
             self.server.server_close()
 
+    def on_timer(self) -> bool:
+        self.update()
+        return True
+
+    def update(self):
+        '''Sample all metrics. Runs on the main loop which owns the pipeline
+        and the control server, so nothing changes while we read it.'''
+        start = time.monotonic()
+        families = list(self.sample())
+        self.snapshot_duration = time.monotonic() - start
+        # replace at once, scrapes read it from another thread
+        self.snapshot = (families, time.monotonic())
+
     def collect(self) -> Iterable[Metric]:
+        '''Serve the last snapshot, called from the HTTP thread'''
+        start = time.monotonic()
+        families, sampled = self.snapshot
+        yield from families
+
+        if sampled is not None:
+            snapshot_age = GaugeMetricFamily(
+                'voctocore_metrics_snapshot_age_seconds',
+                'Time since the metrics served were sampled'
+            )
+            snapshot_age.add_metric([], start - sampled)
+            yield snapshot_age
+
+        snapshot_duration = GaugeMetricFamily(
+            'voctocore_metrics_snapshot_duration_seconds',
+            'Time the main loop spent sampling the last snapshot of metrics'
+        )
+        snapshot_duration.add_metric([], self.snapshot_duration)
+        yield snapshot_duration
+
+        scrape_duration = GaugeMetricFamily(
+            'voctocore_metrics_scrape_duration_seconds',
+            'Time it took to serve the previous scrape'
+        )
+        scrape_duration.add_metric([], self.scrape_duration)
+        yield scrape_duration
+
+        self.scrape_duration = time.monotonic() - start
+
+    def sample(self) -> Iterable[Metric]:
         sources = Config.getSources()
 
         source_info = UnknownMetricFamily(
@@ -92,6 +155,106 @@ class Metrics(Collector):
 
         yield port_connections
 
+        port_dropped = CounterMetricFamily(
+            'voctocore_port_dropped_frames',
+            'Frames dropped by elements of a port according to their QoS messages',
+            labels=['name', 'is_input', 'is_output']
+        )
+        port_late = CounterMetricFamily(
+            'voctocore_port_late_frames',
+            'QoS messages about late frames from elements of a port',
+            labels=['name', 'is_input', 'is_output']
+        )
+        port_lag = CounterMetricFamily(
+            'voctocore_port_lag',
+            'Queue overruns and clients disconnected for being too slow at a port',
+            labels=['name', 'is_input', 'is_output']
+        )
+
+        for port in self.pipeline.ports:
+            labels = [port.name, str(int(port.is_input())), str(int(port.is_output()))]
+            port_dropped.add_metric(labels, port.dropped)
+            port_late.add_metric(labels, port.late)
+            port_lag.add_metric(labels, port.lag)
+
+        yield port_dropped
+        yield port_late
+        yield port_lag
+
+        framestats = self.pipeline.framestats
+        element_dropped = CounterMetricFamily(
+            'voctocore_element_qos_dropped_frames',
+            'Frames an element dropped according to its QoS messages',
+            labels=['element']
+        )
+        for name, count in framestats.dropped.items():
+            element_dropped.add_metric([name], count)
+
+        yield element_dropped
+
+        element_late = CounterMetricFamily(
+            'voctocore_element_qos_late_frames',
+            'QoS messages about late frames from an element',
+            labels=['element']
+        )
+        for name, count in framestats.late.items():
+            element_late.add_metric([name], count)
+
+        yield element_late
+
+        queue_overruns = CounterMetricFamily(
+            'voctocore_gst_queue_overruns',
+            'Times a queue was full',
+            labels=['name']
+        )
+        for name, count in framestats.overruns.items():
+            queue_overruns.add_metric([name], count)
+
+        yield queue_overruns
+
+        client_bytes = GaugeMetricFamily(
+            'voctocore_output_client_bytes_sent',
+            'Bytes sent to a client of an output',
+            labels=['output', 'client']
+        )
+        client_dropped = GaugeMetricFamily(
+            'voctocore_output_client_buffers_dropped',
+            'Buffers dropped for a client of an output',
+            labels=['output', 'client']
+        )
+        client_lag = GaugeMetricFamily(
+            'voctocore_output_client_lag_seconds',
+            'How far the last buffer sent to a client lags behind the last buffer of the output',
+            labels=['output', 'client']
+        )
+        for output, client, stats in framestats.client_stats():
+            client_bytes.add_metric([output, client], stats['bytes-sent'])
+            client_dropped.add_metric([output, client], stats['buffers-dropped'])
+            if stats['lag'] is not None:
+                client_lag.add_metric([output, client], stats['lag'])
+
+        yield client_bytes
+        yield client_dropped
+        yield client_lag
+
+        preview_encoding = GaugeMetricFamily(
+            'voctocore_preview_encoding',
+            'Whether a preview output is encoding',
+            labels=['output']
+        )
+        preview_activations = CounterMetricFamily(
+            'voctocore_preview_activations',
+            'Times a preview output started encoding for a client',
+            labels=['output']
+        )
+        for node in self.pipeline.bins:
+            if isinstance(node, AVPreviewOutput):
+                preview_encoding.add_metric([node.name], int(node.encoding))
+                preview_activations.add_metric([node.name], node.activations)
+
+        yield preview_encoding
+        yield preview_activations
+
         if Config.getBlinderEnabled():
             blinder_metric = GaugeMetricFamily(
                 'voctocore_blinder',
@@ -121,3 +284,124 @@ class Metrics(Collector):
             ], 1)
 
         yield current_composite
+
+        composite_requests = CounterMetricFamily(
+            'voctocore_composite_requests',
+            'Composite change requests, coalesced ones got deferred and dropped ones superseded',
+            labels=['result']
+        )
+        composite_requests.add_metric(['requested'], self.pipeline.vmix.requests)
+        composite_requests.add_metric(['coalesced'], self.pipeline.vmix.coalesced)
+        composite_requests.add_metric(['dropped'], self.pipeline.vmix.dropped)
+
+        yield composite_requests
+
+        transition_solve = HistogramMetricFamily(
+            'voctocore_transition_solve_seconds',
+            'Time spent searching a transition between two composites'
+        )
+        solve_time = self.pipeline.vmix.solve_time
+        transition_solve.add_metric([], solve_time.cumulative(), solve_time.sum)
+
+        yield transition_solve
+
+        if self.pipeline.latency is not None:
+            pipeline_latency = HistogramMetricFamily(
+                'voctocore_pipeline_latency_seconds',
+                'Age of sampled buffers passing the probe points along the video paths',
+                labels=['path', 'stage']
+            )
+            for (path, stage), probe in list(self.pipeline.latency.probes.items()):
+                histogram = probe.histogram
+                pipeline_latency.add_metric([path, stage], histogram.cumulative(), histogram.sum)
+
+            yield pipeline_latency
+
+        if self.pipeline.elementstats is not None:
+            element_cpu = CounterMetricFamily(
+                'voctocore_element_cpu_seconds',
+                'CPU time of the streaming thread an element runs, including the elements downstream up to the next queue',
+                labels=['element']
+            )
+            element_cpu_usage = GaugeMetricFamily(
+                'voctocore_element_cpu_usage',
+                'Share of one CPU used by the streaming thread of an element during the last sampling interval',
+                labels=['element']
+            )
+            element_buffer_rate = GaugeMetricFamily(
+                'voctocore_element_buffer_rate',
+                'Buffers (video frames or audio chunks) per second pushed by an element during the last sampling interval',
+                labels=['element']
+            )
+            for name, element in list(self.pipeline.elementstats.probes.items()):
+                element_cpu.add_metric([name], element.cpu_seconds)
+                element_cpu_usage.add_metric([name], element.cpu_usage)
+                element_buffer_rate.add_metric([name], element.buffer_rate)
+
+            yield element_cpu
+            yield element_cpu_usage
+            yield element_buffer_rate
+
+        scene_pushes = CounterMetricFamily(
+            'voctocore_scene_pushes',
+            'Number of scene changes pushed from the streaming thread',
+            labels=['scene']
+        )
+        scene_push_time = CounterMetricFamily(
+            'voctocore_scene_push_seconds',
+            'Time the streaming thread spent pushing scene changes',
+            labels=['scene']
+        )
+        scene_push_max = GaugeMetricFamily(
+            'voctocore_scene_push_max_seconds',
+            'Longest time a single scene push blocked the streaming thread',
+            labels=['scene']
+        )
+        scene_points = CounterMetricFamily(
+            'voctocore_scene_control_points',
+            'Number of control points written to the mixer',
+            labels=['scene']
+        )
+        scene_points_cut = GaugeMetricFamily(
+            'voctocore_scene_control_points_last_cut',
+            'Number of control points written by the last scene change',
+            labels=['scene']
+        )
+
+        for name, scene in [('mix', self.pipeline.vmix.scene), ('background', self.pipeline.vmix.bgScene)]:
+            if scene is not None:
+                scene_pushes.add_metric([name], scene.pushes)
+                scene_push_time.add_metric([name], scene.push_time)
+                scene_push_max.add_metric([name], scene.push_time_max)
+                scene_points.add_metric([name], scene.points_total)
+                scene_points_cut.add_metric([name], scene.points)
+
+        yield scene_pushes
+        yield scene_push_time
+        yield scene_push_max
+        yield scene_points
+        yield scene_points_cut
+
+        if self.controlserver is not None:
+            control_notifications = CounterMetricFamily(
+                'voctocore_control_notifications',
+                'Notifications by topic, sent to clients or filtered by their subscriptions',
+                labels=['topic', 'result']
+            )
+            # copy at once, the main loop keeps counting while we collect
+            for result, counter in [('sent', dict(self.controlserver.topics_sent)),
+                                    ('filtered', dict(self.controlserver.topics_filtered))]:
+                for topic, count in counter.items():
+                    control_notifications.add_metric([topic, result], count)
+
+            yield control_notifications
+
+            control_latency = HistogramMetricFamily(
+                'voctocore_control_command_seconds',
+                'Time commands spent waiting in the queue, executing and writing replies and notifications',
+                labels=['command', 'stage']
+            )
+            for (command, stage), histogram in list(self.controlserver.command_latency.items()):
+                control_latency.add_metric([command, stage], histogram.cumulative(), histogram.sum)
+
+            yield control_latency
@@ -13,9 +13,16 @@ from voctocore.lib.avrawoutput import AVRawOutput
 from voctocore.lib.blinder import Blinder
 from voctocore.lib.clock import Clock
 from voctocore.lib.config import Config
+from voctocore.lib.elementstats import ElementStats
+from voctocore.lib.framestats import FrameStats
+from voctocore.lib.latency import LatencyTracer
 from voctocore.lib.local_recording import LocalRecordingSink
+from voctocore.lib.previewscaler import PreviewScaler
 from voctocore.lib.program_output import ProgramOutputSink
+from voctocore.lib.shmoutput import ShmOutput
+from voctocore.lib.snapshot import Snapshot
 from voctocore.lib.sources import spawn_source
+from voctocore.lib.sources.avsource import AVSource
 from voctocore.lib.srtserver import SRTServerSink
 from voctocore.lib.videomix import VideoMix
 
@@ -37,6 +44,11 @@ class Pipeline(object):
     vmix: VideoMix
     prevstate: Optional[Gst.State]
     pipeline: Gst.Pipeline
+    queue_snapshot: Snapshot
+    port_snapshot: Snapshot
+    latency: Optional[LatencyTracer]
+    elementstats: Optional[ElementStats]
+    framestats: FrameStats
 
     def __init__(self) -> None:
         self.log = logging.getLogger('Pipeline')
@@ -71,9 +83,7 @@ class Pipeline(object):
             # check for source preview selection
             if Config.getPreviewsEnabled():
                 # count preview port and create source
-                dest = AVPreviewOutput(source_name, Port.SOURCES_PREVIEW + idx)
-                self.bins.append(dest)
-                self.ports.append(Port("preview-%s" % source_name, dest))
+                self.add_previews(source_name, Port.SOURCES_PREVIEW + idx)
 
         # create audio mixer
         self.log.info('Creating Audiomixer')
@@ -98,6 +108,13 @@ class Pipeline(object):
             self.bins.append(dest)
             self.ports.append(Port('mix', dest))
 
+        # create shared memory outputs for local consumers
+        if Config.getShmOutputEnabled():
+            for source_name in Config.getShmOutputSources():
+                dest = ShmOutput(source_name, use_audio_mix=source_name == 'mix')
+                self.bins.append(dest)
+                self.ports.append(Port('shm-{}'.format(source_name), dest))
+
         # add localui
         if Config.getProgramOutputEnabled():
             pgmout = ProgramOutputSink("mix", Port.MIX_OUT, use_audio_mix=True)
@@ -106,9 +123,7 @@ class Pipeline(object):
 
         # create mix preview TCP output
         if Config.getPreviewsEnabled():
-            dest = AVPreviewOutput('mix', Port.MIX_PREVIEW, use_audio_mix=True)
-            self.bins.append(dest)
-            self.ports.append(Port('preview-mix', dest))
+            self.add_previews('mix', Port.MIX_PREVIEW, use_audio_mix=True)
 
         # create blinding sources and mixer
         if Config.getBlinderEnabled():
@@ -143,9 +158,7 @@ class Pipeline(object):
             # check for source preview selection
             if Config.getPreviewsEnabled():
                 for idx, livepreview in enumerate(Config.getLivePreviews()):
-                    dest = AVPreviewOutput('{}-blinded'.format(livepreview), Port.LIVE_PREVIEW+idx, use_audio_mix=True, audio_blinded=True)
-                    self.bins.append(dest)
-                    self.ports.append(Port('preview-{}-blinded'.format(livepreview), dest))
+                    self.add_previews('{}-blinded'.format(livepreview), Port.LIVE_PREVIEW+idx, use_audio_mix=True, audio_blinded=True)
 
             for idx, livesource in enumerate(Config.getLiveSources()):
                 dest = AVRawOutput('{}-blinded'.format(livesource), Port.LIVE_OUT + idx, use_audio_mix=True, audio_blinded=True )
@@ -193,6 +206,23 @@ class Pipeline(object):
         # fetch all queues
         self.queues = self.fetch_elements_by_name(r'^queue-[\w_-]+$')
 
+        # versioned reports of queue levels and port states
+        self.queue_snapshot = Snapshot()
+        self.port_snapshot = Snapshot()
+
+        # count dropped and late frames and queue overruns
+        self.framestats = FrameStats(self)
+
+        # opt-in buffer latency probes along the video paths
+        self.latency = None
+        if Config.getLatencyTracingEnabled():
+            self.latency = LatencyTracer(self, Config.getLatencySampling())
+
+        # opt-in CPU time and buffer rates of the streaming threads
+        self.elementstats = None
+        if Config.getElementStatsEnabled():
+            self.elementstats = ElementStats(self, Config.getElementStatsInterval())
+
         self.log.debug('Binding End-of-Stream-Signal on Source-Pipeline')
         self.pipeline.bus.add_signal_watch()
         self.pipeline.bus.connect("message::eos", self.on_eos)
@@ -202,6 +232,38 @@ class Pipeline(object):
 
         self.pipeline.set_state(Gst.State.PLAYING)
 
+    def add_previews(self, source: str, port: int, **kwargs) -> None:
+        ''' add the preview output of a source or, if configured, one per
+            rendition of the preview ladder on consecutive preview ports '''
+        ladder = Config.getPreviewLadder()
+        # there is nothing to scale for sources without video
+        if not ladder or source not in Config.getVideoSources(internal=True):
+            dest = AVPreviewOutput(source, port, **kwargs)
+            self.bins.append(dest)
+            self.ports.append(Port('preview-{}'.format(source), dest))
+            return
+
+        self.bins.append(PreviewScaler(source, ladder))
+        for rung, size in enumerate(ladder):
+            dest = AVPreviewOutput(source, Port.rung(port, rung), rung=rung, size=size, **kwargs)
+            self.bins.append(dest)
+            self.ports.append(Port('preview-{}'.format(dest.name), dest))
+
+    def sample_queues(self) -> Snapshot:
+        '''Update and return the versioned levels of all queues'''
+        self.queue_snapshot.update({queue.name: queue.get_property("current-level-time")
+                                    for queue in self.queues})
+        return self.queue_snapshot
+
+    def sample_ports(self) -> Snapshot:
+        '''Update and return the versioned states of all ports'''
+        for port in self.ports:
+            port.update()
+        # port strings are not unique (e.g. test sources), key by position
+        self.port_snapshot.update({index: dict(port.todict(), index=index)
+                                   for index, port in enumerate(self.ports)})
+        return self.port_snapshot
+
     def fetch_elements_by_name(self, regex: str) -> list[Gst.Element]:
         # fetch all watchdogs
         result = []
@@ -219,6 +281,9 @@ class Pipeline(object):
         self.log.debug('Received End-of-Stream-Signal on Source-Pipeline')
 
     def on_error(self, bus: Gst.Bus, message: Gst.Message):
+        for bin in self.bins:
+            if isinstance(bin, AVSource) and bin.on_error(message):
+                return
         (error, debug) = message.parse_error()
         self.log.debug(debug)
         self.log.error("GStreamer pipeline element '%s' signaled an error #%u: %s" % (message.src.name, error.code, error.message) )
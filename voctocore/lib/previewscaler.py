@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import logging
+
+from gi.repository import Gst
+
+from voctocore.lib.args import Args
+from voctocore.lib.avnode import AVNode
+from voctocore.lib.config import Config
+
+
+class PreviewScaler(AVNode):
+    '''Scales the video of a source down the preview ladder. Every size is
+    scaled from the one before, so each step only touches the pixels of
+    the next larger rendition. The preview outputs of a source take their
+    video from the tees preview-{source}-{rung}.'''
+    log: logging.Logger
+    source: str
+    ladder: list[tuple[int, int]]
+    bin: str
+
+    def __init__(self, source: str, ladder: list[tuple[int, int]]):
+        self.log = logging.getLogger('PreviewScaler[{}]'.format(source))
+        self.source = source
+        self.ladder = ladder
+
+        self.bin = "" if Args.no_bins else """
+            bin.(
+                name=PreviewScaler-{source}
+                """.format(source=self.source)
+
+        self.bin += """
+                video-{source}.
+                ! {vcaps}
+                """.format(source=self.source,
+                           vcaps=Config.getVideoCaps())
+
+        for rung, (width, height) in enumerate(self.ladder):
+            if rung > 0:
+                self.bin += """
+                preview-{source}-{previous}.
+                """.format(source=self.source, previous=rung - 1)
+            self.bin += """
+                ! queue
+                    max-size-time=3000000000
+                    name=queue-preview-scale-{source}-{rung}
+                ! videoscale
+                ! video/x-raw,width={width},height={height},pixel-aspect-ratio=1/1
+                ! tee
+                    name=preview-{source}-{rung}
+                """.format(source=self.source,
+                           rung=rung,
+                           width=width,
+                           height=height)
+
+        self.bin += "" if Args.no_bins else "\n)\n"
+
+    def __str__(self) -> str:
+        return 'PreviewScaler[{}]'.format(self.source)
+
+    def attach(self, pipeline: Gst.Pipeline):
+        self.pipeline = pipeline
@@ -1,8 +1,27 @@
-from typing import Iterable
+import json
+
+from typing import Any
+
+
+def json_default(obj: Any) -> Any:
+    # serialize objects like Port which know how to turn themselves into a dict
+    return obj.todict()
+
+
+class JsonDocument(str):
+    '''Response argument carrying a JSON document. Text clients get the
+    serialized document, JSON clients get the value itself.'''
+    value: Any
+
+    def __new__(cls, value: Any) -> 'JsonDocument':
+        document = super().__new__(cls, json.dumps(value, default=json_default))
+        document.value = value
+        return document
 
 
 class Response(object):
-    args: Iterable[str]
+    args: tuple[Any, ...]
+    kind = 'reply'
 
     def __init__(self, *args):
         self.args = args
@@ -10,10 +29,23 @@ class Response(object):
     def __str__(self) -> str:
         return " ".join(map(str, self.args))
 
+    def todict(self) -> dict[str, Any]:
+        name, *args = self.args
+        return {
+            'type': self.kind,
+            'name': str(name),
+            'args': [arg.value if isinstance(arg, JsonDocument) else str(arg)
+                     for arg in args],
+        }
+
 
 class OkResponse(Response):
     pass
 
 
 class NotifyResponse(Response):
-    pass
+    kind = 'notify'
+
+
+class ErrorResponse(Response):
+    kind = 'error'
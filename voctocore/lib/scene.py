@@ -1,10 +1,36 @@
 #!/usr/bin/env python3
+import collections
 import logging
+import threading
+import time
 import gi
 gi.require_version('GstController', '1.0')
 from gi.repository import Gst, GstController
 from vocto.transitions import Frame, L, T, R, B
 
+# mixer and cropper pad properties in the order values get precomputed
+MIXER_PROPERTIES = ['xpos', 'ypos', 'width', 'height', 'alpha', 'zorder']
+CROPPER_PROPERTIES = ['croptop', 'cropleft', 'cropbottom', 'cropright']
+
+
+def frame_values(frame: Frame) -> list:
+    """ convert a frame into the property values of MIXER_PROPERTIES
+        followed by CROPPER_PROPERTIES
+    """
+    cropped = frame.cropped()
+    alpha = frame.float_alpha()
+    return [cropped[L],
+            cropped[T],
+            cropped[R] - cropped[L],
+            cropped[B] - cropped[T],
+            alpha,
+            frame.zorder if alpha != 0 else -1,
+            frame.crop[T],
+            frame.crop[L],
+            frame.crop[B],
+            frame.crop[R]]
+
+
 class Scene:
     """ Scene is the adaptor between the gstreamer compositor
         and voctomix frames.
@@ -17,8 +43,12 @@ class Scene:
             of the sources to manage
         """
         self.log = logging.getLogger('Scene')
-        # frames to apply from
-        self.frames = dict()
+        # precomputed property values to apply from
+        self.values = dict()
+        # last values applied to every property of every source
+        self.applied = dict()
+        # time of the last control point set for every source
+        self.until = dict()
         # binding pads to apply to
         self.pads = dict()
         self.cpads = dict() if cropping else None
@@ -45,7 +75,9 @@ class Scene:
         # walk all sources
         for idx, source in enumerate(sources):
             # initially invisible
-            self.frames[source] = None
+            self.values[source] = None
+            self.applied[source] = dict()
+            self.until[source] = None
             # get mixer pad from pipeline
             mixerpad = (pipeline
                         .get_by_name('videomixer')
@@ -70,53 +102,176 @@ class Scene:
                     'cropbottom': bind(cropperpad, 'bottom'),
                     'cropright': bind(cropperpad, 'right')
                 }
+        # values of sources which have nothing committed
+        self.invisible = self.prepare([Frame(zorder=-1, alpha=0)])
+        # statistics about the time spent in push()
+        self.pushes = 0
+        self.push_time = 0.0
+        self.push_time_max = 0.0
+        # number of control points set by the last push and overall
+        self.points = 0
+        self.points_total = 0
         # ready to initialize gstreamer
         self.dirty = False
 
+    def prepare(self, frames):
+        ''' precompute the property values of the given frames as one list
+            of values per property '''
+        values = list(zip(*[frame_values(frame) for frame in frames]))
+        result = dict(zip(MIXER_PROPERTIES + CROPPER_PROPERTIES, values))
+        result['frames'] = frames
+        return result
+
     def commit(self, source, frames):
         ''' commit multiple frames to the current gstreamer scene '''
         self.log.debug("Commit %d frame(s) to source %s", len(frames), source)
-        self.frames[source] = frames
+        self.values[source] = self.prepare(frames)
         self.dirty = True
 
     def set(self, source, frame):
         ''' commit single frame to the current gstreamer scene '''
         self.log.debug("Set frame to source %s", source)
-        self.frames[source] = [frame]
+        self.values[source] = self.prepare([frame])
         self.dirty = True
 
     def push(self, at_time=0):
         ''' apply all committed frames to GStreamer pipeline '''
-        # get pad for given source
-        for source, frames in self.frames.items():
-            if not frames:
-                frames = [Frame(zorder=-1,alpha=0)]
+        start = time.perf_counter()
+        # take over precomputed values, commits from now on go into the next push
+        self.dirty = False
+        values = self.values
+        self.values = dict.fromkeys(values)
+        if not any(values.values()):
+            # already pushed by a previous call
+            return
+        self.points = 0
+        for source, source_values in values.items():
+            if not source_values:
+                source_values = self.invisible
             self.log.info("Pushing %d frame(s) to source '%s' at time %dms", len(
-                frames), source, at_time / Gst.MSECOND)
-            # reset time
-            time = at_time
-            # get GStreamer property pad for this source
-            pad = self.pads[source]
-            cpad = self.cpads[source] if self.cpads else None
-            self.log.debug("    %s", Frame.str_title())
-            # apply all frames of this source to GStreamer pipeline
-            for idx, frame in enumerate(frames):
-                self.log.debug("%2d: %s", idx, frame)
-                cropped = frame.cropped()
-                alpha = frame.float_alpha()
-                # transmit frame properties into mixing pipeline
-                pad['xpos'].set(time, cropped[L])
-                pad['ypos'].set(time, cropped[T])
-                pad['width'].set(time, cropped[R] - cropped[L])
-                pad['height'].set(time, cropped[B] - cropped[T])
-                pad['alpha'].set(time, alpha)
-                pad['zorder'].set(time, frame.zorder if alpha != 0 else -1)
-                if cpad:
-                    cpad['croptop'].set(time, frame.crop[T])
-                    cpad['cropleft'].set(time, frame.crop[L])
-                    cpad['cropbottom'].set(time, frame.crop[B])
-                    cpad['cropright'].set(time, frame.crop[R])
+                source_values['frames']), source, at_time / Gst.MSECOND)
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug("    %s", Frame.str_title())
+                for idx, frame in enumerate(source_values['frames']):
+                    self.log.debug("%2d: %s", idx, frame)
+            # only skip unchanged values if all previous frames are applied
+            # because otherwise their remaining control points would win
+            applied = self.applied[source]
+            full = self.until[source] is not None and self.until[source] >= at_time
+            # transmit frame properties into mixing pipeline
+            self.apply(self.pads[source], source_values, at_time, applied, full)
+            if self.cpads:
+                self.apply(self.cpads[source], source_values, at_time, applied, full)
+            self.until[source] = at_time + (len(source_values['frames']) - 1) * self.frame_time
+        # remember how long we blocked the calling (streaming) thread
+        duration = time.perf_counter() - start
+        self.pushes += 1
+        self.push_time += duration
+        self.push_time_max = max(self.push_time_max, duration)
+        self.points_total += self.points
+        self.log.debug("Pushed scene with %d control point(s) in %.3fms",
+                       self.points, duration * 1000)
+
+    def apply(self, pad, values, at_time, applied, full=False):
+        ''' set precomputed values of all properties of the given pad but
+            only where they differ from the previous value (unless <full>) '''
+        for prop, cs in pad.items():
+            timestamp = at_time
+            last = applied.get(prop)
+            for value in values[prop]:
+                if full or value != last:
+                    cs.set(timestamp, value)
+                    self.points += 1
+                    last = value
                 # next frame time
-                time += self.frame_time
-            self.frames[source] = None
-        self.dirty = False
+                timestamp += self.frame_time
+            applied[prop] = last
+
+
+class SceneUpdater:
+    """ SceneUpdater applies changed scenes to the gstreamer pipeline.
+        Depending on <mode> scenes get pushed
+          'handoff'  - from the handoff signal of the identity element <sig>
+                       which runs on the streaming thread for every buffer
+          'probe'    - from a buffer probe on the source pad of <sig> which
+                       is only installed while a scene is dirty
+          'mainloop' - directly from the main loop when update() is called
+                       at the current play time plus <lookahead>
+    """
+    log: logging.Logger
+
+    def __init__(self, pipeline, sig, scenes, mode='handoff', lookahead=0):
+        self.log = logging.getLogger('SceneUpdater')
+        self.pipeline = pipeline
+        self.scenes = scenes
+        self.mode = mode
+        self.lookahead = lookahead
+        # buffer probe while any scene is dirty in 'probe' mode
+        self.pad = sig.get_static_pad('src')
+        self.probe = None
+        self.lock = threading.Lock()
+        # play time of the last update() which is not pushed yet
+        self.requested = None
+        # delays between update() and push in nanoseconds
+        self.latencies = collections.deque(maxlen=1000)
+        # number of callbacks on the streaming thread
+        self.calls = 0
+        if mode == 'handoff':
+            self.log.debug('Binding Handoff-Handler for '
+                           'Synchronus mixer manipulation')
+            sig.connect('handoff', self.on_handoff)
+        else:
+            self.log.debug("Applying scene changes via %s", mode)
+
+    def play_time(self):
+        # get play time from mixing pipeline or assume zero
+        return self.pipeline.get_pipeline_clock().get_time() - \
+            self.pipeline.get_base_time()
+
+    def playing(self):
+        # get_state() returns (result, current, pending)
+        return self.pipeline.get_state(0)[1] == Gst.State.PLAYING
+
+    def dirty(self):
+        return any(scene.dirty for scene in self.scenes)
+
+    def update(self):
+        ''' apply dirty scenes (call from main loop after committing) '''
+        if not self.dirty():
+            return
+        playing = self.playing()
+        if playing:
+            self.requested = self.play_time()
+        if self.mode == 'mainloop':
+            # without a running clock push to the very beginning
+            self.push(self.requested + self.lookahead if playing else 0)
+        elif self.mode == 'probe':
+            with self.lock:
+                if self.probe is None:
+                    self.probe = self.pad.add_probe(
+                        Gst.PadProbeType.BUFFER, self.on_probe)
+
+    def push(self, at_time):
+        for scene in self.scenes:
+            if scene.dirty:
+                self.log.debug('Applying new scene at %d ms',
+                               at_time / Gst.MSECOND)
+                scene.push(at_time)
+        if self.requested is not None:
+            self.latencies.append(at_time - self.requested)
+            self.requested = None
+
+    def on_handoff(self, object, buffer):
+        self.calls += 1
+        if self.dirty():
+            self.push(self.play_time())
+
+    def on_probe(self, pad, info):
+        self.calls += 1
+        self.push(self.play_time())
+        with self.lock:
+            # keep probe if scenes were changed meanwhile
+            if self.dirty():
+                return Gst.PadProbeReturn.OK
+            self.probe = None
+            return Gst.PadProbeReturn.REMOVE
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import logging
+import os
+import stat
+
+from gi.repository import Gst, GLib
+
+from voctocore.lib.args import Args
+from voctocore.lib.avnode import AVIONode
+from voctocore.lib.config import Config
+
+
+class ShmOutput(AVIONode):
+    '''Writes the raw video and audio of a source or the mix into shared
+    memory for consumers on the same host, one shmsink socket per stream
+    and without muxing. Consumers need to know the caps, which are the
+    configured video and audio caps.'''
+    log: logging.Logger
+    source: str
+    bin: str
+    path: str
+    # client ids by kind of stream
+    clients: dict[str, set[int]]
+
+    def __init__(self, source: str, use_audio_mix: bool=False):
+        self.log = logging.getLogger('ShmOutput[{}]'.format(source))
+
+        # remember things
+        self.source = source
+        self.path = Config.getShmOutputPath()
+        self.clients = dict()
+
+        os.makedirs(self.path, exist_ok=True)
+
+        # open bin
+        self.bin_name = "ShmOutput-{}".format(self.source)
+        self.bin = "" if Args.no_bins else """
+            bin.(
+                name={bin_name}
+                """.format(bin_name=self.bin_name)
+
+        # video pipeline
+        if source in Config.getVideoSources(internal=True):
+            self.clients['video'] = set()
+            self.bin += """
+                    video-{source}.
+                    ! {vcaps}
+                    {sink}
+                    """.format(source=self.source,
+                               vcaps=Config.getVideoCaps(),
+                               sink=self.sink('video'))
+
+        # audio pipeline
+        if use_audio_mix or source in Config.getAudioSources(internal=True):
+            self.clients['audio'] = set()
+            self.bin += """
+                    {use_audio}audio-{audio_source}.
+                    {sink}
+                    """.format(use_audio="" if use_audio_mix else "source-",
+                               audio_source="mix" if use_audio_mix else self.source,
+                               sink=self.sink('audio'))
+
+        # close bin
+        self.bin += "" if Args.no_bins else "\n)\n"
+
+    def socket_path(self, kind: str) -> str:
+        return os.path.join(self.path, '{}-{}'.format(self.source, kind))
+
+    def sink(self, kind: str) -> str:
+        socket_path = self.socket_path(kind)
+        # shmsink would pick another path next to a socket left behind
+        try:
+            if stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                os.remove(socket_path)
+        except FileNotFoundError:
+            pass
+
+        # a full shared memory area blocks shmsink, rather drop frames
+        # than stall the tee for a consumer which does not keep up
+        return """! queue
+                        max-size-time=3000000000
+                        leaky=downstream
+                        name=queue-shm-{kind}-{source}
+                    ! shmsink
+                        socket-path={socket_path}
+                        wait-for-connection=false
+                        sync=false
+                        name=shm-{kind}-{source}""".format(kind=kind,
+                                                          source=self.source,
+                                                          socket_path=socket_path)
+
+    def port(self) -> str:
+        return self.socket_path('*')
+
+    def num_connections(self) -> int:
+        return max([len(clients) for clients in self.clients.values()], default=0)
+
+    def audio_channels(self) -> int:
+        return Config.getNumAudioStreams() if 'audio' in self.clients else 0
+
+    def video_channels(self) -> int:
+        return 1 if 'video' in self.clients else 0
+
+    def is_input(self) -> bool:
+        return False
+
+    def __str__(self) -> str:
+        return 'ShmOutput[{}]'.format(self.source)
+
+    def attach(self, pipeline: Gst.Pipeline):
+        self.pipeline = pipeline
+        for kind in self.clients:
+            shmsink = pipeline.get_by_name('shm-{}-{}'.format(kind, self.source))
+            if shmsink is None:
+                raise Exception("could not find pipeline element for {}".format(self))
+            # emitted from shmsink's own thread, count on the main loop
+            shmsink.connect('client-connected',
+                            lambda sink, client, kind=kind: GLib.idle_add(self.on_connected, kind, client))
+            shmsink.connect('client-disconnected',
+                            lambda sink, client, kind=kind: GLib.idle_add(self.on_disconnected, kind, client))
+
+    def on_connected(self, kind: str, client: int) -> bool:
+        self.clients[kind].add(client)
+        self.log.info('Client %d connected to %s, now %d consumer(s)',
+                      client, self.socket_path(kind), self.num_connections())
+        return False
+
+    def on_disconnected(self, kind: str, client: int) -> bool:
+        self.clients[kind].discard(client)
+        self.log.info('Client %d disconnected from %s, now %d consumer(s)',
+                      client, self.socket_path(kind), self.num_connections())
+        return False
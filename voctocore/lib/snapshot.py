@@ -0,0 +1,28 @@
+from typing import Any
+
+
+class Snapshot(object):
+    '''Values by key, versioned by a sequence number which increases with
+    every update that changed something. Clients which know the sequence
+    number of their last report can ask for the changed entries only.'''
+    seq: int
+    entries: dict[Any, tuple[int, Any]]
+
+    def __init__(self):
+        self.seq = 0
+        self.entries = dict()
+
+    def update(self, values: dict[Any, Any]) -> None:
+        seq = self.seq + 1
+        for key, value in values.items():
+            entry = self.entries.get(key)
+            if entry is None or entry[1] != value:
+                self.entries[key] = (seq, value)
+                self.seq = seq
+
+    def values(self) -> dict[Any, Any]:
+        return {key: value for key, (_, value) in self.entries.items()}
+
+    def since(self, seq: int) -> dict[Any, Any]:
+        '''Return all entries which changed after update number seq'''
+        return {key: value for key, (changed, value) in self.entries.items() if changed > seq}
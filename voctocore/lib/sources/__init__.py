@@ -14,6 +14,7 @@ def spawn_source(name: str, port: Optional[int], has_audio: bool=True, has_video
     from voctocore.lib.sources.decklinkavsource import DeckLinkAVSource
     from voctocore.lib.sources.imgvsource import ImgVSource
     from voctocore.lib.sources.tcpavsource import TCPAVSource
+    from voctocore.lib.sources.shmavsource import ShmAVSource
     from voctocore.lib.sources.testsource import TestSource
     from voctocore.lib.sources.filesource import FileSource
     from voctocore.lib.sources.v4l2source import V4l2AVSource
@@ -35,6 +36,8 @@ def spawn_source(name: str, port: Optional[int], has_audio: bool=True, has_video
         sources[name] = FileSource(name, has_audio, has_video)
     elif kind == 'tcp':
         sources[name] = TCPAVSource(name, port, has_audio, has_video)
+    elif kind == 'shm':
+        sources[name] = ShmAVSource(name, has_audio, has_video)
     elif kind == 'v4l2':
         sources[name] = V4l2AVSource(name)
     elif kind == 'RPICam':
@@ -71,10 +71,11 @@ class AVSource(AVIONode, metaclass=ABCMeta):
 
     def build_pipeline(self) -> None:
         # open enveloping <bin>
+        self.bin_name = "{}-{}".format(self.class_name, self.name)
         self.bin = "" if Args.no_bins else """
             bin.(
-                name={class_name}-{name}
-            """.format(class_name=self.class_name, name=self.name)
+                name={bin_name}
+            """.format(bin_name=self.bin_name)
 
         # attach the pipeline which produces the source
         self.bin += self.build_source()
@@ -239,6 +240,11 @@ class AVSource(AVIONode, metaclass=ABCMeta):
     def build_videoport(self) -> str:
         raise NotImplementedError("build_videoport() not implemented for {}".format(self.name))
 
+    def on_error(self, message: Gst.Message) -> bool:
+        ''' return True if the source recovers from the error of one of its
+            elements by itself, otherwise the pipeline stops '''
+        return False
+
     def get_nosignal_text(self) -> str:
         return "NO SIGNAL\n" + self.name.upper()
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import logging
+import os
+
+from gi.repository import Gst, GLib
+
+from voctocore.lib.config import Config
+from voctocore.lib.sources.avsource import AVSource
+
+
+class ShmAVSource(AVSource):
+    timer_resolution = 0.5
+    # seconds between two attempts to connect to the producer
+    reconnect_interval = 1
+
+    def __init__(self, name, has_audio=True, has_video=True,
+                 force_num_streams=None):
+        super().__init__('ShmAVSource', name, has_audio, has_video,
+                         force_num_streams, show_no_signal=True)
+
+        self.sockets = {
+            'video': Config.getShmSourceSocket(name, 'video'),
+            'audio': Config.getShmSourceSocket(name, 'audio'),
+        }
+        self.shmsrcs = {}
+        self.build_pipeline()
+        self.connected = False
+
+    def port(self):
+        return ", ".join(self.sockets[kind] for kind in self.shmsrcs)
+
+    def num_connections(self):
+        if self.connected:
+            return 1
+        else:
+            return 0
+
+    def attach(self, pipeline):
+        super().attach(pipeline)
+
+        for kind in ['video', 'audio']:
+            shmsrc = pipeline.get_by_name(
+                'shmsrc-{kind}-{name}'.format(kind=kind, name=self.name))
+            if shmsrc is not None:
+                # shmsrc fails to start without a producer, so start it
+                # once there is one and not along with the pipeline
+                shmsrc.set_locked_state(True)
+                self.shmsrcs[kind] = shmsrc
+
+        GLib.timeout_add_seconds(self.reconnect_interval, self.on_timer)
+
+    def __str__(self):
+        return 'ShmAVSource[{name}] reading from {sockets}'.format(
+            name=self.name,
+            sockets=self.port()
+        )
+
+    def build_shmsrc(self, kind, caps):
+        return """
+    shmsrc
+        name=shmsrc-{kind}-{name}
+        socket-path={socket}
+        is-live=true
+        do-timestamp=true
+    ! {caps}""".format(
+            kind=kind,
+            name=self.name,
+            socket=self.sockets[kind],
+            caps=caps
+        )
+
+    def build_audioport(self):
+        # shared memory carries no caps, the producer has to match them
+        return self.build_shmsrc('audio', Config.getAudioCaps(self.section()))
+
+    def build_videoport(self):
+        pipe = self.build_shmsrc('video', Config.getVideoCaps(self.section()))
+        deinterlacer = self.build_deinterlacer()
+        if deinterlacer:
+            pipe += """
+    ! {deinterlacer}""".format(deinterlacer=deinterlacer)
+        return pipe
+
+    def on_timer(self):
+        if not self.connected:
+            self.connect()
+        return True
+
+    def connect(self):
+        # the producer's shmsink creates the sockets
+        if not all(os.path.exists(self.sockets[kind]) for kind in self.shmsrcs):
+            return
+
+        for kind, shmsrc in self.shmsrcs.items():
+            if not shmsrc.sync_state_with_parent():
+                self.log.debug('could not connect to %s', self.sockets[kind])
+                self.disconnect()
+                return
+
+        self.log.info('connected to producer')
+        self.connected = True
+
+    def disconnect(self):
+        for shmsrc in self.shmsrcs.values():
+            shmsrc.set_state(Gst.State.NULL)
+        self.connected = False
+
+    def on_error(self, message):
+        if message.src not in self.shmsrcs.values():
+            return False
+
+        # the producer went away or is not ready yet, retry on the timer
+        (error, debug) = message.parse_error()
+        if self.connected:
+            self.log.warning('lost producer: %s', error.message)
+        self.disconnect()
+        return True
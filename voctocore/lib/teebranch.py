@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+import logging
+import threading
+
+from gi.repository import Gst, GLib
+
+from typing import Optional
+
+
+class TeeBranch(object):
+    '''A branch of the pipeline which is only linked to a request pad of a
+    tee while needed. Unlinking waits for the tee's pad to become idle, so
+    no buffer is cut off halfway through the branch. If the tee sits in
+    other bins than the branch, its pad is ghosted out of them.'''
+    log: logging.Logger
+    tee: Gst.Element
+    sinkpad: Gst.Pad
+    pad: Optional[Gst.Pad]
+    # ghost pads of the tee's pad by the bin they were added to
+    ghostpads: list[tuple[Gst.Bin, Gst.GhostPad]]
+    unlinking: bool
+    lock: threading.RLock
+
+    def __init__(self, tee: Gst.Element, sinkpad: Gst.Pad):
+        self.log = logging.getLogger('TeeBranch[{}]'.format(tee.get_name()))
+        self.tee = tee
+        self.sinkpad = sinkpad
+        self.pad = None
+        self.ghostpads = []
+        self.unlinking = False
+        # the idle probe runs on the streaming thread or right away
+        self.lock = threading.RLock()
+        # don't fail while no branch at all is linked to the tee
+        tee.set_property('allow-not-linked', True)
+
+    def is_linked(self) -> bool:
+        return self.pad is not None
+
+    def link(self) -> bool:
+        with self.lock:
+            # cancel pending unlink and keep using that pad
+            self.unlinking = False
+            if self.pad is not None:
+                return True
+            pad = self.tee.request_pad_simple('src_%u')
+            if pad is None:
+                self.log.error('could not request a pad')
+                return False
+            srcpad = self.ghost(pad)
+            result = srcpad.link(self.sinkpad)
+            if result != Gst.PadLinkReturn.OK:
+                self.log.error('could not link %s: %s', pad.get_name(), result)
+                self.release(pad, self.ghostpads)
+                self.ghostpads = []
+                return False
+            self.log.debug('linked %s', pad.get_name())
+            self.pad = pad
+            return True
+
+    def ghost(self, pad: Gst.Pad) -> Gst.Pad:
+        '''Ghost the pad out of the tee's bins up to the bin which also
+        contains the element of the sink pad and return the outermost.'''
+        sinkparent = self.sinkpad.get_parent_element()
+        common = sinkparent.get_parent() if sinkparent is not None else None
+        parent = self.tee.get_parent()
+        while parent is not None and parent != common:
+            ghostpad = Gst.GhostPad.new(None, pad)
+            ghostpad.set_active(True)
+            parent.add_pad(ghostpad)
+            self.ghostpads.append((parent, ghostpad))
+            pad = ghostpad
+            parent = parent.get_parent()
+        return pad
+
+    def unlink(self) -> None:
+        with self.lock:
+            if self.pad is None or self.unlinking:
+                return
+            self.unlinking = True
+            self.pad.add_probe(Gst.PadProbeType.IDLE, self.on_idle)
+
+    def on_idle(self, pad: Gst.Pad, info: Gst.PadProbeInfo) -> Gst.PadProbeReturn:
+        with self.lock:
+            if self.unlinking and pad == self.pad:
+                peer = self.sinkpad.get_peer()
+                if peer is not None:
+                    peer.unlink(self.sinkpad)
+                self.pad = None
+                self.unlinking = False
+                # release from the main loop, not while pushing through it
+                GLib.idle_add(self.release, pad, self.ghostpads)
+                self.ghostpads = []
+        return Gst.PadProbeReturn.REMOVE
+
+    def release(self, pad: Gst.Pad, ghostpads: list[tuple[Gst.Bin, Gst.GhostPad]]) -> bool:
+        self.log.debug('unlinked %s', pad.get_name())
+        for parent, ghostpad in reversed(ghostpads):
+            ghostpad.set_active(False)
+            parent.remove_pad(ghostpad)
+        self.tee.release_request_pad(pad)
+        return False
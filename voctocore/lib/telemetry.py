@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import logging
+
+from gi.repository import GLib
+
+from voctocore.lib.config import Config
+from voctocore.lib.response import JsonDocument, NotifyResponse
+
+from typing import Any
+
+QUEUE_REPORT = 'queue_report'
+PORT_REPORT = 'port_report'
+
+
+class Telemetry(object):
+    '''Samples queue levels and port states on a timer and pushes the
+    entries which changed since the last push to the control clients
+    which subscribed to queue_report or port_report.'''
+    log: logging.Logger
+    controlserver: Any
+    queues_seq: int
+    ports_seq: int
+
+    def __init__(self, pipeline, controlserver):
+        self.log = logging.getLogger('Telemetry')
+        self.pipeline = pipeline
+        self.controlserver = controlserver
+
+        # sequence numbers of the last reports pushed to subscribers
+        self.queues_seq = 0
+        self.ports_seq = 0
+
+        controlserver.opt_in_topics.update([QUEUE_REPORT, PORT_REPORT])
+        interval = Config.getTelemetryInterval()
+        self.log.debug('sampling queues and ports every %dms', interval)
+        GLib.timeout_add(interval, self.on_timer)
+
+    def on_timer(self) -> bool:
+        if self.controlserver.has_subscribers(QUEUE_REPORT):
+            snapshot = self.pipeline.sample_queues()
+            if snapshot.seq != self.queues_seq:
+                changed = snapshot.since(self.queues_seq)
+                self.controlserver.notify(NotifyResponse(QUEUE_REPORT, 'seq=%d' % snapshot.seq,
+                                                         JsonDocument(changed)))
+                self.queues_seq = snapshot.seq
+
+        if self.controlserver.has_subscribers(PORT_REPORT):
+            snapshot = self.pipeline.sample_ports()
+            if snapshot.seq != self.ports_seq:
+                changed = snapshot.since(self.ports_seq)
+                self.controlserver.notify(NotifyResponse(PORT_REPORT, 'seq=%d' % snapshot.seq,
+                                                         JsonDocument(list(changed.values()))))
+                self.ports_seq = snapshot.seq
+
+        return True
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 import logging
+import time
 
 from configparser import NoOptionError
 from enum import Enum, unique
 import gi
 gi.require_version('GstController', '1.0')
-from gi.repository import Gst
+from gi.repository import Gst, GLib
 from vocto.composites import Composite
 from voctocore.lib.avnode import AVNode
 from voctocore.lib.config import Config
+from voctocore.lib.histogram import Histogram
 from vocto.transitions import Composites, Transitions, Frame, fade_alpha
-from voctocore.lib.scene import Scene
+from voctocore.lib.scene import Scene, SceneUpdater
 from voctocore.lib.overlay import Overlay
 from voctocore.lib.args import Args
 
@@ -28,12 +30,18 @@ class VideoMix(AVNode):
     transitions: Transitions
     scene: Optional[Any]
     bgScene: Optional[Any]
+    updater: Optional[Any]
     overlay: Optional[Any]
     bin: str
     pipeline: Gst.Pipeline
     compositeMode: Optional[str]
     sourceA: Optional[str]
     sourceB: Optional[str]
+    appliedMode: Optional[str]
+    appliedA: Optional[str]
+    appliedB: Optional[str]
+    pending: Optional[tuple[str, str, str, bool]]
+    solve_time: Histogram
 
     def __init__(self):
         self.log = logging.getLogger('VideoMix')
@@ -48,8 +56,21 @@ class VideoMix(AVNode):
 
         # load transitions from configuration
         self.transitions = Config.getTransitions(self.composites)
+        # coalesce composite requests arriving within one frame
+        self.coalesce = Config.getSceneCoalescing()
+        self.frameTime = 1.0 / self.transitions.fps
+        self.appliedTime = 0.0
+        self.pending = None
+        self.flushTimer = None
+        # statistics about coalesced composite requests
+        self.requests = 0
+        self.coalesced = 0
+        self.dropped = 0
+        # seconds spent searching transitions
+        self.solve_time = Histogram()
         self.scene = None
         self.bgScene = None
+        self.updater = None
         self.overlay = None
 
         Config.getAudioStreams()
@@ -122,21 +143,24 @@ class VideoMix(AVNode):
                     """
 
     def attach(self, pipeline: Gst.Pipeline):
-        self.log.debug('Binding Handoff-Handler for '
-                       'Synchronus mixer manipulation')
         self.pipeline = pipeline
         sig = pipeline.get_by_name('sig')
         if sig is None:
             raise Exception("Could not find element sig in pipeline")
-        sig.connect('handoff', self.on_handoff)
 
         self.log.debug('Initializing Mixer-State')
         # initialize pipeline bindings for all sources
         self.bgScene = Scene(self.bgSources, pipeline, self.transitions.fps, 0, cropping=False)
         self.scene = Scene(self.sources, pipeline, self.transitions.fps, len(self.bgSources))
+        self.updater = SceneUpdater(pipeline, sig, [self.bgScene, self.scene],
+                                    Config.getSceneUpdate(),
+                                    Config.getSceneLookahead() * Gst.MSECOND)
         self.compositeMode = None
         self.sourceA = None
         self.sourceB = None
+        self.appliedMode = None
+        self.appliedA = None
+        self.appliedB = None
         self.setCompositeEx(Composites.targets(self.composites)[0].name, self.sources[0], self.sources[1])
 
         if Config.hasOverlay():
@@ -151,52 +175,84 @@ class VideoMix(AVNode):
         return self.pipeline.get_pipeline_clock().get_time() - \
             self.pipeline.get_base_time()
 
-    def on_handoff(self, object, buffer):
-        playTime = self.getPlayTime()
-        if self.bgScene and self.bgScene.dirty:
-            # push background scene to gstreamer
-            self.log.debug('Applying new background at %d ms',
-                           playTime / Gst.MSECOND)
-            self.bgScene.push(playTime)
-        if self.scene and self.scene.dirty:
-            # push scene to gstreamer
-            self.log.debug('Applying new mix at %d ms',
-                           playTime / Gst.MSECOND)
-            self.scene.push(playTime)
+    def completeComposite(self, newCompositeName, newA, newB):
+        ''' fill up any None parameter with a reasonable value from the
+            current (requested) scene '''
+        if self.compositeMode and not (newCompositeName and newA and newB):
+            curA = self.sourceA
+            curB = self.sourceB
+            # use current state if not defined by parameter
+            if not newCompositeName:
+                newCompositeName = self.compositeMode
+            if not newA:
+                newA = curA if newB != curA else curB
+            if not newB:
+                newB = curA if newA == curB else curB
+            self.log.debug("Completing wildcarded composite to %s(%s,%s)",
+                           newCompositeName, newA, newB)
+        # post condition: we should have all parameters now
+        assert newA != newB
+        assert newCompositeName and newA and newB
+        return newCompositeName, newA, newB
 
     def setCompositeEx(self, newCompositeName=None, newA=None, newB=None, useTransitions=False, dry=False):
+        ''' switch to a new composite where None parameters are taken from
+            the current scene. Requests which follow within one frame are
+            coalesced so that only the last of them gets applied. '''
+        if dry or not self.coalesce:
+            return self.applyCompositeEx(newCompositeName, newA, newB, useTransitions, dry)
+        self.requests += 1
+        if self.flushTimer is None and time.monotonic() - self.appliedTime >= self.frameTime:
+            return self.applyCompositeEx(newCompositeName, newA, newB, useTransitions)
+        # check request now so that the requester gets a proper answer
+        newCompositeName, newA, newB = self.completeComposite(newCompositeName, newA, newB)
+        if newCompositeName not in self.composites:
+            raise KeyError(newCompositeName)
+        if self.pending:
+            self.log.debug("Dropping pending composite %s(%s,%s)", *self.pending[:3])
+            self.dropped += 1
+        self.coalesced += 1
+        self.pending = (newCompositeName, newA, newB, useTransitions)
+        # remember requested scene
+        self.compositeMode = newCompositeName
+        self.sourceA = newA
+        self.sourceB = newB
+        if self.flushTimer is None:
+            delay = self.appliedTime + self.frameTime - time.monotonic()
+            self.flushTimer = GLib.timeout_add(max(1, int(delay * 1000)), self.on_flush)
+
+    def on_flush(self):
+        ''' apply the last coalesced composite request '''
+        self.flushTimer = None
+        if self.pending:
+            newCompositeName, newA, newB, useTransitions = self.pending
+            self.pending = None
+            self.log.debug("Applying coalesced composite %s(%s,%s)",
+                           newCompositeName, newA, newB)
+            self.applyCompositeEx(newCompositeName, newA, newB, useTransitions)
+        return False
+
+    def applyCompositeEx(self, newCompositeName=None, newA=None, newB=None, useTransitions=False, dry=False):
         # expect strings or None as parameters
         assert not newCompositeName or type(newCompositeName) == str
         assert not newA or type(newA) == str
         assert not newB or type(newB) == str
 
-        # get current composite
-        if not self.compositeMode:
+        # get composite currently shown by the mixer
+        if not self.appliedMode:
             curCompositeName = None
             self.log.info("Request composite %s(%s,%s)",
                           newCompositeName, newA, newB)
         else:
-            curCompositeName = self.compositeMode
-            curA = self.sourceA
-            curB = self.sourceB
+            curCompositeName = self.appliedMode
+            curA = self.appliedA
+            curB = self.appliedB
             self.log.info("Request composite change from %s(%s,%s) to %s(%s,%s)",
                           curCompositeName, curA, curB, newCompositeName, newA, newB)
 
         # check if there is any None parameter and fill it up with
         # reasonable value from the current scene
-        if curCompositeName and not (newCompositeName and newA and newB):
-            # use current state if not defined by parameter
-            if not newCompositeName:
-                newCompositeName = curCompositeName
-            if not newA:
-                newA = curA if newB != curA else curB
-            if not newB:
-                newB = curA if newA == curB else curB
-            self.log.debug("Completing wildcarded composite to %s(%s,%s)",
-                           newCompositeName, newA, newB)
-        # post condition: we should have all parameters now
-        assert newA != newB
-        assert newCompositeName and newA and newB
+        newCompositeName, newA, newB = self.completeComposite(newCompositeName, newA, newB)
 
         # fetch composites
         curComposite = self.composites[curCompositeName] if curCompositeName else None
@@ -256,12 +312,15 @@ class VideoMix(AVNode):
                         self.log.info("Changing requested transition from (%s,%s) -> (%s,%s) to (%s,%s) -> (%s,%s)", *old, curA,curB,newA,newB)
 
                     swap = False
+                    start = time.perf_counter()
                     if (curA, curB) == (newA, newB) and curComposite != newComposite:
                         transition, swap = self.transitions.solve(
                             curComposite, newComposite, False)
+                        self.solve_time.observe(time.perf_counter() - start)
                     elif (curA, curB) == (newB, newA):
                         transition, swap = self.transitions.solve(
                             curComposite, newComposite, True)
+                        self.solve_time.observe(time.perf_counter() - start)
                         if not swap:
                             targetA, targetB = newB, newA
                     if transition and not dry:
@@ -316,6 +375,8 @@ class VideoMix(AVNode):
                     if source not in [curBgSource,newBgSource]:
                         self.log.debug("making background source %s invisible", source)
                         self.bgScene.set(source, Frame(True, alpha=0, zorder=-1))
+            # hand changed scenes over to the pipeline
+            self.updater.update()
         else:
             # report unknown elements of the target scene
             if not newComposite:
@@ -326,9 +387,10 @@ class VideoMix(AVNode):
                 self.log.error("Unknown source '%s'", newB)
 
         # remember scene we've set
-        self.compositeMode = newComposite.name
-        self.sourceA = newA
-        self.sourceB = newB
+        self.compositeMode = self.appliedMode = newComposite.name
+        self.sourceA = self.appliedA = newA
+        self.sourceB = self.appliedB = newB
+        self.appliedTime = time.monotonic()
 
     def setComposite(self, command, useTransitions=False):
         ''' parse switch to the composite described by string command '''
@@ -3,5 +3,6 @@ from voctocore.tests.mocks import *
 Gst = gst_mock
 GstNet = gstnet_mock
 GstController = gstcontroller_mock
+GstBase = gstbase_mock
 GObject = gobject_mock
 GLib = glib_mock
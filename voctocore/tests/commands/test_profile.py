@@ -0,0 +1,40 @@
+import os
+import pstats
+import tempfile
+
+from voctocore.lib.config import Config
+from voctocore.lib.response import OkResponse
+from voctocore.tests.commands.commands_test_base import CommandsTestBase
+
+
+class ProfileTest(CommandsTestBase):
+    def test_profile_writes_statistics(self):
+        with tempfile.TemporaryDirectory() as directory:
+            Config.given('control', 'profiledir', directory)
+
+            self.assertEqual(self.commands.profile('start').args, ('profile', 'started'))
+            self.commands.fetch_value('foo')
+            response = self.commands.profile('stop')
+
+            self.assertIsInstance(response, OkResponse)
+            name, state, path = response.args
+            self.assertEqual((name, state), ('profile', 'stopped'))
+            self.assertEqual(os.path.dirname(path), directory)
+            functions = [function for _, _, function in pstats.Stats(path).stats]
+            self.assertIn('fetch_value', functions)
+
+    def test_profile_stop_without_start_fails(self):
+        with self.assertRaises(ValueError):
+            self.commands.profile('stop')
+
+    def test_profile_start_twice_fails(self):
+        self.commands.profile('start')
+        try:
+            with self.assertRaises(ValueError):
+                self.commands.profile('start')
+        finally:
+            self.commands.profiler.disable()
+
+    def test_profile_unknown_action_fails(self):
+        with self.assertRaises(ValueError):
+            self.commands.profile('pause')
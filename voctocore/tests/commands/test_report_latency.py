@@ -0,0 +1,18 @@
+from voctocore.lib.response import OkResponse
+from voctocore.tests.commands.commands_test_base import CommandsTestBase
+
+
+class ReportLatencyTest(CommandsTestBase):
+    def test_report_latency(self):
+        self.pipeline_mock.latency.report.return_value = {'mix/output': {'samples': 0}}
+
+        response = self.commands.report_latency()
+
+        self.assertIsInstance(response, OkResponse)
+        self.assertEqual(str(response), 'latency_report {"mix/output": {"samples": 0}}')
+
+    def test_report_latency_without_tracing_fails(self):
+        self.pipeline_mock.latency = None
+
+        with self.assertRaises(ValueError):
+            self.commands.report_latency()
@@ -0,0 +1,49 @@
+import json
+
+from mock import MagicMock
+
+from voctocore.lib.pipeline import Pipeline
+from voctocore.lib.snapshot import Snapshot
+from voctocore.tests.commands.commands_test_base import CommandsTestBase
+from vocto.port import Port
+
+
+class ReportPortsTest(CommandsTestBase):
+    def setUp(self):
+        super().setUp()
+        # two background test sources report the same port string
+        self.sources = [self.source(), self.source()]
+        pipeline = Pipeline.__new__(Pipeline)
+        pipeline.ports = [Port('background-{}'.format(n), source)
+                          for n, source in enumerate(self.sources)]
+        pipeline.port_snapshot = Snapshot()
+        self.pipeline_mock.sample_ports.side_effect = pipeline.sample_ports
+
+    def source(self):
+        source = MagicMock()
+        source.port.return_value = '(V:black)'
+        source.audio_channels.return_value = 0
+        source.video_channels.return_value = 1
+        source.is_input.return_value = True
+        source.num_connections.return_value = 0
+        source.dropped = source.late = source.lag = 0
+        return source
+
+    def report(self, *args):
+        response = self.commands.report_ports(*args)
+        return json.loads(str(response.args[-1]))
+
+    def test_report_ports_keeps_ports_with_equal_port_strings(self):
+        report = self.report()
+
+        self.assertEqual([(p['index'], p['name'], p['port']) for p in report],
+                         [(0, 'background-0', '(V:black)'),
+                          (1, 'background-1', '(V:black)')])
+
+    def test_report_ports_since_tells_equal_port_strings_apart(self):
+        self.report('since=0')
+        self.sources[1].num_connections.return_value = 1
+
+        report = self.report('since=1')
+
+        self.assertEqual([(p['index'], p['connections']) for p in report], [(1, 1)])
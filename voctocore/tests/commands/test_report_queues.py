@@ -0,0 +1,35 @@
+from voctocore.lib.response import OkResponse
+from voctocore.lib.snapshot import Snapshot
+from voctocore.tests.commands.commands_test_base import CommandsTestBase
+
+
+class ReportQueuesTest(CommandsTestBase):
+    def setUp(self):
+        super().setUp()
+        self.levels = {'cam1': 10, 'cam2': 20}
+        self.snapshot = Snapshot()
+
+        def sample_queues():
+            self.snapshot.update(self.levels)
+            return self.snapshot
+        self.pipeline_mock.sample_queues.side_effect = sample_queues
+
+    def test_report_queues(self):
+        response = self.commands.report_queues()
+
+        self.assertIsInstance(response, OkResponse)
+        self.assertEqual(str(response), 'queue_report {"cam1": 10, "cam2": 20}')
+
+    def test_report_queues_since(self):
+        self.assertEqual(str(self.commands.report_queues('since=0')),
+                         'queue_report seq=1 {"cam1": 10, "cam2": 20}')
+
+        self.levels['cam1'] = 15
+        self.assertEqual(str(self.commands.report_queues('since=1')),
+                         'queue_report seq=2 {"cam1": 15}')
+        self.assertEqual(str(self.commands.report_queues('since=2')),
+                         'queue_report seq=2 {}')
+
+    def test_report_queues_with_invalid_since_fails(self):
+        with self.assertRaises(ValueError):
+            self.commands.report_queues('1')
@@ -67,8 +67,10 @@ class ConfigMock(VoctocoreConfigParser):
 
     def getboolean(self, section: str, option: str, *, raw=False, vars=None,
                    fallback=None, **kwargs) -> bool:
-        return self._convert_to_boolean(
-            self._mock_get(section, option, fallback))
+        value = self._mock_get(section, option, fallback)
+        if isinstance(value, bool):
+            return value
+        return self._convert_to_boolean(value)
 
     def reset(self) -> 'ConfigMock':
         self._sections = {}
@@ -120,7 +122,8 @@ class ConfigMock(VoctocoreConfigParser):
             .given("composites", "lec.b", "0.60/0.42 0.56") \
             .given("composites", "lec.crop-b", "0.31/0") \
             .given("composites", "lec.mirror", "true") \
-            .given("transitions", "def", "750, * / *")
+            .given("transitions", "def", "750, * / *") \
+            .given("transitioncache", "enabled", "false")
 
     @classmethod
     def WithBasicConfig(cls):
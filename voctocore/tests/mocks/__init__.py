@@ -89,6 +89,7 @@ gst_mock = MagicMock()
 gst_mock.version.return_value = (1, 24)
 gst_mock.Caps = MockGstCaps
 gstcontroller_mock = MagicMock()
+gstbase_mock = MagicMock()
 gstnet_mock = MagicMock()
 gobject_mock = MagicMock()
 glib_mock = MagicMock()
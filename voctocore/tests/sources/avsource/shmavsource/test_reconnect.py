@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+import mock
+from mock import MagicMock
+
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+from voctocore.tests.mocks import args_mock
+
+
+class ShmAVSourceTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.config import Config
+        from voctocore.lib.sources.shmavsource import ShmAVSource
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.video = os.path.join(self.dir.name, 'cam1-video')
+        self.audio = os.path.join(self.dir.name, 'cam1-audio')
+        Config.given('source.cam1', 'kind', 'shm')
+        Config.given('source.cam1', 'videosocket', self.video)
+        Config.given('source.cam1', 'audiosocket', self.audio)
+
+        with mock.patch('voctocore.lib.sources.avsource.Args', args_mock), \
+                mock.patch('voctocore.lib.sources.avsource.Config', Config), \
+                mock.patch('voctocore.lib.sources.shmavsource.Config', Config):
+            self.source = ShmAVSource('cam1')
+
+        self.pipeline = MagicMock()
+        self.shmsrcs = {'shmsrc-video-cam1': MagicMock(), 'shmsrc-audio-cam1': MagicMock()}
+        self.pipeline.get_by_name.side_effect = self.shmsrcs.get
+        with mock.patch('voctocore.lib.sources.shmavsource.GLib'):
+            self.source.attach(self.pipeline)
+
+    def test_bin_reads_both_streams_with_configured_caps(self):
+        self.assertContainsIgnoringWhitespace(
+            self.source.bin,
+            r"shmsrc name=shmsrc-video-cam1 socket-path={} is-live=true do-timestamp=true ! video/x-raw".format(self.video))
+        self.assertContainsIgnoringWhitespace(
+            self.source.bin, r"name=shmsrc-audio-cam1 [^!]* ! audio/x-raw")
+
+    def test_shmsrcs_start_once_the_producer_is_there(self):
+        for shmsrc in self.shmsrcs.values():
+            shmsrc.set_locked_state.assert_called_once_with(True)
+
+        self.assertTrue(self.source.on_timer())
+        self.assertEqual(self.source.num_connections(), 0)
+
+        for path in [self.video, self.audio]:
+            open(path, 'w').close()
+        self.source.on_timer()
+
+        for shmsrc in self.shmsrcs.values():
+            shmsrc.sync_state_with_parent.assert_called_once_with()
+        self.assertEqual(self.source.num_connections(), 1)
+
+    def test_errors_of_the_shmsrcs_disconnect(self):
+        self.source.connected = True
+        message = MagicMock()
+        message.src = self.shmsrcs['shmsrc-audio-cam1']
+        message.parse_error.return_value = (MagicMock(), None)
+
+        self.assertTrue(self.source.on_error(message))
+        self.assertEqual(self.source.num_connections(), 0)
+
+        message.src = MagicMock()
+        self.assertFalse(self.source.on_error(message))
@@ -0,0 +1,62 @@
+import asyncio
+
+from mock import MagicMock
+
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class AsyncControlServerTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.asynccontrolserver import AsyncControlServer
+        self.AsyncControlServer = AsyncControlServer
+
+    def run_with_server(self, scenario):
+        async def main():
+            server = self.AsyncControlServer(MagicMock(), port=0)
+            await server.task
+            try:
+                await asyncio.wait_for(scenario(server, server.boundSocket.getsockname()[1]), 5)
+            finally:
+                server.server.close()
+
+        asyncio.run(main())
+
+    def test_replies_and_notifications_are_wire_compatible(self):
+        async def scenario(server, port):
+            reader, writer = await asyncio.open_connection('localhost', port)
+            other_reader, other_writer = await asyncio.open_connection('localhost', port)
+            while server.num_connections() < 2:
+                await asyncio.sleep(0.01)
+
+            writer.write(b"fetch_value foo\nid=3 store_value foo bar\n")
+            self.assertEqual(await reader.readline(), b"value foo \n")
+            self.assertEqual(await reader.readline(), b"id=3 value foo bar\n")
+            self.assertEqual(await other_reader.readline(), b"value foo bar\n")
+
+            writer.write(b"quit\n")
+            self.assertEqual(await reader.read(), b"")
+            writer.close()
+            other_writer.close()
+
+        self.run_with_server(scenario)
+
+    def test_client_exceeding_write_limit_gets_evicted(self):
+        server = self.AsyncControlServer.__new__(self.AsyncControlServer)
+        server.log = MagicMock()
+        server.write_limit = 100
+        server.evicted = 0
+        server.pending = dict()
+        server._init_dispatcher(MagicMock())
+        server.loop = MagicMock()
+        server._log_num_connections = MagicMock()
+        slow = MagicMock()
+        slow.transport.get_write_buffer_size.return_value = 101
+        server.currentConnections = {slow: ('::1', 1234)}
+
+        server._schedule_write(slow, "value foo bar\n")
+
+        slow.transport.abort.assert_called_once_with()
+        self.assertEqual(server.currentConnections, {})
+        self.assertEqual(server.pending, {})
+        self.assertEqual(server.evicted, 1)
@@ -0,0 +1,238 @@
+import json
+import time
+from queue import Queue
+
+import mock
+from mock import MagicMock
+
+from voctocore.lib.response import NotifyResponse
+from voctocore.lib.snapshot import Snapshot
+from voctocore.lib.tcpmulticonnection import TCPMultiConnection
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+def init_connection(self, port):
+    self.currentConnections = dict()
+
+
+class ControlServerTest(VoctomixTest):
+    @mock.patch.object(TCPMultiConnection, '__init__', init_connection)
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.controlserver import ControlServer
+        self.server = ControlServer(MagicMock())
+        self.requestor = MagicMock()
+        self.other = MagicMock()
+        self.server.currentConnections[self.requestor] = Queue()
+        self.server.currentConnections[self.other] = Queue()
+
+    def send(self, line):
+        self.server.command_queue.append((line, self.requestor, time.perf_counter()))
+        self.server.on_loop()
+
+    def received(self, conn):
+        data = self.server.write_buffers.pop(conn, b'')
+        return data.decode().splitlines(keepends=True)
+
+    def test_reply_without_id_is_unchanged(self):
+        self.send("fetch_value foo")
+
+        self.assertEqual(self.received(self.requestor), ["value foo \n"])
+        self.assertEqual(self.received(self.other), [])
+
+    def test_reply_echoes_request_id(self):
+        self.send("id=7 fetch_value foo")
+
+        self.assertEqual(self.received(self.requestor), ["id=7 value foo \n"])
+
+    def test_notification_carries_id_for_requestor_only(self):
+        self.send("id=abc store_value foo bar")
+
+        self.assertEqual(self.received(self.requestor), ["id=abc value foo bar\n"])
+        self.assertEqual(self.received(self.other), ["value foo bar\n"])
+
+    def test_error_echoes_request_id(self):
+        self.send("id=1 no_such_command")
+
+        self.assertEqual(self.received(self.requestor), ["id=1 error unknown command no_such_command\n"])
+
+    def test_batch_executes_all_commands(self):
+        self.send("id=9 batch store_value foo bar ; fetch_value foo ; no_such_command")
+
+        self.assertEqual(self.received(self.requestor), [
+            "id=9 value foo bar\n",
+            "id=9 value foo bar\n",
+            "id=9 error unknown command no_such_command\n",
+            "id=9 batch 3\n",
+        ])
+        self.assertEqual(self.received(self.other), ["value foo bar\n"])
+
+    @mock.patch("voctocore.lib.controlserver.GObject")
+    def test_on_loop_drains_queue_within_budget(self, gobject):
+        for i in range(3):
+            self.server.command_queue.append(("store_value foo %d" % i, self.requestor, time.perf_counter()))
+        self.server.on_loop_active = True
+
+        self.assertFalse(self.server.on_loop())
+
+        self.assertEqual(len(self.received(self.other)), 3)
+        self.assertFalse(self.server.on_loop_active)
+        # one writable watch per connection regardless of the number of messages
+        self.assertEqual(gobject.io_add_watch.call_count, 2)
+
+    def test_on_loop_yields_when_budget_is_used_up(self):
+        self.server.loop_budget = 0
+        for i in range(2):
+            self.server.command_queue.append(("fetch_value foo", self.requestor, time.perf_counter()))
+
+        self.assertTrue(self.server.on_loop())
+        self.assertEqual(len(self.server.command_queue), 1)
+
+    def test_command_latency_is_recorded_per_stage(self):
+        self.send("store_value foo bar")
+        self.send("batch fetch_value foo ; fetch_value foo")
+        self.send("no_such_command")
+
+        counts = {key: sum(histogram.counts) for key, histogram in self.server.command_latency.items()}
+        self.assertEqual(counts, {
+            ('store_value', 'queue'): 1,
+            ('store_value', 'exec'): 1,
+            ('store_value', 'write'): 1,
+            ('fetch_value', 'queue'): 2,
+            ('fetch_value', 'exec'): 2,
+            ('fetch_value', 'write'): 2,
+        })
+
+    def test_on_write_keeps_watch_until_buffer_is_sent(self):
+        self.send("store_value foo bar")
+        sent = []
+        self.other.send.side_effect = lambda data: sent.append(bytes(data)) or 6
+
+        self.assertTrue(self.server.on_write(self.other))
+        self.assertTrue(self.server.on_write(self.other))
+        self.assertFalse(self.server.on_write(self.other))
+
+        self.assertEqual(sent, [b"value foo bar\n", b"foo bar\n", b"r\n"])
+        self.assertNotIn(self.other, self.server.write_buffers)
+        self.assertNotIn(self.other, self.server.write_watches)
+
+    def test_client_exceeding_write_limit_gets_disconnected(self):
+        self.server.write_limit = 20
+
+        self.send("store_value foo bar")
+        self.assertEqual(self.received(self.requestor), ["value foo bar\n"])
+        self.send("store_value foo baz")
+
+        self.other.close.assert_called_once_with()
+        self.assertNotIn(self.other, self.server.currentConnections)
+        self.assertNotIn(self.other, self.server.write_buffers)
+        self.assertEqual(self.received(self.requestor), ["value foo baz\n"])
+
+    @mock.patch("voctocore.lib.controlserver.GLib")
+    @mock.patch("voctocore.lib.controlserver.GObject")
+    def test_disconnecting_a_client_removes_its_watches(self, gobject, glib):
+        gobject.io_add_watch.side_effect = [11, 12, 13]
+        self.server.on_accepted(self.other, ('127.0.0.1', 4711))
+        self.server.write_limit = 20
+
+        self.send("store_value foo bar")
+        self.received(self.requestor)
+        self.send("store_value foo baz")
+
+        self.other.close.assert_called_once_with()
+        self.assertEqual(sorted(c.args[0] for c in glib.source_remove.call_args_list), [11, 13])
+        self.assertNotIn(self.other, self.server.read_watches)
+        self.assertNotIn(self.other, self.server.write_watches)
+
+    @mock.patch("voctocore.lib.controlserver.GLib")
+    @mock.patch("voctocore.lib.controlserver.GObject")
+    def test_failing_receive_closes_the_connection(self, gobject, glib):
+        gobject.io_add_watch.return_value = 11
+        self.server.on_accepted(self.other, ('127.0.0.1', 4711))
+        self.other.recv.side_effect = ConnectionResetError()
+
+        self.assertFalse(self.server.on_data(self.other, None, ['']))
+
+        self.other.close.assert_called_once_with()
+        glib.source_remove.assert_called_once_with(11)
+        self.assertNotIn(self.other, self.server.read_watches)
+
+    def test_json_protocol_replies_with_objects(self):
+        self.send("id=2 protocol json")
+        self.send("fetch_value foo")
+        self.send("no_such_command")
+
+        self.assertEqual([json.loads(line) for line in self.received(self.requestor)], [
+            {"type": "reply", "name": "protocol", "args": ["json"], "id": "2"},
+            {"type": "reply", "name": "value", "args": ["foo", ""]},
+            {"type": "error", "name": "error", "args": ["unknown command no_such_command"]},
+        ])
+
+    def test_json_protocol_keeps_documents_structured(self):
+        self.server.commands.pipeline.sample_queues.return_value = Snapshot()
+        self.send("protocol json")
+        self.received(self.requestor)
+
+        self.send("report_queues")
+
+        self.assertEqual(json.loads(self.received(self.requestor)[0])["args"], [{}])
+
+    def test_notification_is_serialized_once_per_protocol(self):
+        third = MagicMock()
+        self.server.currentConnections[third] = Queue()
+        self.server.json_clients.update([self.other, third])
+
+        with mock.patch.object(self.server, '_serialize', wraps=self.server._serialize) as serialize:
+            self.send("store_value foo bar")
+
+        self.assertEqual(serialize.call_count, 2)
+        self.assertEqual(self.received(self.requestor), ["value foo bar\n"])
+        self.assertEqual(json.loads(self.received(third)[0]),
+                         {"type": "notify", "name": "value", "args": ["foo", "bar"]})
+
+    def test_unknown_protocol_is_rejected(self):
+        self.send("protocol xml")
+
+        self.assertEqual(self.received(self.requestor), ["error unknown protocol xml\n"])
+
+    def test_subscribed_client_only_receives_its_topics(self):
+        self.server.subscriptions[self.other] = {"composite", "audio_*"}
+
+        self.send("store_value foo bar")
+        self.send("message hello")
+
+        self.assertEqual(self.received(self.other), [])
+        self.assertEqual(len(self.received(self.requestor)), 2)
+        self.assertEqual(self.server.topics_sent, {"value": 1, "message": 1})
+        self.assertEqual(self.server.topics_filtered, {"value": 1, "message": 1})
+
+    def test_subscription_wildcards(self):
+        self.server.subscriptions[self.other] = {"val*"}
+
+        self.send("store_value foo bar")
+
+        self.assertEqual(self.received(self.other), ["value foo bar\n"])
+
+    def test_subscribe_and_unsubscribe(self):
+        self.send("subscribe composite value")
+        self.send("unsubscribe value")
+        self.send("unsubscribe")
+
+        self.assertEqual(self.received(self.requestor), [
+            "subscriptions composite value\n",
+            "subscriptions composite\n",
+            "subscriptions *\n",
+        ])
+        self.assertNotIn(self.requestor, self.server.subscriptions)
+
+    def test_opt_in_topics_need_subscription_by_name(self):
+        self.server.opt_in_topics.add("queue_report")
+        self.server.subscriptions[self.other] = {"*"}
+
+        self.assertFalse(self.server.has_subscribers("queue_report"))
+
+        self.server.subscriptions[self.other].add("queue_report")
+        self.server.notify(NotifyResponse("queue_report", "{}"))
+
+        self.assertEqual(self.received(self.other), ["queue_report {}\n"])
+        self.assertEqual(self.received(self.requestor), [])
@@ -0,0 +1,76 @@
+import threading
+
+import mock
+from mock import MagicMock
+
+from voctocore.lib.elementstats import ElementProbe, ElementStats, thread_time
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class BaseSrc(object):
+    pass
+
+
+class Aggregator(object):
+    pass
+
+
+def element(name, cls=object, factory='identity'):
+    class Element(cls):
+        get_name = MagicMock(return_value=name)
+        get_static_pad = MagicMock()
+        get_factory = MagicMock()
+    Element.get_factory.return_value.get_name.return_value = factory
+    return Element()
+
+
+class ElementStatsTest(VoctomixTest):
+    def test_thread_time_of_running_and_missing_threads(self):
+        self.assertGreaterEqual(thread_time(threading.get_native_id()), 0.0)
+        self.assertIsNone(thread_time(2**31 - 1))
+
+    @mock.patch('voctocore.lib.elementstats.thread_time')
+    def test_probe_sample_computes_rates(self, thread_time):
+        probe = ElementProbe()
+        probe.thread = 42
+        thread_time.return_value = 10.0
+        probe.sample(1.0)
+
+        probe.buffers = 50
+        thread_time.return_value = 11.0
+        probe.sample(2.0)
+
+        self.assertEqual(probe.buffer_rate, 25.0)
+        self.assertEqual(probe.cpu_usage, 0.5)
+        self.assertEqual(probe.cpu_seconds, 1.0)
+
+    @mock.patch('voctocore.lib.elementstats.thread_time')
+    def test_probe_counts_new_thread_from_first_sample(self, thread_time):
+        probe = ElementProbe()
+        probe.thread = 42
+        thread_time.return_value = 10.0
+        probe.sample(1.0)
+
+        probe.thread = 43
+        thread_time.return_value = 3.0
+        probe.sample(1.0)
+
+        self.assertEqual(probe.cpu_seconds, 0.0)
+
+    @mock.patch('voctocore.lib.elementstats.GLib')
+    @mock.patch('voctocore.lib.elementstats.GstBase')
+    def test_probes_elements_which_run_threads(self, gstbase, glib):
+        gstbase.BaseSrc = BaseSrc
+        gstbase.Aggregator = Aggregator
+        pipeline = MagicMock()
+        pipeline.fetch_elements_by_name.return_value = [
+            element('src', BaseSrc),
+            element('videomixer', Aggregator),
+            element('queue-mix', factory='queue'),
+            element('cropper-cam1', factory='videobox'),
+        ]
+
+        stats = ElementStats(pipeline, 1000)
+
+        self.assertEqual(sorted(stats.probes), ['queue-mix', 'src', 'videomixer'])
+        glib.timeout_add.assert_called_once_with(1000, stats.on_timer)
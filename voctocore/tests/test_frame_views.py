@@ -0,0 +1,35 @@
+import unittest
+
+from vocto.composites import Composite
+from vocto.frame import Frame
+
+
+class FrameViewsTest(unittest.TestCase):
+    def setUp(self):
+        self.composite = Composite(0, "pip",
+                                   Frame(True, 255, None, [0, 0, 1920, 1080]),
+                                   Frame(True, 200, None, [1400, 800, 1900, 1060], [10, 0, 10, 0]))
+
+    def test_duplicate_is_independent(self):
+        frame = self.composite.A()
+        copy = frame.duplicate()
+        copy.rect[0] = 100
+
+        self.assertEqual(frame.rect, [0, 0, 1920, 1080])
+        self.assertEqual(copy.alpha, frame.alpha)
+
+    def test_zorder_views_keep_original_unchanged(self):
+        a, b = self.composite.Az(2), self.composite.Bz(1)
+
+        self.assertEqual((a.zorder, b.zorder), (2, 1))
+        self.assertIsNone(self.composite.A().zorder)
+        self.assertEqual(a, self.composite.A())
+        self.assertEqual(b, self.composite.B())
+
+    def test_swapped_exchanges_frames(self):
+        swapped = self.composite.swapped()
+
+        self.assertEqual(swapped.name, "^pip")
+        self.assertIs(swapped.A(), self.composite.B())
+        self.assertIs(swapped.B(), self.composite.A())
+        self.assertEqual(self.composite.name, "pip")
@@ -0,0 +1,71 @@
+import mock
+from mock import MagicMock
+
+from voctocore.lib.avnode import AVIONode
+from voctocore.lib.framestats import FrameStats
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+CLOCK_TIME_NONE = 2**64 - 1
+
+
+def element(name, factory='queue'):
+    element = MagicMock()
+    element.get_name.return_value = name
+    element.get_factory.return_value.get_name.return_value = factory
+    return element
+
+
+class FrameStatsTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        self.node = MagicMock(spec=AVIONode)
+        self.node.bin_name = 'AVRawOutput-mix'
+        self.node.dropped = self.node.late = self.node.lag = 0
+        self.fdsink = element('fd-mix', 'multifdsink')
+        elements = [element('queue-fd-mix'), self.fdsink]
+
+        pipeline = MagicMock()
+        pipeline.bins = [self.node, MagicMock()]
+        iterator = pipeline.pipeline.get_by_name.return_value.iterate_recurse.return_value
+        iterator.foreach.side_effect = lambda callback: [callback(e) for e in elements]
+        self.stats = FrameStats(pipeline)
+
+    def qos(self, src, dropped):
+        message = MagicMock()
+        message.src.get_name.return_value = src
+        message.parse_qos_stats.return_value = (None, 100, dropped)
+        self.stats.on_qos(None, message)
+
+    def test_qos_messages_count_for_element_and_node(self):
+        self.qos('queue-fd-mix', 2)
+        self.qos('queue-fd-mix', 5)
+        self.qos('queue-fd-mix', CLOCK_TIME_NONE)
+        self.qos('videomixer', 1)
+
+        self.assertEqual(self.stats.dropped, {'queue-fd-mix': 5, 'videomixer': 1})
+        self.assertEqual(self.stats.late, {'queue-fd-mix': 3, 'videomixer': 1})
+        self.assertEqual((self.node.dropped, self.node.late), (5, 3))
+
+    @mock.patch('voctocore.lib.framestats.GLib')
+    def test_overruns_are_counted_on_the_main_loop(self, glib):
+        self.stats.on_overrun(element('queue-fd-mix'))
+
+        glib.idle_add.assert_called_once_with(self.stats.count_overrun, 'queue-fd-mix')
+        self.assertFalse(self.stats.count_overrun('queue-fd-mix'))
+        self.assertEqual(self.stats.overruns, {'queue-fd-mix': 1})
+        self.assertEqual(self.node.lag, 1)
+
+    @mock.patch('voctocore.lib.framestats.Gst')
+    def test_client_stats(self, gst):
+        gst.CLOCK_TIME_NONE = CLOCK_TIME_NONE
+        gst.SECOND = 1000000000
+        conn = MagicMock()
+        conn.getpeername.return_value = ('::1', 4711)
+        self.node.currentConnections = {conn: None}
+        self.fdsink.get_property.return_value.get_buffer.return_value.pts = 3000000000
+        values = {'bytes-sent': 1000, 'buffers-dropped': 2, 'last-buffer-ts': 2500000000}
+        self.fdsink.emit.return_value.get_value.side_effect = values.get
+
+        self.assertEqual(self.stats.client_stats(), [
+            ('AVRawOutput-mix', '[::1]:4711', {'bytes-sent': 1000, 'buffers-dropped': 2, 'lag': 0.5}),
+        ])
@@ -0,0 +1,21 @@
+from voctocore.lib.histogram import Histogram
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class HistogramTest(VoctomixTest):
+    def test_cumulative_counts_by_upper_bound(self):
+        histogram = Histogram(buckets=(0.001, 0.01))
+        for value in [0.0005, 0.001, 0.005, 2.0]:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative(), [('0.001', 2), ('0.01', 3), ('+Inf', 4)])
+        self.assertAlmostEqual(histogram.sum, 2.0065)
+
+    def test_quantile_interpolates_within_bucket(self):
+        histogram = Histogram(buckets=(0.01, 0.02, 0.04))
+        for value in [0.005, 0.015, 0.015, 0.03]:
+            histogram.observe(value)
+
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.015)
+        self.assertAlmostEqual(histogram.quantile(1.0), 0.04)
+        self.assertIsNone(Histogram().quantile(0.5))
@@ -0,0 +1,67 @@
+import mock
+from mock import MagicMock
+
+from voctocore.lib.latency import LatencyProbe, LatencyTracer
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+CLOCK_TIME_NONE = 2**64 - 1
+
+
+class LatencyTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch('voctocore.lib.latency.Gst')
+        self.gst = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.gst.SECOND = 1000000000
+        self.gst.CLOCK_TIME_NONE = CLOCK_TIME_NONE
+
+    def pad(self, now, base_time=0):
+        # pad whose segment maps buffer timestamps to themselves
+        pad = MagicMock()
+        element = pad.get_parent_element.return_value
+        element.get_clock.return_value.get_time.return_value = now
+        element.get_base_time.return_value = base_time
+        segment = pad.get_sticky_event.return_value.parse_segment.return_value
+        segment.to_running_time.side_effect = lambda fmt, pts: pts
+        return pad
+
+    def buffer(self, pts):
+        info = MagicMock()
+        info.get_buffer.return_value.pts = pts
+        return info
+
+    def test_probe_samples_every_nth_buffer(self):
+        probe = LatencyProbe(every=3)
+        pad = self.pad(now=1040000000, base_time=1000000000)
+
+        for _ in range(7):
+            self.assertEqual(probe.on_buffer(pad, self.buffer(0)), self.gst.PadProbeReturn.OK)
+
+        self.assertEqual(sum(probe.histogram.counts), 2)
+        self.assertAlmostEqual(probe.histogram.sum, 0.08)
+
+    def test_probe_skips_buffers_without_timestamp(self):
+        probe = LatencyProbe(every=1)
+
+        probe.on_buffer(self.pad(now=0), self.buffer(CLOCK_TIME_NONE))
+
+        self.assertEqual(sum(probe.histogram.counts), 0)
+
+    def test_tracer_probes_known_elements(self):
+        elements = {
+            r'^video-([\w_-]+)$': ['video-cam1', 'video-mix'],
+            r'^fd-([\w_-]+)$': ['fd-mix'],
+        }
+        pipeline = MagicMock()
+        pipeline.fetch_elements_by_name.side_effect = lambda regex: [
+            MagicMock(**{'get_name.return_value': name}) for name in elements.get(regex, [])]
+
+        tracer = LatencyTracer(pipeline, every=1)
+
+        self.assertEqual(sorted(tracer.probes), [('cam1', 'tee'), ('mix', 'output'), ('mix', 'tee')])
+        tracer.probes[('mix', 'output')].histogram.observe(0.03)
+        report = tracer.report()
+        self.assertEqual(report['mix/output']['samples'], 1)
+        self.assertAlmostEqual(report['mix/output']['p50'], 0.03)
+        self.assertIsNone(report['cam1/tee']['p50'])
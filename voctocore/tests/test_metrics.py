@@ -0,0 +1,39 @@
+from mock import MagicMock
+from prometheus_client.metrics_core import GaugeMetricFamily
+
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class MetricsTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.metrics import Metrics
+        self.metrics = Metrics(MagicMock())
+        self.level = 10
+        self.metrics.sample = self.sample
+
+    def sample(self):
+        family = GaugeMetricFamily('voctocore_test', 'Test value')
+        family.add_metric([], self.level)
+        yield family
+
+    def collected(self):
+        return {family.name: family.samples[0].value for family in self.metrics.collect()}
+
+    def test_scrapes_serve_the_last_snapshot(self):
+        self.metrics.update()
+        self.level = 20
+
+        collected = self.collected()
+
+        self.assertEqual(collected['voctocore_test'], 10)
+        self.assertGreaterEqual(collected['voctocore_metrics_snapshot_age_seconds'], 0)
+
+        self.metrics.update()
+        self.assertEqual(self.collected()['voctocore_test'], 20)
+
+    def test_scrape_before_first_snapshot(self):
+        self.assertEqual(sorted(self.collected()), [
+            'voctocore_metrics_scrape_duration_seconds',
+            'voctocore_metrics_snapshot_duration_seconds',
+        ])
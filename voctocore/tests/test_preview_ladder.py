@@ -0,0 +1,78 @@
+import mock
+
+from vocto.port import Port
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+from voctocore.tests.mocks import args_mock
+
+
+class PreviewLadderTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.config import Config
+        self.config = Config
+        Config.given('previews', 'ladder', '320x180, 1280x720,640x360')
+        Config.given('previews', 'videocaps', 'image/jpeg,width=1024,height=576,framerate=25/1')
+
+    def test_ladder_is_sorted_largest_first(self):
+        self.assertEqual(self.config.getPreviewLadder(), [(1280, 720), (640, 360), (320, 180)])
+
+    def test_rung_is_the_smallest_size_filling_the_area(self):
+        self.assertEqual(self.config.getPreviewRung(320, 180), 2)
+        self.assertEqual(self.config.getPreviewRung(400, 225), 1)
+        self.assertEqual(self.config.getPreviewRung(1920, 1080), 0)
+        self.assertEqual(Port.rung(Port.SOURCES_PREVIEW + 1, 2), 13301)
+
+    def test_caps_of_a_rendition(self):
+        self.assertEqual(self.config.getPreviewCaps((640, 360)),
+                         'image/jpeg,width=640,height=360,framerate=25/1')
+
+    def test_invalid_size(self):
+        self.config.given('previews', 'ladder', '320:180')
+        with self.assertRaises(ValueError):
+            self.config.getPreviewLadder()
+
+    def test_scaler_cascades_from_the_previous_size(self):
+        from voctocore.lib.previewscaler import PreviewScaler
+        with mock.patch('voctocore.lib.previewscaler.Args', args_mock), \
+                mock.patch('voctocore.lib.previewscaler.Config', self.config):
+            scaler = PreviewScaler('cam1', self.config.getPreviewLadder())
+
+        self.assertContainsIgnoringWhitespace(
+            scaler.bin,
+            r"preview-cam1-0\. ! queue max-size-time=3000000000 name=queue-preview-scale-cam1-1 "
+            r"! videoscale ! video/x-raw,width=640,height=360")
+        self.assertContainsIgnoringWhitespace(scaler.bin, r"preview-cam1-1\. ! queue")
+        self.assertNotIn("preview-cam1-2.", scaler.bin)
+
+
+class PipelinePreviewLadderTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.config import Config
+        from voctocore.lib.pipeline import Pipeline
+        Config.given('previews', 'ladder', '640x360, 320x180')
+        Config.given('mix', 'sources', 'cam1,mic')
+        Config.given('source.mic', 'kind', 'pa')
+        self.pipeline = Pipeline.__new__(Pipeline)
+        self.pipeline.bins = []
+        self.pipeline.ports = []
+        for patch in [mock.patch('voctocore.lib.pipeline.Config', Config),
+                      mock.patch('voctocore.lib.pipeline.AVPreviewOutput'),
+                      mock.patch('voctocore.lib.pipeline.PreviewScaler')]:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_sources_with_video_get_the_ladder(self):
+        from voctocore.lib import pipeline
+        self.pipeline.add_previews('cam1', Port.SOURCES_PREVIEW)
+
+        pipeline.PreviewScaler.assert_called_once_with('cam1', [(640, 360), (320, 180)])
+        self.assertEqual([c.args[1] for c in pipeline.AVPreviewOutput.call_args_list], [13100, 13200])
+
+    def test_audio_only_source_gets_a_single_preview(self):
+        from voctocore.lib import pipeline
+        self.pipeline.add_previews('mic', Port.SOURCES_PREVIEW + 1)
+
+        pipeline.PreviewScaler.assert_not_called()
+        pipeline.AVPreviewOutput.assert_called_once_with('mic', 13101)
+        self.assertEqual([port.name for port in self.pipeline.ports], ['preview-mic'])
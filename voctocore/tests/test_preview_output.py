@@ -0,0 +1,60 @@
+import logging
+
+import mock
+from mock import MagicMock
+
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class PreviewOutputTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.avpreviewoutput import AVPreviewOutput
+        # skip opening the listening socket
+        self.output = AVPreviewOutput.__new__(AVPreviewOutput)
+        self.output.log = logging.getLogger('AVPreviewOutput[cam1]')
+        self.output.source = 'cam1'
+        self.output.name = 'cam1'
+        self.output.lazy = True
+        self.output.idle_timeout = 10
+        self.output.idle_timer = None
+        self.output.encoding = False
+        self.output.activations = 0
+        self.output.currentConnections = dict()
+        self.output.pipeline = MagicMock()
+        self.valve = self.output.pipeline.get_by_name.return_value
+
+    @mock.patch('voctocore.lib.avpreviewoutput.GLib')
+    def test_first_client_starts_encoding(self, glib):
+        self.output.start_encoding()
+        self.output.start_encoding()
+
+        self.valve.set_property.assert_called_with('drop', False)
+        self.valve.send_event.assert_called_once()
+        self.assertTrue(self.output.encoding)
+        self.assertEqual(self.output.activations, 1)
+
+    @mock.patch('voctocore.lib.avpreviewoutput.GLib')
+    def test_last_client_stops_encoding_after_timeout(self, glib):
+        self.output.start_encoding()
+        conn = MagicMock()
+        self.output.currentConnections[conn] = None
+
+        self.output.close_connection(conn)
+
+        glib.timeout_add_seconds.assert_called_once_with(10, self.output.on_idle)
+        self.assertTrue(self.output.encoding)
+        self.assertFalse(self.output.on_idle())
+        self.valve.set_property.assert_called_with('drop', True)
+        self.assertFalse(self.output.encoding)
+
+    @mock.patch('voctocore.lib.avpreviewoutput.GLib')
+    def test_reconnect_within_timeout_keeps_encoding(self, glib):
+        self.output.start_encoding()
+        self.output.idle_timer = 42
+
+        self.output.start_encoding()
+
+        glib.source_remove.assert_called_once_with(42)
+        self.assertIsNone(self.output.idle_timer)
+        self.assertEqual(self.output.activations, 1)
@@ -0,0 +1,136 @@
+import mock
+from mock import MagicMock, call
+
+from vocto.frame import Frame
+from voctocore.lib.scene import Gst, Scene, SceneUpdater
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class SceneTest(VoctomixTest):
+    @mock.patch("voctocore.lib.scene.GstController.InterpolationControlSource",
+                side_effect=lambda: MagicMock())
+    def setUp(self, control_source):
+        super().setUp()
+        self.scene = Scene(['cam1', 'cam2', 'grabber'], MagicMock(), 25, 0)
+        self.frame_time = self.scene.frame_time
+
+    def test_commit_precomputes_values(self):
+        self.scene.commit('cam1', [Frame(True, 255, 100, [0, 0, 960, 540]),
+                                   Frame(True, 128, 100, [10, 20, 970, 560])])
+
+        values = self.scene.values['cam1']
+        self.assertEqual(values['xpos'], (0, 10))
+        self.assertEqual(values['height'], (540, 540))
+        self.assertEqual(values['zorder'], (100, 100))
+        self.assertTrue(self.scene.dirty)
+
+    def test_push_sets_all_frames(self):
+        self.scene.commit('cam1', [Frame(True, 255, 100, [0, 0, 960, 540]),
+                                   Frame(True, 255, 100, [10, 20, 970, 560])])
+        self.scene.set('cam2', Frame(True, 255, 101, [960, 0, 1920, 540]))
+
+        self.scene.push(1000)
+
+        self.assertEqual(self.scene.pads['cam1']['xpos'].set.call_args_list,
+                         [call(1000, 0), call(1000 + self.frame_time, 10)])
+        self.assertEqual(self.scene.pads['cam2']['xpos'].set.call_args_list,
+                         [call(1000, 960)])
+        self.assertFalse(self.scene.dirty)
+        self.assertEqual(self.scene.pushes, 1)
+
+    def test_push_hides_uncommitted_sources(self):
+        self.scene.set('cam1', Frame(True, 255, 100, [0, 0, 960, 540]))
+
+        self.scene.push(0)
+
+        self.scene.pads['grabber']['alpha'].set.assert_called_once_with(0, 0.0)
+        self.scene.pads['grabber']['zorder'].set.assert_called_once_with(0, -1)
+
+    def test_push_without_commit_does_nothing(self):
+        self.scene.set('cam1', Frame(True, 255, 100, [0, 0, 960, 540]))
+        self.scene.push(0)
+
+        self.scene.push(40)
+
+        self.scene.pads['cam1']['xpos'].set.assert_called_once_with(0, 0)
+        self.assertEqual(self.scene.pushes, 1)
+
+    def test_push_only_sets_changed_properties(self):
+        self.scene.set('cam1', Frame(True, 255, 100, [0, 0, 960, 540]))
+        self.scene.push(0)
+        points = self.scene.points
+
+        self.scene.set('cam1', Frame(True, 255, 100, [10, 0, 970, 540]))
+        self.scene.push(100)
+
+        self.assertEqual(self.scene.pads['cam1']['xpos'].set.call_args_list,
+                         [call(0, 0), call(100, 10)])
+        self.scene.pads['cam1']['ypos'].set.assert_called_once_with(0, 0)
+        self.scene.pads['cam2']['alpha'].set.assert_called_once_with(0, 0.0)
+        self.assertEqual(self.scene.points, 1)
+        self.assertEqual(self.scene.points_total, points + 1)
+
+    def test_push_sets_all_values_while_transition_is_running(self):
+        self.scene.commit('cam1', [Frame(True, 255, 100, [0, 0, 960, 540]),
+                                   Frame(True, 255, 100, [10, 0, 970, 540])])
+        self.scene.push(0)
+
+        self.scene.set('cam1', Frame(True, 255, 100, [10, 0, 970, 540]))
+        self.scene.push(self.frame_time)
+
+        self.assertEqual(self.scene.pads['cam1']['ypos'].set.call_args_list,
+                         [call(0, 0), call(self.frame_time, 0)])
+
+
+class SceneUpdaterTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        self.scene = MagicMock()
+        self.scene.dirty = False
+        self.scene.push.side_effect = lambda at_time: setattr(self.scene, 'dirty', False)
+        self.sig = MagicMock()
+        self.pipeline = MagicMock()
+
+    def updater(self, mode):
+        return SceneUpdater(self.pipeline, self.sig, [self.scene], mode, 40)
+
+    def test_handoff_mode_connects_handoff(self):
+        updater = self.updater('handoff')
+
+        self.sig.connect.assert_called_once_with('handoff', updater.on_handoff)
+
+    def test_probe_mode_installs_probe_only_while_dirty(self):
+        updater = self.updater('probe')
+        pad = self.sig.get_static_pad.return_value
+        updater.update()
+        pad.add_probe.assert_not_called()
+
+        self.scene.dirty = True
+        updater.update()
+        updater.update()
+
+        pad.add_probe.assert_called_once_with(Gst.PadProbeType.BUFFER, updater.on_probe)
+        self.assertEqual(updater.on_probe(pad, None), Gst.PadProbeReturn.REMOVE)
+        self.scene.push.assert_called_once()
+        self.assertIsNone(updater.probe)
+        self.sig.connect.assert_not_called()
+
+    def test_mainloop_mode_pushes_with_lookahead(self):
+        updater = self.updater('mainloop')
+        self.pipeline.get_state.return_value = (None, Gst.State.PLAYING, None)
+        self.pipeline.get_pipeline_clock.return_value.get_time.return_value = 1000
+        self.pipeline.get_base_time.return_value = 200
+
+        self.scene.dirty = True
+        updater.update()
+
+        self.scene.push.assert_called_once_with(840)
+        self.assertEqual(list(updater.latencies), [40])
+
+    def test_mainloop_mode_pushes_to_start_when_not_playing(self):
+        updater = self.updater('mainloop')
+
+        self.scene.dirty = True
+        updater.update()
+
+        self.scene.push.assert_called_once_with(0)
@@ -0,0 +1,56 @@
+import os
+import socket
+import tempfile
+
+import mock
+from mock import MagicMock
+
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+from voctocore.tests.mocks import args_mock
+
+
+class ShmOutputTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.config import Config
+        from voctocore.lib.shmoutput import ShmOutput
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        Config.given('shmoutput', 'path', self.dir.name)
+
+        # a socket left behind by an earlier run
+        self.stale = socket.socket(socket.AF_UNIX)
+        self.stale.bind(os.path.join(self.dir.name, 'mix-video'))
+        self.addCleanup(self.stale.close)
+
+        with mock.patch('voctocore.lib.shmoutput.Args', args_mock), \
+                mock.patch('voctocore.lib.shmoutput.Config', Config):
+            self.output = ShmOutput('mix', use_audio_mix=True)
+
+    def test_bin_writes_both_streams_into_shared_memory(self):
+        self.assertContainsIgnoringWhitespace(
+            self.output.bin,
+            r"video-mix\. ! video/x-raw.* ! queue max-size-time=3000000000 leaky=downstream "
+            r"name=queue-shm-video-mix ! shmsink socket-path={}/mix-video".format(self.dir.name))
+        self.assertContainsIgnoringWhitespace(
+            self.output.bin, r"audio-mix\. ! queue [^!]* name=queue-shm-audio-mix ! shmsink")
+        self.assertFalse(os.path.exists(os.path.join(self.dir.name, 'mix-video')))
+
+    @mock.patch('voctocore.lib.shmoutput.GLib')
+    def test_counts_clients_of_the_busiest_stream(self, glib):
+        pipeline = MagicMock()
+        self.output.attach(pipeline)
+        shmsink = pipeline.get_by_name.return_value
+        on_connected = shmsink.connect.call_args_list[0][0][1]
+
+        on_connected(shmsink, 3)
+        glib.idle_add.assert_called_once_with(self.output.on_connected, 'video', 3)
+
+        self.output.on_connected('video', 3)
+        self.output.on_connected('video', 4)
+        self.output.on_connected('audio', 5)
+        self.assertEqual(self.output.num_connections(), 2)
+
+        self.output.on_disconnected('video', 3)
+        self.output.on_disconnected('video', 4)
+        self.assertEqual(self.output.num_connections(), 1)
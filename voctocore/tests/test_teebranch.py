@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+
+import mock
+from mock import MagicMock
+
+from voctocore.lib.teebranch import TeeBranch
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+@mock.patch('voctocore.lib.teebranch.Gst')
+class TeeBranchTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        self.tee = MagicMock()
+        self.sinkpad = MagicMock()
+        # both in the pipeline, nothing to ghost
+        pipeline = MagicMock()
+        self.tee.get_parent.return_value = pipeline
+        self.sinkpad.get_parent_element.return_value.get_parent.return_value = pipeline
+        self.branch = TeeBranch(self.tee, self.sinkpad)
+        self.pad = self.tee.request_pad_simple.return_value
+
+    def link(self, gst):
+        self.pad.link.return_value = gst.PadLinkReturn.OK
+        return self.branch.link()
+
+    def test_link_requests_one_pad(self, gst):
+        self.assertTrue(self.link(gst))
+        self.assertTrue(self.link(gst))
+
+        self.tee.request_pad_simple.assert_called_once_with('src_%u')
+        self.pad.link.assert_called_once_with(self.sinkpad)
+        self.tee.set_property.assert_called_once_with('allow-not-linked', True)
+
+    @mock.patch('voctocore.lib.teebranch.GLib')
+    def test_unlink_waits_for_idle_pad(self, glib, gst):
+        self.link(gst)
+        self.branch.unlink()
+        self.pad.add_probe.assert_called_once_with(gst.PadProbeType.IDLE, self.branch.on_idle)
+        self.assertTrue(self.branch.is_linked())
+
+        self.assertEqual(self.branch.on_idle(self.pad, None), gst.PadProbeReturn.REMOVE)
+
+        self.sinkpad.get_peer.return_value.unlink.assert_called_once_with(self.sinkpad)
+        self.assertFalse(self.branch.is_linked())
+        glib.idle_add.assert_called_once_with(self.branch.release, self.pad, [])
+        self.assertFalse(self.branch.release(self.pad, []))
+        self.tee.release_request_pad.assert_called_once_with(self.pad)
+
+    def test_link_cancels_pending_unlink(self, gst):
+        self.link(gst)
+        self.branch.unlink()
+        self.link(gst)
+
+        self.branch.on_idle(self.pad, None)
+
+        self.sinkpad.get_peer.return_value.unlink.assert_not_called()
+        self.assertTrue(self.branch.is_linked())
+        self.tee.request_pad_simple.assert_called_once()
+
+
+# runs without the gi mock in a process of its own
+PIPELINE_SCRIPT = """
+import sys
+try:
+    import gi
+    gi.require_version('Gst', '1.0')
+    from gi.repository import Gst, GLib
+except (ImportError, ValueError):
+    sys.exit(77)
+Gst.init([])
+from voctocore.lib.teebranch import TeeBranch
+
+pipeline = Gst.parse_launch('''
+    bin.(
+        name=source
+        videotestsrc is-live=true
+        ! video/x-raw,width=64,height=36,framerate=25/1
+        ! tee name=video-cam1
+        video-cam1. ! queue ! fakesink async=false
+    )
+    bin.(
+        name=output
+        queue name=queue-output
+        ! fakesink name=sink signal-handoffs=true async=false
+    )
+''')
+output = pipeline.get_by_name('output')
+ghostpad = Gst.GhostPad.new('sink', pipeline.get_by_name('queue-output').get_static_pad('sink'))
+output.add_pad(ghostpad)
+branch = TeeBranch(pipeline.get_by_name('video-cam1'), ghostpad)
+
+buffers = []
+pipeline.get_by_name('sink').connect('handoff', lambda sink, buffer, pad: buffers.append(buffer))
+loop = GLib.MainLoop()
+def run(ms):
+    GLib.timeout_add(ms, loop.quit)
+    loop.run()
+
+pipeline.set_state(Gst.State.PLAYING)
+run(200)
+assert not buffers
+assert branch.link()
+run(300)
+assert buffers, 'no buffers through the linked branch'
+branch.unlink()
+run(100)
+assert not branch.is_linked()
+assert len(pipeline.get_by_name('source').srcpads) == 0
+assert branch.link()
+pipeline.set_state(Gst.State.NULL)
+"""
+
+
+class TeeBranchPipelineTest(VoctomixTest):
+    def test_links_tee_in_another_bin(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env = dict(os.environ, PYTHONPATH=root)
+        result = subprocess.run([sys.executable, '-c', PIPELINE_SCRIPT], env=env,
+                                capture_output=True, text=True)
+        if result.returncode == 77:
+            self.skipTest('GStreamer is not available')
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,52 @@
+from mock import MagicMock
+
+from voctocore.lib.snapshot import Snapshot
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class TelemetryTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        from voctocore.lib.telemetry import Telemetry
+        self.levels = {'cam1': 10, 'cam2': 20}
+        self.snapshot = Snapshot()
+        self.pipeline = MagicMock()
+        self.pipeline.sample_queues.side_effect = self.sample_queues
+        self.controlserver = MagicMock()
+        self.controlserver.opt_in_topics = set()
+        self.controlserver.has_subscribers.side_effect = lambda topic: topic == 'queue_report'
+        self.telemetry = Telemetry(self.pipeline, self.controlserver)
+
+    def sample_queues(self):
+        self.snapshot.update(self.levels)
+        return self.snapshot
+
+    def pushed(self):
+        reports = [c.args[0] for c in self.controlserver.notify.call_args_list]
+        self.controlserver.notify.reset_mock()
+        return [(r.args[0], r.args[1], r.args[2].value) for r in reports]
+
+    def test_topics_are_opt_in(self):
+        self.assertEqual(self.controlserver.opt_in_topics, {'queue_report', 'port_report'})
+
+    def test_pushes_only_changed_queues(self):
+        self.telemetry.on_timer()
+        self.assertEqual(self.pushed(), [('queue_report', 'seq=1', {'cam1': 10, 'cam2': 20})])
+
+        self.levels['cam2'] = 25
+        self.telemetry.on_timer()
+        self.assertEqual(self.pushed(), [('queue_report', 'seq=2', {'cam2': 25})])
+
+        self.telemetry.on_timer()
+        self.assertEqual(self.pushed(), [])
+        self.pipeline.sample_ports.assert_not_called()
+
+    def test_pushes_changes_sampled_by_requests_in_between(self):
+        self.telemetry.on_timer()
+        self.pushed()
+        self.levels['cam1'] = 15
+        self.sample_queues()
+
+        self.telemetry.on_timer()
+
+        self.assertEqual(self.pushed(), [('queue_report', 'seq=2', {'cam1': 15})])
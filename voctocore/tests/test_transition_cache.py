@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+from vocto.transition_cache import TransitionCache
+from voctocore.lib.config import Config
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class TransitionCacheTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache = TransitionCache(self.tempdir.name)
+        self.composites = Config.getComposites()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def configure(self, fps=25):
+        return self.cache.configure(Config.items('transitions'), self.composites,
+                                    fps=fps, size=Config.getVideoResolution())
+
+    def cache_files(self):
+        return sorted(os.listdir(self.tempdir.name))
+
+    def test_configure_stores_transitions(self):
+        transitions = self.configure()
+
+        self.assertGreater(len(transitions), 0)
+        self.assertEqual(len(self.cache_files()), 1)
+
+    def test_cached_transitions_equal_calculated_ones(self):
+        calculated = self.configure()
+        cached = self.configure()
+
+        self.assertEqual(len(cached), len(calculated))
+        for a, b in zip(calculated.transitions, cached.transitions):
+            self.assertEqual(a.name(), b.name())
+            self.assertEqual(a.flip, b.flip)
+            self.assertEqual(a.frames(), b.frames())
+            for i in range(a.frames()):
+                self.assertEqual(a.A(i), b.A(i))
+                self.assertEqual(a.B(i), b.B(i))
+                self.assertEqual(a.A(i).key, b.A(i).key)
+                self.assertEqual(a.composites[i].name, b.composites[i].name)
+
+    def test_cached_transitions_are_solvable(self):
+        self.configure()
+        cached = self.configure()
+
+        transition, _ = cached.solve(self.composites['sbs'], self.composites['lec'], False)
+        self.assertIsNotNone(transition)
+
+    def test_changed_fps_invalidates_entry(self):
+        self.configure(fps=25)
+        transitions = self.configure(fps=50)
+
+        self.assertEqual(len(self.cache_files()), 2)
+        self.assertEqual(transitions.fps, 50)
+
+    def test_broken_entry_gets_recalculated(self):
+        self.configure()
+        filename, = self.cache_files()
+        with open(os.path.join(self.tempdir.name, filename), 'wb') as file:
+            file.write(b'garbage')
+
+        transitions = self.configure()
+
+        self.assertGreater(len(transitions), 0)
+        self.assertGreater(os.path.getsize(os.path.join(self.tempdir.name, filename)), 7)
+
+    def test_prune_keeps_most_recent_entries(self):
+        for fps in (25, 30, 50):
+            self.configure(fps=fps)
+
+        self.cache.prune(keep=1)
+
+        self.assertEqual(len(self.cache_files()), 1)
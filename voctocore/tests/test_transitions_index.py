@@ -0,0 +1,47 @@
+from vocto.transitions import Transitions
+from voctocore.lib.config import Config
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+def linear_solve(transitions, begin, end, flip):
+    """ reference implementation of Transitions.solve() without index
+    """
+    for transition in transitions.transitions:
+        if transition.begin().equals(begin, True) and transition.end().equals(end, True, flip):
+            return transition, False
+        if transition.begin().equals(begin, True, flip) and transition.end().equals(end, True):
+            return transition, True
+        if transition.begin().equals(end, True) and transition.end().equals(begin, True, flip):
+            return transition.reversed(), True
+        if transition.begin().equals(end, True, flip) and transition.end().equals(begin, True):
+            return transition.reversed(), False
+    return None, False
+
+
+class TransitionsIndexTest(VoctomixTest):
+    def setUp(self):
+        super().setUp()
+        self.composites = Config.getComposites()
+        self.transitions = Transitions.configure(Config.items('transitions'), self.composites, fps=25)
+
+    def test_solve_matches_linear_scan(self):
+        composites = list(self.composites.values())
+        composites += [c.swapped() for c in composites]
+        for begin in composites:
+            for end in composites:
+                for flip in (False, True):
+                    expected, expected_swap = linear_solve(self.transitions, begin, end, flip)
+                    found, swap = self.transitions.solve(begin, end, flip)
+                    if expected is None:
+                        self.assertIsNone(found)
+                        continue
+                    self.assertIsNotNone(found)
+                    self.assertEqual(found.name(), expected.name())
+                    self.assertEqual(swap, expected_swap)
+
+    def test_appended_transitions_get_indexed(self):
+        transitions = Transitions(self.transitions.targets, self.transitions.fps)
+        transitions.transitions += self.transitions.transitions
+
+        begin, end = self.composites['sbs'], self.composites['lec']
+        self.assertIsNotNone(transitions.solve(begin, end, False)[0])
@@ -0,0 +1,36 @@
+from vocto.transitions import Transitions
+from voctocore.lib.config import Config
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+
+
+class TransitionsVectorizedTest(VoctomixTest):
+    def tearDown(self):
+        Transitions.vectorized = True
+
+    def configure(self, fps, vectorized):
+        Transitions.vectorized = vectorized
+        return Transitions.configure(Config.items('transitions'), Config.getComposites(), fps=fps)
+
+    def assertBitIdentical(self, python, vectorized):
+        self.assertEqual(len(python), len(vectorized))
+        for a, b in zip(python.transitions, vectorized.transitions):
+            self.assertEqual(a.name(), b.name())
+            self.assertEqual(a.flip, b.flip)
+            self.assertEqual(a.frames(), b.frames())
+            for ca, cb in zip(a.composites, b.composites):
+                self.assertEqual(ca.name, cb.name)
+                for fa, fb in zip(ca.frame, cb.frame):
+                    self.assertEqual([float(x).hex() for x in fa.rect],
+                                     [float(x).hex() for x in fb.rect])
+                    self.assertEqual(fa.crop, fb.crop)
+                    self.assertEqual(fa.alpha, fb.alpha)
+                    self.assertEqual(fa.key, fb.key)
+
+    def test_vectorized_interpolation_is_bit_identical_at_25_fps(self):
+        self.assertBitIdentical(self.configure(25, False), self.configure(25, True))
+
+    def test_vectorized_interpolation_is_bit_identical_at_50_fps(self):
+        self.assertBitIdentical(self.configure(50, False), self.configure(50, True))
+
+    def test_vectorized_interpolation_is_bit_identical_at_60_fps(self):
+        self.assertBitIdentical(self.configure(60, False), self.configure(60, True))
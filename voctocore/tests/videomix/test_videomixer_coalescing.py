@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+import mock
+
+from voctocore.lib.videomix import VideoMix
+from voctocore.tests.helper.voctomix_test import VoctomixTest
+from voctocore.tests.mocks import args_mock
+from voctocore.tests.mocks.config import config_mock
+
+
+@mock.patch("voctocore.lib.videomix.Args", args_mock)
+@mock.patch("voctocore.lib.videomix.Config", config_mock)
+class VideomixerCoalescing(VoctomixTest):
+    @mock.patch("voctocore.lib.videomix.Args", args_mock)
+    @mock.patch("voctocore.lib.videomix.Config", config_mock)
+    def setUp(self):
+        super().setUp()
+        self.videomixer = VideoMix()
+        pipeline_mock = MagicMock()
+        pipeline_mock.vmix = self.videomixer
+        pipeline_mock.vmix.attach(pipeline_mock)
+        # make sure every following request falls into the same frame
+        self.videomixer.frameTime = 3600
+
+    def test_request_within_frame_gets_deferred(self):
+        self.videomixer.setCompositeEx("sbs", "cam2", "cam1")
+
+        self.assertEqual(self.videomixer.pending, ("sbs", "cam2", "cam1", False))
+        self.assertEqual((self.videomixer.compositeMode, self.videomixer.sourceA, self.videomixer.sourceB),
+                         ("sbs", "cam2", "cam1"))
+        self.assertEqual(self.videomixer.appliedMode, "fs")
+        self.assertEqual(self.videomixer.coalesced, 1)
+
+    def test_flush_applies_last_request_only(self):
+        self.videomixer.setCompositeEx("sbs", "cam2", "cam1")
+        self.videomixer.setCompositeEx("lec", None, None)
+        self.videomixer.setVideoSourceB("slides")
+
+        self.videomixer.on_flush()
+
+        self.assertIsNone(self.videomixer.pending)
+        self.assertEqual((self.videomixer.appliedMode, self.videomixer.appliedA, self.videomixer.appliedB),
+                         ("lec", "cam2", "slides"))
+        self.assertEqual(self.videomixer.requests, 4)
+        self.assertEqual(self.videomixer.coalesced, 3)
+        self.assertEqual(self.videomixer.dropped, 2)
+
+    def test_unknown_composite_is_rejected_immediately(self):
+        with self.assertRaises(KeyError):
+            self.videomixer.setCompositeEx("unknown", "cam1", "cam2")
+
+        self.assertIsNone(self.videomixer.pending)
+
+    def test_disabled_coalescing_applies_immediately(self):
+        self.videomixer.coalesce = False
+
+        self.videomixer.setCompositeEx("sbs", "cam2", "cam1")
+
+        self.assertIsNone(self.videomixer.pending)
+        self.assertEqual(self.videomixer.appliedMode, "sbs")
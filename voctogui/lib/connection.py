@@ -130,6 +130,12 @@ def on_loop():
         log.debug(f'command_queue contained {line!r}, which is invalid, returning early')
         return True
 
+    # skip request id of replies to pipelined requests
+    if words[0].startswith('id='):
+        words = words[1:]
+        if len(words) < 1:
+            return True
+
     signal = words[0]
     args = words[1:]
     log.debug(f"on_loop {signal=} {args=}")
@@ -165,3 +171,20 @@ def on(signal, cb):
         signal_handlers[signal] = []
 
     signal_handlers[signal].append(cb)
+
+
+def on_subscriptions(*topics):
+    log.debug('now subscribed to %s', " ".join(topics))
+
+
+def subscribe(*topics):
+    '''additionally receive notifications of these topics'''
+    if 'subscriptions' not in signal_handlers:
+        on('subscriptions', on_subscriptions)
+    # keep everything else we receive without any subscription
+    send('subscribe', '*', *topics)
+
+
+def unsubscribe(*topics):
+    '''stop receiving notifications of these topics'''
+    send('unsubscribe', *topics)
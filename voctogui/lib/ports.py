@@ -9,9 +9,6 @@ from voctogui.lib.uibuilder import UiBuilder
 import voctogui.lib.connection as Connection
 from vocto.port import Port
 
-# time interval to re-fetch queue timings
-TIMER_RESOLUTION = 5.0
-
 COLOR_OK = ("white", "darkgreen")
 COLOR_WARN = ("darkred", "darkorange")
 COLOR_ERROR = ("white", "red")
@@ -29,7 +26,9 @@ class PortsWindowController():
         self.title = uibuilder.get_check_widget('ports_title')
         self.title.set_title("VOC2CORE {}".format(Config.getHost()))
         # remember row iterators
-        self.iterators = None
+        self.iterators = dict()
+        # sequence number of the last report we applied
+        self.seq = 0
 
         # listen for queue_report from voctocore
         Connection.on('port_report', self.on_port_report)
@@ -42,27 +41,36 @@ class PortsWindowController():
             else:
                 return COLOR_ERROR if port.is_input() else COLOR_WARN
 
+        report = list(report)
+        if report and report[0].startswith('seq='):
+            seq = int(report.pop(0)[4:])
+            # skip reports we already know
+            if seq <= self.seq:
+                return
+            self.seq = seq
         # read string report into dictonary
         report = json.loads("".join(report))
-        # check if this is the initial report
-        if not self.iterators:
-            # append report as rows to treeview store and remember row iterators
-            self.iterators = dict()
-            for p in report:
-                port = Port.from_str(p)
-                self.iterators[port.port] = self.store.append((
+        # reports pushed by voctocore only contain the ports which changed
+        for p in report:
+            port = Port.from_str(p)
+            # older versions of voctocore do not report the index
+            key = p.get('index', port.port)
+            if key not in self.iterators:
+                # append as row to treeview store and remember row iterator
+                self.iterators[key] = self.store.append((
                     port.name,
                     port.audio,
                     port.video,
                     "IN" if port.is_input() else "OUT",
                     port.port,
-                    *color(port)
+                    *color(port),
+                    port.dropped,
+                    port.late,
+                    port.lag
                 ))
-        else:
-            # just update values of second column
-            for p in report:
-                port = Port.from_str(p)
-                it = self.iterators[port.port]
+            else:
+                # just update values
+                it = self.iterators[key]
                 self.store.set_value(it, 0, port.name)
                 self.store.set_value(it, 1, port.audio)
                 self.store.set_value(it, 2, port.video)
@@ -70,21 +78,18 @@ class PortsWindowController():
                 self.store.set_value(it, 4, port.port)
                 self.store.set_value(it, 5, color(port)[0])
                 self.store.set_value(it, 6, color(port)[1])
+                self.store.set_value(it, 7, port.dropped)
+                self.store.set_value(it, 8, port.late)
+                self.store.set_value(it, 9, port.lag)
 
     def show(self, visible=True):
         # check if widget is getting visible
         if visible:
-            # request queue timing report from voctocore
-            Connection.send('report_ports')
-            # schedule repetition
-            GLib.timeout_add(TIMER_RESOLUTION * 1000, self.do_timeout)
+            # let voctocore push changes and request what we missed
+            Connection.subscribe('port_report')
+            Connection.send('report_ports', 'since=%d' % self.seq)
             # do the boring stuff
             self.win.show()
         else:
+            Connection.unsubscribe('port_report')
             self.win.hide()
-
-    def do_timeout(self):
-        # re-request queue report
-        Connection.send('report_ports')
-        # repeat if widget is visible
-        return self.win.is_visible()
@@ -8,9 +8,6 @@ from voctogui.lib.config import Config
 from voctogui.lib.uibuilder import UiBuilder
 import voctogui.lib.connection as Connection
 
-# time interval to re-fetch queue timings
-TIMER_RESOLUTION = 1.0
-
 class QueuesWindowController():
 
     def __init__(self,uibuilder):
@@ -22,39 +19,40 @@ class QueuesWindowController():
         self.scroll = uibuilder.get_check_widget('queue_scroll')
 
         # remember row iterators
-        self.iterators = None
+        self.iterators = dict()
+        # sequence number of the last report we applied
+        self.seq = 0
 
         # listen for queue_report from voctocore
         Connection.on('queue_report', self.on_queue_report)
 
     def on_queue_report(self, *report):
+        report = list(report)
+        if report and report[0].startswith('seq='):
+            seq = int(report.pop(0)[4:])
+            # skip reports we already know
+            if seq <= self.seq:
+                return
+            self.seq = seq
         # read string report into dictonary
         report = json.loads("".join(report))
-        # check if this is the initial report
-        if not self.iterators:
-            # append report as rows to treeview store and remember row iterators
-            self.iterators = dict()
-            for queue, time in report.items():
-                self.iterators[queue] = self.store.append((queue, time / Gst.SECOND))
-        else:
-            # just update values of second column
-            for queue, time in report.items():
+        # reports pushed by voctocore only contain the queues which changed
+        for queue, time in report.items():
+            if queue in self.iterators:
+                # just update values of second column
                 self.store.set_value(self.iterators[queue], 1, time / Gst.SECOND)
+            else:
+                # append as row to treeview store and remember row iterator
+                self.iterators[queue] = self.store.append((queue, time / Gst.SECOND))
 
     def show(self,visible=True):
         # check if widget is getting visible
         if visible:
-            # request queue timing report from voctocore
-            Connection.send('report_queues')
-            # schedule repetition
-            GLib.timeout_add(TIMER_RESOLUTION * 1000, self.do_timeout)
+            # let voctocore push changes and request what we missed
+            Connection.subscribe('queue_report')
+            Connection.send('report_queues', 'since=%d' % self.seq)
             # do the boring stuff
             self.win.show()
         else:
+            Connection.unsubscribe('queue_report')
             self.win.hide()
-
-    def do_timeout(self):
-        # re-request queue report
-        Connection.send('report_queues')
-        # repeat if widget is visible
-        return self.win.is_visible()
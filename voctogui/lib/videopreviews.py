@@ -52,6 +52,10 @@ class VideoPreviewsController(object):
 
     def addPreview(self, uibuilder, source, port, has_volume=True):
 
+        if Config.getPreviewsEnabled() and source in Config.getVideoSources(internal=True):
+            # cheapest rendition of the preview ladder which fills the widget
+            port = Port.rung(port, Config.getPreviewRung(*self.previewSize))
+
         self.log.info('Initializing video preview %s at port %d', source, port)
 
         mix_audio_display = None